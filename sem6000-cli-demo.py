@@ -1,5 +1,6 @@
 #!/usr/bin/python3
 
+from sem6000 import daemon
 from sem6000 import sem6000
 from sem6000.message import *
 from sem6000 import util
@@ -9,14 +10,23 @@ import sys
 
 
 if __name__ == '__main__':
+    # thin client mode - commands are executed by a running sem6000d keeping the connections open
+    use_daemon = len(sys.argv) > 1 and sys.argv[1] == '--daemon'
+    if use_daemon:
+        del sys.argv[1]
+
     if len(sys.argv) == 2 and sys.argv[1] == 'discover':    
-        devices = sem6000.SEM6000.discover()
+        if use_daemon:
+            devices = daemon.SEM6000DaemonClient().discover()
+        else:
+            devices = sem6000.SEM6000.discover()
         for device in devices:
             print(device['name'] + '\t' + device['address'])
     elif len(sys.argv) < 2:
         scriptname = sys.argv[0]
         print("Usage:" , file=sys.stderr)
-        print("\t" + scriptname + "[<address> <pin>] <command> [...]" , file=sys.stderr)
+        print("\t" + scriptname + " [--daemon] [<address> <pin>] <command> [...]" , file=sys.stderr)
+        print("\t\t--daemon:\tExecute the command by a running sem6000d.py instead of connecting directly" , file=sys.stderr)
         print("\t\taddress:\tAddress of the bluetooth device to connect to, i.e. 00:11:22:33:44:55" , file=sys.stderr)
         print("\t\tpin:\t\t4-digit PIN of the device, i.e. 0000" , file=sys.stderr)
         print("\t\tcommand:\tOne of the following commands to execute on the device", file=sys.stderr)
@@ -106,10 +116,17 @@ if __name__ == '__main__':
         pin = sys.argv[2]
         cmd = sys.argv[3]
 
-        sem6000 = sem6000.SEM6000(deviceAddr, debug=True)
+        # these commands work without knowing the pin - i.e. reset_pin if it has been forgotten
+        is_authorization_required = not cmd in daemon.UNAUTHORIZED_METHODS
+
+        if use_daemon:
+            # the daemon authorizes on connect if a pin is given
+            sem6000 = daemon.SEM6000DaemonClient().get_device(deviceAddr, pin if is_authorization_required else None)
+        else:
+            sem6000 = sem6000.SEM6000(deviceAddr, debug=True)
 
-        if cmd != 'reset_pin' and cmd != 'get_device_name':
-            sem6000.authorize(pin)
+            if is_authorization_required:
+                sem6000.authorize(pin)
             
         if cmd == 'change_pin':
             sem6000.change_pin(sys.argv[4])
@@ -0,0 +1,38 @@
+#!/usr/bin/python3
+
+import sys
+
+from sem6000 import fleet_backup
+
+if len(sys.argv) <= 3 or not sys.argv[1] in ['backup', 'restore']:
+    print("Usage: " + sys.argv[0] + " backup <inventory file> <backup file> [<max connections per bluetooth device>]", file=sys.stderr)
+    print("       " + sys.argv[0] + " restore <inventory file> <backup file> <report file> [<max connections per bluetooth device>]", file=sys.stderr)
+    print("\tinventory file:\tone device per line: <bluetooth address> <pin> [<bluetooth device>]", file=sys.stderr)
+    print("\tAn interrupted or partially failed run continues with the missing devices when started again within a day.", file=sys.stderr)
+    sys.exit(1)
+
+command = sys.argv[1]
+inventory = fleet_backup.read_inventory(sys.argv[2])
+
+if command == 'backup':
+    max_connections_per_bluetooth_device = 3
+    if len(sys.argv) > 4:
+        max_connections_per_bluetooth_device = int(sys.argv[4])
+
+    errors = fleet_backup.backup(inventory, sys.argv[3], max_connections_per_bluetooth_device=max_connections_per_bluetooth_device, verbose=True)
+else:
+    if len(sys.argv) <= 4:
+        print("Missing report file", file=sys.stderr)
+        sys.exit(1)
+
+    max_connections_per_bluetooth_device = 3
+    if len(sys.argv) > 5:
+        max_connections_per_bluetooth_device = int(sys.argv[5])
+
+    errors = fleet_backup.restore(inventory, sys.argv[3], sys.argv[4], max_connections_per_bluetooth_device=max_connections_per_bluetooth_device, verbose=True)
+
+for device_address, error in sorted(errors.items()):
+    print(device_address + ": " + error, file=sys.stderr)
+
+if errors:
+    sys.exit(2)
@@ -0,0 +1,27 @@
+#!/usr/bin/python3
+
+import sys
+
+from sem6000 import fleet
+
+if len(sys.argv) <= 1:
+    print("Usage: " + sys.argv[0] + " <comma separated numbers of devices> [<duration in seconds>] [<number of bluetooth devices>] [<max connections per bluetooth device>]", file=sys.stderr)
+else:
+    numbers_of_devices = [int(n) for n in sys.argv[1].split(",")]
+
+    duration = 10
+    if len(sys.argv) > 2:
+        duration = float(sys.argv[2])
+
+    number_of_bluetooth_devices = 1
+    if len(sys.argv) > 3:
+        number_of_bluetooth_devices = int(sys.argv[3])
+
+    max_connections_per_bluetooth_device = 3
+    if len(sys.argv) > 4:
+        max_connections_per_bluetooth_device = int(sys.argv[4])
+
+    print("devices\tsamples/s")
+    for number_of_devices in numbers_of_devices:
+        samples_per_second = fleet.benchmark(number_of_devices, duration=duration, number_of_bluetooth_devices=number_of_bluetooth_devices, max_connections_per_bluetooth_device=max_connections_per_bluetooth_device)
+        print(str(number_of_devices) + "\t" + "{:.1f}".format(samples_per_second))
@@ -0,0 +1,36 @@
+#!/usr/bin/python3
+
+import sys
+import time
+
+from sem6000 import sem6000
+from sem6000.bluetooth_lowenergy_interface.simulated_interface import SimulatedBluetoothInterface, SimulatedSEM6000Device
+
+def measure_command_latency(latency, number_of_commands, write_without_response):
+    device = SimulatedSEM6000Device('02:00:00:00:00:01')
+    interface = SimulatedBluetoothInterface(devices={device.mac_address: device}, latency=latency)
+    client = sem6000.SEM6000(device.mac_address, device.pin, backend=interface, write_without_response=write_without_response)
+
+    start_time = time.monotonic()
+    for i in range(number_of_commands):
+        if i % 2:
+            client.request_measurement()
+        else:
+            client.power_on()
+
+    return (time.monotonic() - start_time) / number_of_commands
+
+if len(sys.argv) > 1 and sys.argv[1] in ['-h', '--help']:
+    print("Usage: " + sys.argv[0] + " [<simulated latency in seconds>] [<number of commands>]", file=sys.stderr)
+else:
+    latency = 0.0075
+    if len(sys.argv) > 1:
+        latency = float(sys.argv[1])
+
+    number_of_commands = 100
+    if len(sys.argv) > 2:
+        number_of_commands = int(sys.argv[2])
+
+    print("write mode\t\tms/command")
+    print("with response\t\t{:.1f}".format(1000 * measure_command_latency(latency, number_of_commands, False)))
+    print("without response\t{:.1f}".format(1000 * measure_command_latency(latency, number_of_commands, True)))
@@ -0,0 +1,44 @@
+#!/usr/bin/python3
+
+import sys
+
+from sem6000 import message_benchmark
+
+if len(sys.argv) > 1 and sys.argv[1] in ['-h', '--help']:
+    print("Usage: " + sys.argv[0] + " [<history file>] [<calls per repetition>] [<time tolerance>]", file=sys.stderr)
+    print("\thistory file:\t\tJSON lines file the results are compared with and appended to. Default: bench_history.jsonl", file=sys.stderr)
+    print("\tcalls per repetition:\tDefault: 1000", file=sys.stderr)
+    print("\ttime tolerance:\t\trelative slowdown which is not reported as regression. Default: 0.2", file=sys.stderr)
+    print("\tExits with 1 if a message got slower or retains more allocations than the median of the last 5 runs with the same python version.", file=sys.stderr)
+else:
+    history_path = 'bench_history.jsonl'
+    if len(sys.argv) > 1:
+        history_path = sys.argv[1]
+
+    number = 1000
+    if len(sys.argv) > 2:
+        number = int(sys.argv[2])
+
+    time_tolerance = 0.2
+    if len(sys.argv) > 3:
+        time_tolerance = float(sys.argv[3])
+
+    record = message_benchmark.run(number=number)
+
+    print("message\tframe bytes\tencode ns\tparse ns\tencode blocks\tparse blocks\tencode peak bytes\tparse peak bytes")
+    for name, result in record["results"].items():
+        print(name + "\t" + str(result["frame_length"]) + "\t" + "{:.0f}".format(result["encode_ns"]) + "\t" + "{:.0f}".format(result["parse_ns"]) + "\t" + "{:.1f}".format(result["encode_retained_blocks"]) + "\t" + "{:.1f}".format(result["parse_retained_blocks"]) + "\t" + str(result["encode_peak_bytes"]) + "\t" + str(result["parse_peak_bytes"]))
+
+    # timings of different python versions are not comparable
+    baseline = message_benchmark.get_baseline([r for r in message_benchmark.load_history(history_path) if r["python"] == record["python"]])
+
+    message_benchmark.append_to_history(history_path, record)
+
+    if not baseline is None:
+        regressions = message_benchmark.find_regressions(baseline, record, time_tolerance=time_tolerance)
+
+        for name, metric, baseline_value, value in regressions:
+            print("regression: " + name + " " + metric + ": " + "{:.1f}".format(baseline_value) + " -> " + "{:.1f}".format(value), file=sys.stderr)
+
+        if regressions:
+            sys.exit(1)
@@ -1,11 +1,10 @@
 #!/usr/bin/python3
 
-import datetime
 import json
 import sys
 
 from sem6000 import sem6000
-from sem6000.message import *
+from sem6000 import settings
 
 
 if len(sys.argv) <= 1:
@@ -20,38 +19,10 @@ else:
     f.close()
 
     device = sem6000.SEM6000(address, pin, debug=True)
-    device.factory_reset()
-    device.disconnect()
 
-    device = sem6000.SEM6000(address, "0000", debug=True)
-    device.change_pin(pin)
+    # only settings differing from the backup are changed
+    commands = settings.apply_settings(device, data)
 
-    device.change_device_name(data["device-name"])
-
-    device.change_prices(data["settings"]["normal-price-in-cent"], data["settings"]["reduced-period"]["price-in-cent"])
-    device.change_reduced_period(data["settings"]["reduced-period"]["is-active"], data["settings"]["reduced-period"]["start-isotime"], data["settings"]["reduced-period"]["end-isotime"])
-
-    if data["settings"]["is-nightmode-active"]:
-        device.nightmode_on()
-    else:
-        device.nightmode_off()
-
-    device.change_power_limit(data["settings"]["power-limit-in-watt"])
-
-    if data["random-mode"]["is-active"]:
-        device.change_random_mode(data["random-mode"]["active-on-weekdays"], data["random-mode"]["start-isotime"], data["random-mode"]["end-isotime"])
-    else:
-        device.reset_random_mode()
-
-    if data["timer"]["is-active"]:
-        device.activate_timer_at(data["timer"]["is-action-turn-on"], data["timer"]["isodatetime"])
-
-    slot_ids = list(data["scheduler"]["entries"].keys())
-    slot_ids.reverse()
-    for slot_id in slot_ids:
-        scheduler = data["scheduler"]["entries"][slot_id]
-
-        if not "repeat-on-weekdays" in scheduler:
-            device.add_onetime_scheduler(scheduler["is-active"], scheduler["is-action-turn-on"], scheduler["isodatetime"])
-        else:
-            device.add_repeated_scheduler(scheduler["is-active"], scheduler["is-action-turn-on"], scheduler["repeat-on-weekdays"], scheduler["isotime"])
+    print("Changed settings: " + str(len(commands)), file=sys.stderr)
+    for command in commands:
+        print("\t" + str(command), file=sys.stderr)
@@ -0,0 +1,189 @@
+import collections
+import threading
+
+from .sem6000 import SEM6000
+
+
+class AdapterScheduler():
+    """
+    Spreads connections to remote devices over several local bluetooth devices (hci0, hci1, ...).
+
+    Bluetooth devices are ranked by their number of links, the signal strength they received from the remote
+    device during discovery and their recent rate of failed connections. A remote device whose connection fails
+    is failed over to the next bluetooth device.
+    """
+
+    # penalties in units of one link
+    FAILURE_RATE_WEIGHT = 4
+    RSSI_WEIGHT = 0.025
+    RSSI_GOOD = -50
+    RSSI_UNKNOWN = -90
+
+    def __init__(self, bluetooth_devices, failure_history_length=20):
+        """
+        Parameters:
+            bluetooth_devices       - list of bluetooth device names, i.e. ['hci0', 'hci1']
+            failure_history_length  - Optional, number of recent connection results the failure rate is computed of. Default: 20
+        """
+        self.bluetooth_devices = list(bluetooth_devices)
+
+        self._lock = threading.Lock()
+        self._number_of_links_by_bluetooth_device = {}
+        self._results_by_bluetooth_device = {}
+        self._rssi_by_device_address = {}
+        self._bluetooth_device_by_device = {}
+
+        for bluetooth_device in self.bluetooth_devices:
+            self._number_of_links_by_bluetooth_device[bluetooth_device] = 0
+            self._results_by_bluetooth_device[bluetooth_device] = collections.deque(maxlen=failure_history_length)
+
+    def update_rssi(self, bluetooth_device, device_address, rssi):
+        """
+        Record the signal strength of a remote device as received by a bluetooth device.
+        """
+        with self._lock:
+            self._rssi_by_device_address.setdefault(device_address, {})[bluetooth_device] = rssi
+
+    def discover(self, timeout=5, backend='bluepy'):
+        """
+        Discover remote devices with every bluetooth device and record their signal strengths.
+
+        Parameters:
+            timeout - Optional, time in seconds to wait for devices to respond. Default: 5
+            backend - Optional, 'bluepy', 'bleak' or a callable creating an AbstractBluetoothInterface for a bluetooth device name. Default: 'bluepy'
+
+        Returns a list of discovered devices as returned by SEM6000.discover().
+        """
+        result_by_device_address = {}
+
+        for bluetooth_device in self.bluetooth_devices:
+            for device in SEM6000.discover(timeout=timeout, bluetooth_device=bluetooth_device, backend=backend):
+                result_by_device_address[device['address']] = device
+
+                if not device.get('rssi') is None:
+                    self.update_rssi(bluetooth_device, device['address'], device['rssi'])
+
+        return list(result_by_device_address.values())
+
+    def get_number_of_links(self, bluetooth_device):
+        with self._lock:
+            return self._number_of_links_by_bluetooth_device.get(bluetooth_device, 0)
+
+    def get_failure_rate(self, bluetooth_device):
+        with self._lock:
+            return self._get_failure_rate(bluetooth_device)
+
+    def _get_failure_rate(self, bluetooth_device):
+        results = self._results_by_bluetooth_device[bluetooth_device]
+        if not len(results):
+            return 0
+
+        return results.count(False) / len(results)
+
+    def _get_score(self, bluetooth_device, device_address):
+        rssi = self._rssi_by_device_address.get(device_address, {}).get(bluetooth_device, AdapterScheduler.RSSI_UNKNOWN)
+
+        score = self._number_of_links_by_bluetooth_device[bluetooth_device]
+        score += AdapterScheduler.FAILURE_RATE_WEIGHT * self._get_failure_rate(bluetooth_device)
+        score += AdapterScheduler.RSSI_WEIGHT * max(0, AdapterScheduler.RSSI_GOOD - rssi)
+
+        return score
+
+    def rank(self, device_address, exclude=()):
+        """
+        Returns the bluetooth devices best suited to connect to device_address first. Bluetooth devices listed in
+        exclude are left out.
+        """
+        with self._lock:
+            bluetooth_devices = [bluetooth_device for bluetooth_device in self.bluetooth_devices if not bluetooth_device in exclude]
+
+            return sorted(bluetooth_devices, key=lambda bluetooth_device: self._get_score(bluetooth_device, device_address))
+
+    def acquire(self, device_address, exclude=()):
+        """
+        Choose the best suited bluetooth device for device_address and count a link on it until release() is called.
+
+        Returns the name of the bluetooth device.
+        """
+        with self._lock:
+            bluetooth_devices = [bluetooth_device for bluetooth_device in self.bluetooth_devices if not bluetooth_device in exclude]
+            if not len(bluetooth_devices):
+                bluetooth_devices = self.bluetooth_devices
+
+            bluetooth_device = min(bluetooth_devices, key=lambda bluetooth_device: self._get_score(bluetooth_device, device_address))
+            self._number_of_links_by_bluetooth_device[bluetooth_device] += 1
+
+            return bluetooth_device
+
+    def release(self, bluetooth_device, was_successful=None):
+        """
+        Release a link counted by acquire() and record whether it was used successfully unless was_successful is None.
+        """
+        with self._lock:
+            self._number_of_links_by_bluetooth_device[bluetooth_device] -= 1
+
+            if not was_successful is None:
+                self._results_by_bluetooth_device[bluetooth_device].append(was_successful)
+
+    def record_result(self, bluetooth_device, was_successful):
+        """
+        Record the result of a connection attempt without releasing a link.
+        """
+        with self._lock:
+            self._results_by_bluetooth_device[bluetooth_device].append(was_successful)
+
+    def connect(self, device_address, pin=None, timeout=3, debug=False, backend='bluepy'):
+        """
+        Connect to a remote device through the best suited bluetooth device. If connecting fails the other
+        bluetooth devices are tried in the order of their rank. A failed authorization is raised without trying
+        other bluetooth devices and is not counted as failure of the bluetooth device.
+
+        Parameters:
+            device_address  - MAC address to connect to, i.e. '00:11:22:33:44:55'.
+            pin             - Optional, 4 digit numeric pin, i.e. '0000'.
+            timeout         - Optional, maximum time in seconds to wait for a response from the device. Default: 3
+            debug           - Optional, if set to true commands and responses are printed to sys.stderr
+            backend         - Optional, 'bluepy', 'bleak' or a callable creating an AbstractBluetoothInterface for a bluetooth device name. Default: 'bluepy'
+
+        Returns a connected SEM6000 instance which has to be disconnected by disconnect().
+        """
+        failed_bluetooth_devices = []
+
+        while True:
+            bluetooth_device = self.acquire(device_address, exclude=failed_bluetooth_devices)
+            device = SEM6000(bluetooth_device=bluetooth_device, timeout=timeout, debug=debug, backend=backend)
+
+            # only failing connections are failed over - a wrong pin fails on every bluetooth device
+            try:
+                device.connect(device_address)
+            except Exception as e:
+                self.release(bluetooth_device, was_successful=False)
+                failed_bluetooth_devices.append(bluetooth_device)
+
+                if len(failed_bluetooth_devices) >= len(self.bluetooth_devices):
+                    raise e
+
+                continue
+
+            with self._lock:
+                self._results_by_bluetooth_device[bluetooth_device].append(True)
+                self._bluetooth_device_by_device[device] = bluetooth_device
+
+            if not pin is None:
+                try:
+                    device.authorize(pin)
+                except Exception as e:
+                    self.disconnect(device)
+                    raise e
+
+            return device
+
+    def disconnect(self, device):
+        """
+        Disconnect a device returned by connect() and release its link.
+        """
+        with self._lock:
+            bluetooth_device = self._bluetooth_device_by_device.pop(device)
+            self._number_of_links_by_bluetooth_device[bluetooth_device] -= 1
+
+        device.disconnect()
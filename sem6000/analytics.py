@@ -0,0 +1,181 @@
+import datetime
+
+import numpy
+
+from .message import ConsumptionOfLast12MonthsRequestedNotification, ConsumptionOfLast30DaysRequestedNotification, ConsumptionOfLast23HoursRequestedNotification
+
+
+# numpy datetime unit and consumption attribute by notification class - entry n of the attribute is the consumption n units ago
+_UNIT_AND_ATTRIBUTE_BY_NOTIFICATION_CLASS = {
+    ConsumptionOfLast12MonthsRequestedNotification: ('M', 'consumption_n_months_ago_in_watt_hour'),
+    ConsumptionOfLast30DaysRequestedNotification: ('D', 'consumption_n_days_ago_in_watt_hour'),
+    ConsumptionOfLast23HoursRequestedNotification: ('h', 'consumption_n_hours_ago_in_watt_hour')
+}
+
+
+class ConsumptionSeries():
+    """
+    Consumption per calendar period.
+
+    timestamps is an ascending numpy datetime64 array holding the start of each period. consumption_in_watt_hour is
+    a float array with one entry per timestamp or a matrix with one row per device of device_addresses. Unknown
+    consumptions are NaN.
+    """
+
+    def __init__(self, timestamps, consumption_in_watt_hour, device_addresses=None):
+        self.timestamps = timestamps
+        self.consumption_in_watt_hour = consumption_in_watt_hour
+        self.device_addresses = device_addresses
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def __str__(self):
+        name = self.__class__.__name__
+        return name + "(timestamps=" + str(self.timestamps) + ", consumption_in_watt_hour=" + str(self.consumption_in_watt_hour) + ", device_addresses=" + str(self.device_addresses) + ")"
+
+
+def to_series(notification, device_datetime=None, device_address=None):
+    """
+    Align a consumption history to the calendar.
+
+    Parameters:
+        notification    - ConsumptionOfLast12MonthsRequestedNotification, ConsumptionOfLast30DaysRequestedNotification or ConsumptionOfLast23HoursRequestedNotification
+        device_datetime - Optional, date and time of the device clock when the history was requested, i.e. SEM6000.get_device_datetime(). Default: now
+        device_address  - Optional, MAC address of the device the history belongs to
+
+    Returns a ConsumptionSeries starting with the oldest period.
+    """
+    if not type(notification) in _UNIT_AND_ATTRIBUTE_BY_NOTIFICATION_CLASS:
+        raise Exception("Unsupported notification: " + type(notification).__name__)
+
+    if device_datetime is None:
+        device_datetime = datetime.datetime.now()
+
+    unit, attribute = _UNIT_AND_ATTRIBUTE_BY_NOTIFICATION_CLASS[type(notification)]
+
+    # None entries (i.e. the running period of the 30 days and 12 months histories) become NaN
+    consumption_n_ago = numpy.array(getattr(notification, attribute), dtype=numpy.float64)
+    timestamps_n_ago = numpy.datetime64(device_datetime, unit) - numpy.arange(len(consumption_n_ago))
+
+    return ConsumptionSeries(timestamps_n_ago[::-1], consumption_n_ago[::-1], device_address)
+
+
+def stack(series_list):
+    """
+    Combine the series of several devices into one matrix on the union of their timestamps.
+
+    Periods a device has no consumption for are NaN. All series need the same datetime unit.
+
+    Returns a ConsumptionSeries with one row per series.
+    """
+    if not series_list:
+        raise Exception("No series to stack")
+
+    timestamps_per_series = [series.timestamps for series in series_list]
+    all_timestamps = numpy.concatenate(timestamps_per_series)
+    timestamps = numpy.unique(all_timestamps)
+
+    rows = numpy.repeat(numpy.arange(len(series_list)), [len(t) for t in timestamps_per_series])
+    columns = numpy.searchsorted(timestamps, all_timestamps)
+
+    consumption = numpy.full((len(series_list), len(timestamps)), numpy.nan)
+    consumption[rows, columns] = numpy.concatenate([series.consumption_in_watt_hour for series in series_list])
+
+    return ConsumptionSeries(timestamps, consumption, [series.device_addresses for series in series_list])
+
+
+def _nansum(values, counts, axis=-1):
+    sums = numpy.nansum(values, axis=axis)
+    return numpy.where(counts > 0, sums, numpy.nan)
+
+
+def sum_over_devices(series):
+    """
+    Total consumption of all devices of a stacked series per period. A period is NaN if it is unknown for all devices.
+
+    Returns a ConsumptionSeries with one entry per timestamp.
+    """
+    consumption = numpy.atleast_2d(series.consumption_in_watt_hour)
+    counts = numpy.count_nonzero(~numpy.isnan(consumption), axis=0)
+
+    return ConsumptionSeries(series.timestamps, _nansum(consumption, counts, axis=0))
+
+
+def resample(series, unit):
+    """
+    Sum up consumptions to longer periods.
+
+    Parameters:
+        series  - ConsumptionSeries
+        unit    - numpy datetime unit of the resulting periods, i.e. 'D' for days, 'M' for months or 'Y' for years
+
+    Returns a ConsumptionSeries. A period is NaN if none of its consumptions is known.
+    """
+    periods = series.timestamps.astype('datetime64[' + unit + ']')
+    if not len(periods):
+        return ConsumptionSeries(periods, series.consumption_in_watt_hour, series.device_addresses)
+
+    # timestamps are ascending, so each period is a contiguous slice
+    starts = numpy.flatnonzero(numpy.concatenate(([True], periods[1:] != periods[:-1])))
+
+    consumption = series.consumption_in_watt_hour
+    is_known = ~numpy.isnan(consumption)
+
+    sums = numpy.add.reduceat(numpy.where(is_known, consumption, 0), starts, axis=-1)
+    counts = numpy.add.reduceat(is_known, starts, axis=-1)
+
+    return ConsumptionSeries(periods[starts], numpy.where(counts > 0, sums, numpy.nan), series.device_addresses)
+
+
+def moving_average(series, window):
+    """
+    Average of the known consumptions of the last window periods.
+
+    Returns a ConsumptionSeries. The first window - 1 periods and periods without any known consumption in their window are NaN.
+    """
+    if window < 1:
+        raise Exception("Window has to be at least 1")
+
+    consumption = series.consumption_in_watt_hour
+    is_known = ~numpy.isnan(consumption)
+
+    padding = [(0, 0)] * (consumption.ndim - 1) + [(1, 0)]
+    cumulated_sums = numpy.pad(numpy.cumsum(numpy.where(is_known, consumption, 0), axis=-1), padding)
+    cumulated_counts = numpy.pad(numpy.cumsum(is_known, axis=-1), padding)
+
+    sums = cumulated_sums[..., window:] - cumulated_sums[..., :-window]
+    counts = cumulated_counts[..., window:] - cumulated_counts[..., :-window]
+
+    averages = numpy.full(consumption.shape, numpy.nan)
+    with numpy.errstate(invalid='ignore', divide='ignore'):
+        averages[..., window - 1:] = numpy.where(counts > 0, sums / counts, numpy.nan)
+
+    return ConsumptionSeries(series.timestamps, averages, series.device_addresses)
+
+
+def get_weekdays(timestamps):
+    """
+    Returns an integer array of the weekdays of timestamps numbered like util.Weekday (0 = sunday).
+    """
+    # 1970-01-01 was a thursday
+    return (timestamps.astype('datetime64[D]').astype(numpy.int64) + 4) % 7
+
+
+def weekday_profile(series):
+    """
+    Average consumption per period of each weekday, i.e. of an hourly series the average consumption per hour on mondays.
+
+    Returns an array with 7 entries indexed like util.Weekday (0 = sunday) - or a matrix with one row per device for a stacked series.
+    Weekdays without any known consumption are NaN.
+    """
+    consumption = series.consumption_in_watt_hour
+    is_known = ~numpy.isnan(consumption)
+
+    is_weekday = get_weekdays(series.timestamps)[:, numpy.newaxis] == numpy.arange(7)
+
+    sums = numpy.where(is_known, consumption, 0) @ is_weekday
+    counts = is_known.astype(numpy.int64) @ is_weekday
+
+    with numpy.errstate(invalid='ignore', divide='ignore'):
+        return numpy.where(counts > 0, sums / counts, numpy.nan)
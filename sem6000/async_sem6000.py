@@ -0,0 +1,623 @@
+import asyncio
+import binascii
+import sys
+
+from .bluetooth_lowenergy_interface.async_abstract_interface import AsyncAbstractBluetoothInterface
+from . import encoder
+from .message import *
+from . import protocol
+from .sem6000 import SEM6000, SEM6000Delegate
+from .state_cache import cached_state, SETTINGS, SCHEDULER, RANDOM_MODE_STATUS, DEVICE_SERIAL, DEVICE_NAME
+
+
+def _create_async_bluetooth_lowenergy_interface(backend, bluetooth_device):
+    if isinstance(backend, AsyncAbstractBluetoothInterface):
+        return backend
+
+    # bleak is only imported when being used so that it is optional
+    if backend is None:
+        from .bluetooth_lowenergy_interface.bleak_interface import AsyncBleakBtLeInterface
+
+        return AsyncBleakBtLeInterface(bluetooth_device=bluetooth_device)
+
+    if callable(backend):
+        return backend(bluetooth_device)
+
+    raise Exception("Unsupported backend: " + str(backend))
+
+
+class AsyncSEM6000Delegate(SEM6000Delegate):
+    def __init__(self, debug=False):
+        SEM6000Delegate.__init__(self, debug)
+
+        self._loop = None
+        self._waiter = None
+
+    def _handle_notification(self, characteristic_uuid, data):
+        loop = self._loop
+
+        if loop is None or loop.is_closed():
+            self._feed(data)
+            return
+
+        try:
+            is_loop_thread = asyncio.get_running_loop() is loop
+        except RuntimeError:
+            is_loop_thread = False
+
+        if is_loop_thread:
+            self._feed(data)
+        else:
+            # the backend delivers notifications from another thread
+            loop.call_soon_threadsafe(self._feed, bytes(data))
+
+    def _feed(self, data):
+        SEM6000Delegate._handle_notification(self, None, data)
+
+        if self.has_notification() and not self._waiter is None and not self._waiter.done():
+            self._waiter.set_result(True)
+
+    async def wait_for_notification(self, timeout):
+        '''
+        Waits until a complete notification has been received.
+
+        Returns:
+            True if a notification was received
+            False if no notification was received within timeout seconds
+        '''
+        self._loop = asyncio.get_running_loop()
+
+        if self.has_notification():
+            return True
+
+        self._waiter = self._loop.create_future()
+        try:
+            return await asyncio.wait_for(self._waiter, timeout)
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            self._waiter = None
+
+
+class AsyncSEM6000():
+    def __init__(self, bluetooth_lowenergy_interface=None, timeout=3, debug=False, bluetooth_device='hci0', write_without_response=False, state_cache=None):
+        """ Create a new AsyncSEM6000() instance
+
+            All methods of SEM6000 are available as coroutines. Other than SEM6000 this class does not connect in
+            the constructor - use connect() and authorize() instead. Commands of concurrent tasks are sent one
+            after another.
+
+            Parameters:
+                bluetooth_lowenergy_interface   - Optional, AsyncAbstractBluetoothInterface instance to communicate with the device. Default: AsyncBleakBtLeInterface
+                timeout                         - Optional, maximum time in seconds to wait for a response from the device. Default: 3
+                debug                           - Optional, if set to true commands and responses are printed to sys.stderr
+                bluetooth_device                - Optional, bluetooth device name used by the default interface. Default: 'hci0'
+                write_without_response          - Optional, if set to true all commands are written without waiting for a write response. The notification the device answers each command with confirms it instead. Default: False
+                state_cache                     - Optional, StateCache answering the requests of slowly changing states. See SEM6000(). Default: None
+        """
+        bluetooth_lowenergy_interface = _create_async_bluetooth_lowenergy_interface(bluetooth_lowenergy_interface, bluetooth_device)
+
+        self.timeout = timeout
+        self.debug = debug
+        self.write_without_response = write_without_response
+        self.state_cache = state_cache
+
+        self.connection_settings = {}
+
+        self.pin = None
+
+        # offset of the device clock to the local clock as set by change_date_and_time() - None if unknown
+        self.clock_offset = None
+
+        self._encoder = encoder.MessageEncoder()
+
+        # serializes commands of concurrent tasks - replies can not be assigned otherwise
+        self._lock = asyncio.Lock()
+
+        self._delegate = AsyncSEM6000Delegate(self.debug)
+        self._bluetooth_lowenergy_interface = bluetooth_lowenergy_interface
+        self._bluetooth_lowenergy_interface.add_notification_handler(self._delegate._handle_notification)
+
+    async def _disconnect(self):
+        if self._bluetooth_lowenergy_interface:
+            await self._bluetooth_lowenergy_interface.disconnect()
+
+            return True
+
+        return False
+
+    async def _reconnect(self):
+        await self._disconnect()
+
+        try:
+            await self._bluetooth_lowenergy_interface.connect(self.connection_settings["device_address"])
+        except Exception as e:
+            await self._disconnect()
+            raise e
+
+        await self._bluetooth_lowenergy_interface.enable_notifications()
+
+        if self.pin:
+            try:
+                await self._authorize(self.pin)
+            except Exception as e:
+                await self._disconnect()
+                raise e
+
+    def _is_connected(self):
+        if self._bluetooth_lowenergy_interface is None:
+            return False
+
+        return self._bluetooth_lowenergy_interface.is_connected()
+
+    async def _send_command(self, command):
+        self._delegate.reset_notification_data()
+        await self._ensure_connected()
+
+        await self._write_command(command)
+        await self._delegate.wait_for_notification(self.timeout)
+
+    async def _ensure_connected(self):
+        if not self._is_connected():
+            if self.connection_settings.get("device_address") and self.pin:
+                await self._reconnect()
+            else:
+                raise Exception("Not connected and no deviceAddress / pin set")
+
+    async def _write_command(self, command):
+        encoded_command = self._encoder.encode(command)
+
+        if self.debug:
+            print("sent data: " + str(binascii.hexlify(encoded_command)) + " (" + str(command) + ")", file=sys.stderr)
+
+        # the device answers every command with a notification which confirms that the command has been received
+        with_response = None
+        if self.write_without_response:
+            with_response = False
+
+        if not self.state_cache is None:
+            self.state_cache.invalidate_for_command(command)
+
+        await self._bluetooth_lowenergy_interface.write_to_characteristic(SEM6000.CHARACTERISTIC_UUID_CONTROL, encoded_command, with_response)
+
+    def _consume_notification(self):
+        return self._delegate.consume_notification()
+
+    async def _run_pipelined_unlocked(self, commands):
+        replies = protocol.PipelinedReplies(commands)
+
+        self._delegate.reset_notification_data()
+        await self._ensure_connected()
+
+        for command in commands:
+            await self._write_command(command)
+
+        while not replies.is_complete():
+            if not self._delegate.has_notification():
+                if not await self._delegate.wait_for_notification(self.timeout):
+                    break
+
+                continue
+
+            notification = self._consume_notification()
+
+            if not replies.add(notification) and self.debug:
+                print("ignoring unexpected notification: " + str(notification), file=sys.stderr)
+
+        return replies.get_notifications()
+
+    async def run_pipelined(self, commands):
+        """
+        Sends several commands back to back without waiting for the reply of each command in between. See SEM6000.run_pipelined().
+
+        Returns a list of notifications in the order of the commands.
+        """
+        async with self._lock:
+            return await self._run_pipelined_unlocked(commands)
+
+    async def _run_command(self, command):
+        self._delegate.reset_notification_data()
+
+        await self._write_command(command)
+        await self._delegate.wait_for_notification(self.timeout)
+
+        return protocol.validate_reply(command, self._consume_notification())
+
+    async def run_batch(self, commands, retries=1, pipelined=False):
+        """
+        Runs several commands within one connection without commands of other tasks in between. See SEM6000.run_batch().
+
+        Returns a list of notifications in the order of the commands.
+        """
+        notifications = []
+
+        async with self._lock:
+            await self._ensure_connected()
+            while True:
+                try:
+                    if pipelined:
+                        notifications = await self._run_pipelined_unlocked(commands)
+                    else:
+                        for command in commands[len(notifications):]:
+                            notification = await self._run_command(command)
+                            notifications.append(notification)
+
+                            # authorize again with the new pin after a reconnect
+                            if isinstance(notification, PinChangedNotification) and notification.was_successful:
+                                self.pin = command.new_pin
+
+                    return notifications
+                except Exception as e:
+                    if self._is_connected() or retries <= 0:
+                        raise e
+
+                    retries -= 1
+                    await self._reconnect()
+
+    async def _execute_unlocked(self, request):
+        await self._send_command(request.command)
+
+        return request.validate(self._consume_notification())
+
+    async def _execute(self, request):
+        async with self._lock:
+            return await self._execute_unlocked(request)
+
+    async def _execute_pipelined_unlocked(self, requests):
+        notifications = await self._run_pipelined_unlocked([request.command for request in requests])
+
+        return [request.validate(notification) for request, notification in zip(requests, notifications)]
+
+    async def _authorize(self, pin):
+        notification = await self._execute_unlocked(protocol.authorize(pin))
+
+        if notification.was_successful:
+            self.pin = pin
+        else:
+            self.pin = None
+            raise Exception("Authentication failed")
+
+        return notification
+
+    async def connect(self, device_address):
+        """
+        Connect to a remote device.
+
+        Parameters:
+            device_address  - MAC address to connect to, i.e. '00:11:22:33:44:55'.
+        """
+        self.connection_settings["device_address"] = device_address
+
+        if not self.state_cache is None:
+            self.state_cache.invalidate()
+
+        async with self._lock:
+            return await self._reconnect()
+
+    async def disconnect(self):
+        """
+        Disconnect from the current remote device.
+        """
+        async with self._lock:
+            return await self._disconnect()
+
+    async def discover(timeout=5, bluetooth_device='hci0', backend=None):
+        """
+        Discover remote devices. See SEM6000.discover().
+
+        Parameters:
+            timeout             - Optional, time in seconds to wait for devices to respond. Default: 5
+            bluetooth_device    - Optional, bluetooth device name to use. Default: 'hci0'
+            backend             - Optional, an AsyncAbstractBluetoothInterface instance or a callable creating one for a bluetooth device name. Default: AsyncBleakBtLeInterface
+        """
+        bluetooth_lowenergy_interface = _create_async_bluetooth_lowenergy_interface(backend, bluetooth_device)
+
+        return await bluetooth_lowenergy_interface.discover(timeout, service_uuids=[SEM6000.SERVICECLASS_UUID])
+
+    @cached_state(DEVICE_NAME)
+    async def request_device_name(self):
+        """
+        Request the name of the remote device.
+
+        Returns a DeviceNameRequestedNotification.
+        """
+        async with self._lock:
+            data = await self._bluetooth_lowenergy_interface.read_from_characteristic(SEM6000.CHARACTERISTIC_UUID_NAME)
+
+        if self.debug:
+            print("received data: " + str(binascii.hexlify(data)), file=sys.stderr)
+
+        return protocol.parse_device_name(data)
+
+    async def authorize(self, pin):
+        """
+        Authorize on the connected device.
+
+        Parameters:
+            pin - 4 digit PIN, i.e. '0000'
+
+        Returns an AuthorizedNotification.
+        """
+        async with self._lock:
+            return await self._authorize(pin)
+
+    async def change_pin(self, new_pin):
+        """
+        Change the pin on the remote device. See SEM6000.change_pin().
+
+        Returns a PinChangedNotification.
+        """
+        return await self._execute(protocol.change_pin(self.pin, new_pin))
+
+    async def reset_pin(self):
+        """
+        Reset the pin to 0000 on the remote device.
+
+        Returns a PinResetNotification.
+        """
+        return await self._execute(protocol.reset_pin())
+
+    async def power_on(self):
+        """
+        Tell the remote device to turn the power on.
+
+        Returns a PowerSwitchedNotification.
+        """
+        return await self._execute(protocol.power_on())
+
+    async def power_off(self):
+        """
+        Tell the remote device to turn the power off.
+
+        Returns a PowerSwitchedNotification.
+        """
+        return await self._execute(protocol.power_off())
+
+    async def nightmode_on(self):
+        """
+        Activate nightmode on the remote device.
+
+        Returns a NightmodeChangedNotification.
+        """
+        return await self._execute(protocol.nightmode_on())
+
+    async def nightmode_off(self):
+        """
+        Disable nightmode on the remote device.
+
+        Returns a NightmodeChangedNotification.
+        """
+        return await self._execute(protocol.nightmode_off())
+
+    async def change_date_and_time(self, isodatetime):
+        """
+        Set date and time on the remote device. See SEM6000.change_date_and_time().
+
+        Returns a DateAndTimeChangedNotification.
+        """
+        notification = await self._execute(protocol.change_date_and_time(isodatetime))
+
+        self.clock_offset = protocol.get_clock_offset(isodatetime)
+
+        return notification
+
+    def get_device_datetime(self):
+        """
+        Returns the current date and time of the device clock. See SEM6000.get_device_datetime().
+        """
+        return protocol.get_device_datetime(self.clock_offset)
+
+    @cached_state(SETTINGS)
+    async def request_settings(self):
+        """
+        Request the current settings from the remote device.
+
+        Returns a SettingsRequestedNotification.
+        """
+        return await self._execute(protocol.request_settings())
+
+    async def change_power_limit(self, power_limit_in_watt):
+        """
+        Set the power limit when the remote device should be automatically turn off.
+
+        Returns a PowerLimitChangedNotification.
+        """
+        return await self._execute(protocol.change_power_limit(power_limit_in_watt))
+
+    async def change_prices(self, normal_price_in_cent, reduced_period_price_in_cent):
+        """
+        Set the power prices. See SEM6000.change_prices().
+
+        Returns a PricesChangedNotification.
+        """
+        return await self._execute(protocol.change_prices(normal_price_in_cent, reduced_period_price_in_cent))
+
+    async def change_reduced_period(self, is_active, start_isotime, end_isotime):
+        """
+        Sets start and end time of the reduced period. See SEM6000.change_reduced_period().
+
+        Returns a ReducedPeriodChangedNotification.
+        """
+        return await self._execute(protocol.change_reduced_period(is_active, start_isotime, end_isotime))
+
+    async def request_timer_status(self):
+        """
+        Request the current status of the timer.
+
+        Returns a TimerStatusRequestedNotification.
+        """
+        return await self._execute(protocol.request_timer_status())
+
+    async def activate_timer(self, is_action_turn_on, delay_isotime):
+        """
+        Activate the timer. See SEM6000.activate_timer().
+
+        Returns a TimerSetNotification.
+        """
+        return await self._execute(protocol.activate_timer(is_action_turn_on, delay_isotime))
+
+    async def activate_timer_at(self, is_action_turn_on, target_isodatetime):
+        """
+        Activate the timer at the specified date and time. See SEM6000.activate_timer_at().
+
+        Returns a TimerSetNotification.
+        """
+        return await self._execute(protocol.activate_timer_at(is_action_turn_on, target_isodatetime))
+
+    async def reset_timer(self):
+        """
+        Stop and reset the timer.
+
+        Returns a TimerSetNotification.
+        """
+        return await self._execute(protocol.reset_timer())
+
+    @cached_state(SCHEDULER)
+    async def request_scheduler(self):
+        """
+        Request all currently set schedulers.
+
+        Returns a SchedulerRequestedNotification.
+        """
+        async with self._lock:
+            first_page = await self._execute_unlocked(protocol.request_scheduler_page(0))
+            further_pages = await self._execute_pipelined_unlocked(protocol.get_further_scheduler_page_requests(first_page))
+
+        return protocol.merge_scheduler_pages(first_page, further_pages)
+
+    async def add_onetime_scheduler(self, is_active, is_action_turn_on, isodatetime):
+        """
+        Add a scheduler entry occuring at a specific date and time. See SEM6000.add_onetime_scheduler().
+
+        Returns a SchedulerChangedNotification.
+        """
+        return await self._execute(protocol.add_onetime_scheduler(is_active, is_action_turn_on, isodatetime))
+
+    async def edit_onetime_scheduler(self, slot_id, is_active, is_action_turn_on, isodatetime):
+        """
+        Edit an existing scheduler entry occuring at a specific date and time. See SEM6000.edit_onetime_scheduler().
+
+        Returns a SchedulerChangedNotification.
+        """
+        return await self._execute(protocol.edit_onetime_scheduler(slot_id, is_active, is_action_turn_on, isodatetime))
+
+    async def add_repeated_scheduler(self, is_active, is_action_turn_on, repeat_on_weekdays, isotime):
+        """
+        Add a scheduler entry that will be repeated regulary. See SEM6000.add_repeated_scheduler().
+
+        Returns a SchedulerChangedNotification.
+        """
+        return await self._execute(protocol.add_repeated_scheduler(is_active, is_action_turn_on, repeat_on_weekdays, isotime))
+
+    async def edit_repeated_scheduler(self, slot_id, is_active, is_action_turn_on, repeat_on_weekdays, isotime):
+        """
+        Edit an existing scheduler entry that will be repeated regulary. See SEM6000.edit_repeated_scheduler().
+
+        Returns a SchedulerChangedNotification.
+        """
+        return await self._execute(protocol.edit_repeated_scheduler(slot_id, is_active, is_action_turn_on, repeat_on_weekdays, isotime))
+
+    async def remove_scheduler(self, slot_id):
+        """
+        Remove an existing scheduler entry.
+
+        Parameters:
+            slot_id             - id of the slot where the scheduler entry is currently stored at.
+
+        Returns a SchedulerChangedNotification.
+        """
+        return await self._execute(protocol.remove_scheduler(slot_id))
+
+    @cached_state(RANDOM_MODE_STATUS)
+    async def request_random_mode_status(self):
+        """
+        Request the current status of the random mode from the remote device.
+
+        Returns a RandomModeStatusRequestedNotification.
+        """
+        return await self._execute(protocol.request_random_mode_status())
+
+    async def change_random_mode(self, active_on_weekdays, start_isotime, end_isotime):
+        """
+        Activate random mode on the remote device. See SEM6000.change_random_mode().
+
+        Returns a RandomModeChangedNotification.
+        """
+        return await self._execute(protocol.change_random_mode(active_on_weekdays, start_isotime, end_isotime))
+
+    async def reset_random_mode(self):
+        """
+        Disable random mode on the remote device.
+
+        Returns a RandomModeChangedNotification.
+        """
+        return await self._execute(protocol.reset_random_mode())
+
+    async def request_measurement(self):
+        """
+        Request current measurement values.
+
+        Returns a MeasurementRequestedNotification.
+        """
+        return await self._execute(protocol.request_measurement())
+
+    async def request_consumption_of_last_12_months(self):
+        """
+        Request consumption values of last 12 months.
+
+        Returns a ConsumptionOfLast12MonthsRequestedNotification.
+        """
+        return await self._execute(protocol.request_consumption_of_last_12_months())
+
+    async def request_consumption_of_last_30_days(self):
+        """
+        Request consumption values of last 30 days.
+
+        Returns a ConsumptionOfLast30DaysRequestedNotification.
+        """
+        return await self._execute(protocol.request_consumption_of_last_30_days())
+
+    async def request_consumption_of_last_23_hours(self):
+        """
+        Request consumption values of curent hour and last 23 hours.
+
+        Returns a ConsumptionOfLast23HoursRequestedNotification.
+        """
+        return await self._execute(protocol.request_consumption_of_last_23_hours())
+
+    async def reset_consumption(self):
+        """
+        Reset consumption data.
+
+        Returns a ConsumptionResetNotification.
+        """
+        return await self._execute(protocol.reset_consumption())
+
+    async def factory_reset(self):
+        """
+        Reset the remote device to factory state.
+
+        Returns a FactoryResetNotification.
+        """
+        return await self._execute(protocol.factory_reset())
+
+    async def change_device_name(self, new_name):
+        """
+        Set the name of the remote device.
+
+        Parameters:
+            new_name    - Name to be set.
+
+        Returns a DeviceNameChangedNotification.
+        """
+        return await self._execute(protocol.change_device_name(new_name))
+
+    @cached_state(DEVICE_SERIAL)
+    async def request_device_serial(self):
+        """
+        Request the serial number of the remote device.
+
+        Returns a DeviceSerialRequestedNotification.
+        """
+        return await self._execute(protocol.request_device_serial())
+
@@ -28,11 +28,27 @@ class AbstractBluetoothInterface(ABC):
             service_uuds (list of str): When given only devices advertising one of these services are returned
 
         Returns:
-            A list of dictionaries having keys 'address' and 'name'
+            A list of dictionaries having keys 'address', 'name' and 'rssi' (None if unknown)
         '''
 
         pass
 
+    def scan(self, timeout, advertisement_handler, service_uuids=[], passive=True):
+        '''
+        Scans for device advertisements.
+
+        Parameters:
+            timeout (int):                      Amount of seconds to scan
+            advertisement_handler (callable):   Called with a dictionary as returned by discover() for each received advertisement
+            service_uuds (list of str):         When given only advertisements of devices advertising one of these services are handled
+            passive (bool):                     Do not request scan responses if the interface supports passive scanning
+
+        By default the devices found by discover() are handled when the scan is finished.
+        '''
+
+        for device in self.discover(timeout, service_uuids):
+            advertisement_handler(device)
+
     @abstractmethod
     def connect(self, mac_address):
         '''Connects to the given device'''
@@ -52,13 +68,14 @@ class AbstractBluetoothInterface(ABC):
         pass
 
     @abstractmethod
-    def write_to_characteristic(self, uuid, data):
+    def write_to_characteristic(self, uuid, data, with_response=None):
         '''
         Send data to the characteristics identified by uuid of the currently connected device
 
         Parameters:
-            uuid (str):     UUID of the form 00000000-0000-0000-0000-000000000000
-            data (bytes):   data to send 
+            uuid (str):             UUID of the form 00000000-0000-0000-0000-000000000000
+            data (bytes):           data to send
+            with_response (bool):   Optional, True to wait for the write response of the device, False to write without response. Default: None (with response if notifications are enabled)
         '''
 
         pass
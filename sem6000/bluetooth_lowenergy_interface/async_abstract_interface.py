@@ -0,0 +1,97 @@
+from abc import *
+
+class AsyncAbstractBluetoothInterface(ABC):
+    '''
+    asyncio counterpart of AbstractBluetoothInterface.
+
+    Instead of waiting for notifications, implementations push every incoming notification to the
+    registered handlers as soon as it arrives.
+    '''
+
+    def __init__(self, mac_address=None, bluetooth_device='hci0'):
+        self.mac_addess = mac_address
+        self.bluetooth_device = bluetooth_device
+
+        self._is_notifications_enabled = False
+        self._notification_handler = []
+
+    async def enable_notifications(self):
+        '''Enables reception of notifications from the device'''
+
+        self._is_notifications_enabled = True
+
+    async def disable_notifications(self):
+        '''Disables reception of notifications from the device'''
+
+        self._is_notifications_enabled = False
+
+    @abstractmethod
+    async def discover(self, timeout, service_uuids=[]):
+        '''
+        Returns a list of discovered devices.
+
+        Parameters:
+            timeout (int):              Maximum amount of seconds to wait for device advertisements
+            service_uuds (list of str): When given only devices advertising one of these services are returned
+
+        Returns:
+            A list of dictionaries having keys 'address' and 'name'
+        '''
+
+        pass
+
+    @abstractmethod
+    async def connect(self, mac_address):
+        '''Connects to the given device'''
+
+        pass
+
+    @abstractmethod
+    async def disconnect(self):
+        '''Disconnects from the currently connected device'''
+
+        pass
+
+    @abstractmethod
+    def is_connected(self):
+        '''Returns True if connected to a device'''
+
+        pass
+
+    @abstractmethod
+    async def write_to_characteristic(self, uuid, data, with_response=None):
+        '''
+        Send data to the characteristics identified by uuid of the currently connected device
+
+        Parameters:
+            uuid (str):             UUID of the form 00000000-0000-0000-0000-000000000000
+            data (bytes):           data to send
+            with_response (bool):   Optional, True to wait for the write response of the device, False to write without response. Default: None (with response if notifications are enabled)
+        '''
+
+        pass
+
+    @abstractmethod
+    async def read_from_characteristic(self, uuid):
+        '''
+        Read data from the characteristics identified by uuid
+
+        Parameters:
+            uuid (str):     UUID of the form 00000000-0000-0000-0000-000000000000
+        '''
+
+        pass
+
+    def add_notification_handler(self, notification_handler):
+        '''
+        Registers a callable object to handle incoming notifications
+
+        Parameters:
+            notification_handler (callable):    Callable object which is being called with (characteristic_uuid, data) when a notification was received
+        '''
+
+        self._notification_handler.append(notification_handler)
+
+    def _send_notification_to_handlers(self, characteristic_uuid, data):
+        for handler in self._notification_handler:
+            handler(characteristic_uuid, data)
@@ -0,0 +1,182 @@
+from . import abstract_interface
+from . import async_abstract_interface
+
+import bleak
+
+import asyncio
+import concurrent.futures
+import queue
+import threading
+
+def _run_loop(loop):
+    # the loop is closed by the thread running it once __del__ stopped it
+    try:
+        loop.run_forever()
+    finally:
+        loop.close()
+
+
+class AsyncBleakBtLeInterface(async_abstract_interface.AsyncAbstractBluetoothInterface):
+    '''Talks to BlueZ over D-Bus through bleak - no helper process is spawned per device.'''
+
+    def __init__(self, mac_address=None, bluetooth_device='hci0'):
+        async_abstract_interface.AsyncAbstractBluetoothInterface.__init__(self, mac_address, bluetooth_device)
+
+        self._client = None
+
+    def _handle_notification(self, characteristic, data):
+        self._send_notification_to_handlers(str(characteristic.uuid), data)
+
+    async def enable_notifications(self):
+        await async_abstract_interface.AsyncAbstractBluetoothInterface.enable_notifications(self)
+
+        for service in self._client.services:
+            for characteristic in service.characteristics:
+                if 'notify' in characteristic.properties:
+                    await self._client.start_notify(characteristic, self._handle_notification)
+
+    async def disable_notifications(self):
+        await async_abstract_interface.AsyncAbstractBluetoothInterface.disable_notifications(self)
+
+        for service in self._client.services:
+            for characteristic in service.characteristics:
+                if 'notify' in characteristic.properties:
+                    await self._client.stop_notify(characteristic)
+
+    async def discover(self, timeout, service_uuids=[]):
+        result = []
+
+        devices = await bleak.BleakScanner.discover(timeout=timeout, service_uuids=service_uuids or None, adapter=self.bluetooth_device)
+
+        for device in devices:
+            result.append({'address': device.address, 'name': device.name, 'rssi': getattr(device, 'rssi', None)})
+
+        return result
+
+    async def connect(self, mac_address):
+        self._client = bleak.BleakClient(mac_address, adapter=self.bluetooth_device)
+        try:
+            await self._client.connect()
+        except bleak.exc.BleakError as e:
+            self._client = None
+            raise e
+
+    async def disconnect(self):
+        if self.is_connected():
+            await self._client.disconnect()
+
+    def is_connected(self):
+        if self._client is None:
+            return False
+
+        return self._client.is_connected
+
+    async def write_to_characteristic(self, uuid, data, with_response=None):
+        if with_response is None:
+            with_response = self._is_notifications_enabled
+
+        return await self._client.write_gatt_char(uuid, data, response=with_response)
+
+    async def read_from_characteristic(self, uuid):
+        return await self._client.read_gatt_char(uuid)
+
+
+class BleakBtLeInterface(abstract_interface.AbstractBluetoothInterface):
+    '''
+    Blocking facade of AsyncBleakBtLeInterface for SEM6000.
+
+    The bleak event loop runs in a background thread. Notifications are queued there and are passed to
+    the notification handlers within wait_for_notifications() in the calling thread.
+
+    An operation which does not finish within its timeout - i.e. a connect or write stuck in BlueZ - is
+    cancelled and the device is disconnected, like the bluepy backend does with DisconnectAfterTimeout.
+    '''
+
+    # connecting and scanning take longer than a single GATT operation
+    CONNECT_TIMEOUT_MARGIN = 10
+
+    def __init__(self, mac_address=None, bluetooth_device='hci0', timeout=10):
+        '''
+        Parameters:
+            timeout (float): Optional, maximum time in seconds a GATT operation may take. Connecting may take CONNECT_TIMEOUT_MARGIN seconds longer. Default: 10
+        '''
+        abstract_interface.AbstractBluetoothInterface.__init__(self, mac_address, bluetooth_device)
+
+        self.timeout = timeout
+
+        self._notifications = queue.Queue()
+
+        self._loop = asyncio.new_event_loop()
+        self._loop_thread = threading.Thread(target=_run_loop, args=(self._loop,), daemon=True)
+        self._loop_thread.start()
+
+        self._async_interface = AsyncBleakBtLeInterface(mac_address, bluetooth_device)
+        self._async_interface.add_notification_handler(self._queue_notification)
+
+    def __del__(self):
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+    def _queue_notification(self, characteristic_uuid, data):
+        self._notifications.put((characteristic_uuid, data))
+
+    def _run(self, coroutine, timeout=None, disconnect_on_timeout=True):
+        if timeout is None:
+            timeout = self.timeout
+
+        future = asyncio.run_coroutine_threadsafe(coroutine, self._loop)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+
+            if disconnect_on_timeout:
+                try:
+                    self._run(self._async_interface.disconnect(), disconnect_on_timeout=False)
+                except Exception:
+                    pass
+
+            raise Exception("Bluetooth operation timed out after " + str(timeout) + " seconds")
+
+    def enable_notifications(self):
+        abstract_interface.AbstractBluetoothInterface.enable_notifications(self)
+
+        self._run(self._async_interface.enable_notifications())
+
+    def disable_notifications(self):
+        abstract_interface.AbstractBluetoothInterface.disable_notifications(self)
+
+        self._run(self._async_interface.disable_notifications())
+
+    def discover(self, timeout, service_uuids=[]):
+        return self._run(self._async_interface.discover(timeout, service_uuids), timeout + BleakBtLeInterface.CONNECT_TIMEOUT_MARGIN, disconnect_on_timeout=False)
+
+    def connect(self, mac_address):
+        self._async_interface.bluetooth_device = self.bluetooth_device
+
+        # drop notifications of a previous connection
+        while not self._notifications.empty():
+            self._notifications.get_nowait()
+
+        return self._run(self._async_interface.connect(mac_address), self.timeout + BleakBtLeInterface.CONNECT_TIMEOUT_MARGIN)
+
+    def disconnect(self):
+        return self._run(self._async_interface.disconnect(), disconnect_on_timeout=False)
+
+    def is_connected(self):
+        return self._async_interface.is_connected()
+
+    def write_to_characteristic(self, uuid, data, with_response=None):
+        return self._run(self._async_interface.write_to_characteristic(uuid, data, with_response))
+
+    def read_from_characteristic(self, uuid):
+        return self._run(self._async_interface.read_from_characteristic(uuid))
+
+    def wait_for_notifications(self, timeout=None):
+        try:
+            characteristic_uuid, data = self._notifications.get(timeout=timeout)
+        except queue.Empty:
+            return False
+
+        self._send_notification_to_handlers(characteristic_uuid, data)
+
+        return True
@@ -1,4 +1,5 @@
 from . import abstract_interface
+from .gatt_handle_cache import default_gatt_handle_cache
 from .timeout_decorator import *
 
 from bluepy import btle
@@ -16,95 +17,130 @@ class BluePyBtLeDelegate(btle.DefaultDelegate):
 
 
 class BluePyBtLeInterface(abstract_interface.AbstractBluetoothInterface):
-    def __init__(self, mac_address=None, bluetooth_device='hci0'):
+    def __init__(self, mac_address=None, bluetooth_device='hci0', gatt_handle_cache=None):
+        '''
+        Parameters:
+            gatt_handle_cache (GattHandleCache):    Optional, cache of characteristic handles by device address. Default: a cache shared by all instances
+        '''
         abstract_interface.AbstractBluetoothInterface.__init__(self, mac_address, bluetooth_device)
 
+        if gatt_handle_cache is None:
+            gatt_handle_cache = default_gatt_handle_cache
+
         self._peripheral = None
         self._delegate = BluePyBtLeDelegate(self)
+        self._gatt_handle_cache = gatt_handle_cache
+        self._connected_mac_address = None
 
         self._characteristic_by_uuid = {}
         self._characteristic_by_bluepy_handle = {}
 
+    def _add_characteristic(self, characteristic, is_discovered):
+        self._characteristic_by_uuid[str(characteristic.uuid)] = characteristic
+        self._characteristic_by_bluepy_handle[characteristic.valHandle] = characteristic
+
+        if is_discovered:
+            self._gatt_handle_cache.put(self._connected_mac_address, str(characteristic.uuid), characteristic.handle, characteristic.properties, characteristic.valHandle)
+
+    def _add_cached_characteristic(self, uuid, handles):
+        handle, properties, value_handle = handles
+        characteristic = btle.Characteristic(self._peripheral, btle.UUID(uuid), handle, properties, value_handle)
+        self._add_characteristic(characteristic, False)
+
+        return characteristic
+
     @DisconnectAfterTimeout(300)
     def _get_characteristic(self, uuid):
         if uuid in self._characteristic_by_uuid:
-            characteristic = self._characteristic_by_uuid[uuid]
-        else:
-            characteristic = self._peripheral.getCharacteristics(uuid=uuid)[0]
+            return self._characteristic_by_uuid[uuid]
 
-            self._characteristic_by_uuid[str(characteristic.uuid)] = characteristic
-            self._characteristic_by_bluepy_handle[characteristic.valHandle] = characteristic
+        handles = self._gatt_handle_cache.get(self._connected_mac_address, uuid)
+        if not handles is None:
+            return self._add_cached_characteristic(uuid, handles)
+
+        characteristic = self._peripheral.getCharacteristics(uuid=uuid)[0]
+        self._add_characteristic(characteristic, True)
 
         return characteristic
 
     @DisconnectAfterTimeout(300)
     def _get_characteristic_by_bluepy_handle(self, bluepy_handle):
         if bluepy_handle in self._characteristic_by_bluepy_handle:
-            characteristic = self._characteristic_by_bluepy_handle[bluepy_handle]
-        else:
-            characteristics = self._peripheral.getCharacteristics()
+            return self._characteristic_by_bluepy_handle[bluepy_handle]
 
-            characteristic = None
-            for c in characteristics:
-                if c.valHandle == bluepy_handle:
-                    characteristic = c
-                    break
+        for uuid, handles in self._gatt_handle_cache.get_all(self._connected_mac_address).items():
+            if handles[2] == bluepy_handle:
+                return self._add_cached_characteristic(uuid, handles)
 
-            self._characteristic_by_uuid[str(characteristic.uuid)] = characteristic
-            self._characteristic_by_bluepy_handle[characteristic.valHandle] = characteristic
+        characteristic = None
+        for c in self._peripheral.getCharacteristics():
+            # all characteristics are known now - cache them to avoid enumerating them again
+            self._add_characteristic(c, True)
+
+            if c.valHandle == bluepy_handle:
+                characteristic = c
 
         return characteristic
 
+    def _invalidate_cached_characteristics(self):
+        self._characteristic_by_uuid.clear()
+        self._characteristic_by_bluepy_handle.clear()
+
+        self._gatt_handle_cache.invalidate(self._connected_mac_address)
+
     def _handle_notification(self, characteristic_bluepy_handle, data):
         characteristic = self._get_characteristic_by_bluepy_handle(characteristic_bluepy_handle)
         uuid = str(characteristic.uuid)
 
         self._send_notification_to_handlers(uuid, data)
 
-    def discover(self, timeout, service_uuids=[]):
-        result = []
+    _SERVICE_UUID_AD_TYPES = [
+        btle.ScanEntry.INCOMPLETE_16B_SERVICES, btle.ScanEntry.COMPLETE_16B_SERVICES,
+        btle.ScanEntry.INCOMPLETE_32B_SERVICES, btle.ScanEntry.COMPLETE_32B_SERVICES,
+        btle.ScanEntry.INCOMPLETE_128B_SERVICES, btle.ScanEntry.COMPLETE_128B_SERVICES
+    ]
 
-        scanner = btle.Scanner()
-        scanner_results = scanner.scan(timeout)
+    def _get_matching_device(self, scan_entry, service_uuids):
+        if len(service_uuids) > 0:
+            scanned_service_uuids = set()
+            for ad_type in BluePyBtLeInterface._SERVICE_UUID_AD_TYPES:
+                value_text = scan_entry.getValueText(ad_type)
+                if not value_text is None:
+                    scanned_service_uuids.update(value_text.split(','))
 
-        for device in scanner_results:
-            address = device.addr
+            if scanned_service_uuids.isdisjoint(service_uuids):
+                return None
 
-            scanned_incomplete_16b_service_uuids = device.getValueText(btle.ScanEntry.INCOMPLETE_16B_SERVICES)
-            scanned_complete_16b_service_uuids = device.getValueText(btle.ScanEntry.COMPLETE_16B_SERVICES)
+        complete_local_name = scan_entry.getValueText(btle.ScanEntry.COMPLETE_LOCAL_NAME)
 
-            scanned_incomplete_32b_service_uuids = device.getValueText(btle.ScanEntry.INCOMPLETE_32B_SERVICES)
-            scanned_complete_32b_service_uuids = device.getValueText(btle.ScanEntry.COMPLETE_32B_SERVICES)
+        return {'address': scan_entry.addr, 'name': complete_local_name, 'rssi': scan_entry.rssi}
 
-            scanned_incomplete_128b_service_uuids = device.getValueText(btle.ScanEntry.INCOMPLETE_128B_SERVICES)
-            scanned_complete_128b_service_uuids = device.getValueText(btle.ScanEntry.COMPLETE_128B_SERVICES)
+    def discover(self, timeout, service_uuids=[]):
+        result = []
 
-            complete_local_name = device.getValueText(btle.ScanEntry.COMPLETE_LOCAL_NAME)
+        iface = int(self.bluetooth_device.replace("hci", ""))
+        scanner = btle.Scanner(iface)
+        scanner_results = scanner.scan(timeout)
 
-            if len(service_uuids) > 0:
-                is_services_matching = False
-                for uuid in service_uuids:
-                    if not scanned_incomplete_16b_service_uuids is None and uuid in scanned_incomplete_16b_service_uuids:
-                        is_services_matching = True
-                    if not scanned_complete_16b_service_uuids is None and uuid in scanned_complete_16b_service_uuids:
-                        is_services_matching = True
+        for scan_entry in scanner_results:
+            device = self._get_matching_device(scan_entry, service_uuids)
+            if not device is None:
+                result.append(device)
 
-                    if not scanned_incomplete_32b_service_uuids is None and uuid in scanned_incomplete_32b_service_uuids:
-                        is_services_matching = True
-                    if not scanned_complete_32b_service_uuids is None and uuid in scanned_complete_32b_service_uuids:
-                        is_services_matching = True
+        return result
 
-                    if not scanned_incomplete_128b_service_uuids is None and uuid in scanned_incomplete_128b_service_uuids:
-                        is_services_matching = True
-                    if not scanned_complete_128b_service_uuids is None and uuid in scanned_complete_128b_service_uuids:
-                        is_services_matching = True
+    def scan(self, timeout, advertisement_handler, service_uuids=[], passive=True):
+        interface = self
 
-                if not is_services_matching:
-                    continue
-                
-            result.append({'address': address, 'name': complete_local_name})
+        class ScanDelegate(btle.DefaultDelegate):
+            def handleDiscovery(self, scan_entry, is_new_device, is_new_data):
+                device = interface._get_matching_device(scan_entry, service_uuids)
+                if not device is None:
+                    advertisement_handler(device)
 
-        return result
+        iface = int(self.bluetooth_device.replace("hci", ""))
+        scanner = btle.Scanner(iface).withDelegate(ScanDelegate())
+        scanner.scan(timeout, passive=passive)
 
     def connect(self, mac_address):
         self._peripheral = btle.Peripheral().withDelegate(self._delegate)
@@ -115,6 +151,8 @@ class BluePyBtLeInterface(abstract_interface.AbstractBluetoothInterface):
             self._peripheral = None
             raise e
 
+        self._connected_mac_address = mac_address
+
     def disconnect(self):
         self._characteristic_by_uuid.clear()
         self._characteristic_by_bluepy_handle.clear()
@@ -135,16 +173,32 @@ class BluePyBtLeInterface(abstract_interface.AbstractBluetoothInterface):
         return True
 
     @DisconnectAfterTimeout(300)
-    def write_to_characteristic(self, uuid, data):
+    def write_to_characteristic(self, uuid, data, with_response=None):
+        if with_response is None:
+            with_response = self._is_notifications_enabled
+
         characteristic = self._get_characteristic(uuid)
 
-        return characteristic.write(data, self._is_notifications_enabled)
+        try:
+            return characteristic.write(data, with_response)
+        except btle.BTLEGattError:
+            # cached handles are validated by using them - discover them again if the device rejects them
+            self._invalidate_cached_characteristics()
+            characteristic = self._get_characteristic(uuid)
+
+            return characteristic.write(data, with_response)
 
     @DisconnectAfterTimeout(300)
     def read_from_characteristic(self, uuid):
         characteristic = self._get_characteristic(uuid)
 
-        return characteristic.read()
+        try:
+            return characteristic.read()
+        except btle.BTLEGattError:
+            self._invalidate_cached_characteristics()
+            characteristic = self._get_characteristic(uuid)
+
+            return characteristic.read()
 
     @DisconnectAfterTimeout(300)
     def wait_for_notifications(self, timeout=None):
@@ -0,0 +1,84 @@
+import json
+import os
+import threading
+
+class GattHandleCache():
+    '''
+    Handles of GATT characteristics by device address so that reconnecting does not need a service discovery.
+
+    Entries are not validated when stored - an interface has to call invalidate() if a cached handle turns out
+    to be wrong, i.e. after a firmware update of the device.
+    '''
+
+    def __init__(self, path=None):
+        '''
+        Parameters:
+            path (str): Optional, JSON file the cache is loaded from and saved to. Default: None (memory only)
+        '''
+        self.path = path
+
+        self._lock = threading.Lock()
+        self._handles_by_address = {}
+
+        if not path is None and os.path.exists(path):
+            try:
+                with open(path) as f:
+                    self._handles_by_address = json.load(f)
+            except ValueError:
+                # a damaged cache is rebuilt by service discovery
+                self._handles_by_address = {}
+
+    def get(self, address, uuid):
+        '''
+        Returns a tuple (handle, properties, value_handle) or None if uuid is not cached for address.
+        '''
+        with self._lock:
+            handles = self._handles_by_address.get(address.lower(), {}).get(uuid)
+
+        if handles is None:
+            return None
+
+        return tuple(handles)
+
+    def get_all(self, address):
+        '''
+        Returns a dictionary of (handle, properties, value_handle) tuples by uuid for address.
+        '''
+        with self._lock:
+            handles_by_uuid = self._handles_by_address.get(address.lower(), {})
+
+            return {uuid: tuple(handles) for uuid, handles in handles_by_uuid.items()}
+
+    def put(self, address, uuid, handle, properties, value_handle):
+        with self._lock:
+            handles_by_uuid = self._handles_by_address.setdefault(address.lower(), {})
+            if handles_by_uuid.get(uuid) == [handle, properties, value_handle]:
+                return
+
+            handles_by_uuid[uuid] = [handle, properties, value_handle]
+            self._save()
+
+    def invalidate(self, address):
+        '''Removes all cached handles of address'''
+        with self._lock:
+            if self._handles_by_address.pop(address.lower(), None) is None:
+                return
+
+            self._save()
+
+    def _save(self):
+        if self.path is None:
+            return
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # replace the file at once so that concurrent readers never see a partially written cache
+        temporary_path = self.path + '.' + str(os.getpid()) + '.tmp'
+        with open(temporary_path, 'w') as f:
+            json.dump(self._handles_by_address, f, indent=1, sort_keys=True)
+        os.replace(temporary_path, self.path)
+
+# shared by all interfaces without an own cache so that new interface instances benefit as well
+default_gatt_handle_cache = GattHandleCache()
@@ -0,0 +1,571 @@
+from . import abstract_interface
+from . import async_abstract_interface
+from .. import encoder
+from .. import parser
+from ..message import *
+from ..sem6000 import SEM6000
+
+import asyncio
+import collections
+import datetime
+import random
+import threading
+import time
+
+class SimulatedSEM6000Device():
+    '''
+    In-memory state of a virtual SEM6000 device answering decoded commands with notifications.
+
+    While power is active the device consumes power_in_milliwatt. The consumption is accumulated per hour, day
+    and month of the device clock from which the histories and the total consumption are reported. advance()
+    moves the device clock forward to simulate long periods without waiting.
+    '''
+
+    def __init__(self, mac_address, name='Voltcraft', serial='ML01D10012000000', pin='0000', year_diff=None):
+        self.mac_address = mac_address
+        self.serial = serial
+
+        self._parser = parser.CommandParser(year_diff=year_diff)
+
+        # signal strength reported to discovery - per bluetooth device if listed in rssi_by_bluetooth_device
+        self.rssi = -60
+        self.rssi_by_bluetooth_device = {}
+
+        self._lock = threading.Lock()
+        self._factory_reset(name, pin)
+
+    def _factory_reset(self, name='Voltcraft', pin='0000'):
+        self.name = name
+        self.pin = pin
+        self.is_authorized = False
+
+        self.is_power_active = False
+        self.is_nightmode_active = False
+
+        # offset of the device clock to the local clock
+        self.clock_offset = datetime.timedelta()
+
+        self.normal_price_in_cent = 0
+        self.reduced_period_price_in_cent = 0
+        self.is_reduced_period = False
+        self.reduced_period_start_isotime = '00:00'
+        self.reduced_period_end_isotime = '00:00'
+        self.power_limit_in_watt = 0
+
+        self.is_timer_active = False
+        self.is_timer_action_turn_on = False
+        self.timer_target_isodatetime = '1970-01-01T00:00:00'
+        self.original_timer_length_in_seconds = 0
+
+        self.scheduler_by_slot_id = {}
+
+        self.is_random_mode_active = False
+        self.random_mode_active_on_weekdays = []
+        self.random_mode_start_isotime = '00:00'
+        self.random_mode_end_isotime = '00:00'
+
+        # load drawn while power is active
+        self.power_in_milliwatt = 60000
+        self.voltage_in_volt = 230
+        self.current_in_milliampere = 260
+        self.frequency_in_hertz = 50
+
+        self._reset_consumption()
+
+    def _reset_consumption(self):
+        self.total_consumption_in_kilowatt_hour = 0
+
+        self._total_consumption_in_milliwatt_hour = 0
+        self._consumption_in_milliwatt_hour_by_hour = {}
+        self._consumption_in_milliwatt_hour_by_day = {}
+        self._consumption_in_milliwatt_hour_by_month = {}
+
+        self._consumption_updated_at = self.now()
+
+    def now(self):
+        '''Returns the current date and time of the device clock.'''
+        return datetime.datetime.now() + self.clock_offset
+
+    def advance(self, seconds):
+        '''Moves the device clock forward by the given number of seconds consuming power like in real time.'''
+        with self._lock:
+            self._update_consumption()
+            self.clock_offset += datetime.timedelta(seconds=seconds)
+            self._update_consumption()
+
+    def _update_consumption(self):
+        # accumulates the consumption since the last update split at the hour boundaries
+        now = self.now()
+        start = self._consumption_updated_at
+        self._consumption_updated_at = now
+
+        if not self.is_power_active or not self.power_in_milliwatt or now <= start:
+            return
+
+        while start < now:
+            hour = start.replace(minute=0, second=0, microsecond=0)
+            end = min(now, hour + datetime.timedelta(hours=1))
+
+            consumption = self.power_in_milliwatt * (end - start).total_seconds() / 3600
+            for key, consumption_by_key in [(hour, self._consumption_in_milliwatt_hour_by_hour), (hour.date(), self._consumption_in_milliwatt_hour_by_day), ((hour.year, hour.month), self._consumption_in_milliwatt_hour_by_month)]:
+                consumption_by_key[key] = consumption_by_key.get(key, 0) + consumption
+
+            self._total_consumption_in_milliwatt_hour += consumption
+            start = end
+
+        # only periods which are still reported are kept
+        for consumption_by_key, oldest_key in [(self._consumption_in_milliwatt_hour_by_hour, self._get_hour(23)), (self._consumption_in_milliwatt_hour_by_day, self._get_day(30)), (self._consumption_in_milliwatt_hour_by_month, self._get_month(12))]:
+            for key in [key for key in consumption_by_key if key < oldest_key]:
+                del consumption_by_key[key]
+
+        self.total_consumption_in_kilowatt_hour = int(self._total_consumption_in_milliwatt_hour // 1000000)
+
+    def _get_hour(self, n_ago):
+        return self.now().replace(minute=0, second=0, microsecond=0) - datetime.timedelta(hours=n_ago)
+
+    def _get_day(self, n_ago):
+        return self.now().date() - datetime.timedelta(days=n_ago)
+
+    def _get_month(self, n_ago):
+        now = self.now()
+        months = now.year*12 + now.month - 1 - n_ago
+        return (months // 12, months % 12 + 1)
+
+    def _get_consumption_in_watt_hour(self, consumption_by_key, key):
+        return int(consumption_by_key.get(key, 0) // 1000)
+
+    def get_consumption_n_hours_ago_in_watt_hour(self):
+        '''Returns the consumption of the running hour and the last 23 hours like reported by the device.'''
+        return [self._get_consumption_in_watt_hour(self._consumption_in_milliwatt_hour_by_hour, self._get_hour(n)) for n in range(24)]
+
+    def get_consumption_n_days_ago_in_watt_hour(self):
+        '''Returns the consumption of the last 30 days like reported by the device - the running day is not reported.'''
+        return [None] + [self._get_consumption_in_watt_hour(self._consumption_in_milliwatt_hour_by_day, self._get_day(n)) for n in range(1, 31)]
+
+    def get_consumption_n_months_ago_in_watt_hour(self):
+        '''Returns the consumption of the last 12 months like reported by the device - the running month is not reported.'''
+        return [None] + [self._get_consumption_in_watt_hour(self._consumption_in_milliwatt_hour_by_month, self._get_month(n)) for n in range(1, 13)]
+
+    def handle_raw_command(self, data):
+        '''Parses a raw command and returns the notification to be sent back or None.'''
+        return self.handle_command(self._parser.parse(data))
+
+    def handle_command(self, command):
+        '''Applies a command to the device state and returns the notification to be sent back or None.'''
+        with self._lock:
+            return self._handle_command(command)
+
+    def _handle_command(self, command):
+        # the power drawn up to now is accounted with the state before the command
+        self._update_consumption()
+
+        if isinstance(command, AuthorizeCommand):
+            self.is_authorized = (command.pin == self.pin)
+            return AuthorizedNotification(was_successful=self.is_authorized)
+
+        if isinstance(command, ResetPinCommand):
+            self.pin = '0000'
+            return PinResetNotification(was_successful=True)
+
+        if not self.is_authorized:
+            # the device does not answer commands before authorization
+            return None
+
+        if isinstance(command, ChangePinCommand):
+            was_successful = (command.pin == self.pin)
+            if was_successful:
+                self.pin = command.new_pin
+            return PinChangedNotification(was_successful=was_successful)
+
+        if isinstance(command, PowerSwitchCommand):
+            self.is_power_active = command.on
+            return PowerSwitchedNotification(was_successful=True)
+
+        if isinstance(command, ChangeNightmodeCommand):
+            self.is_nightmode_active = command.on
+            return NightmodeChangedNotification(was_successful=True)
+
+        if isinstance(command, SynchronizeDateAndTimeCommand):
+            self.clock_offset = datetime.datetime.fromisoformat(command.isodatetime) - datetime.datetime.now()
+            self._consumption_updated_at = self.now()
+            return DateAndTimeChangedNotification(was_successful=True)
+
+        if isinstance(command, RequestSettingsCommand):
+            return SettingsRequestedNotification(
+                is_reduced_period=self.is_reduced_period,
+                normal_price_in_cent=self.normal_price_in_cent,
+                reduced_period_price_in_cent=self.reduced_period_price_in_cent,
+                reduced_period_start_isotime=self.reduced_period_start_isotime,
+                reduced_period_end_isotime=self.reduced_period_end_isotime,
+                is_nightmode_active=self.is_nightmode_active,
+                power_limit_in_watt=self.power_limit_in_watt)
+
+        if isinstance(command, ChangePowerLimitCommand):
+            self.power_limit_in_watt = command.power_limit_in_watt
+            return PowerLimitChangedNotification(was_successful=True)
+
+        if isinstance(command, ChangePricesCommand):
+            self.normal_price_in_cent = command.normal_price_in_cent
+            self.reduced_period_price_in_cent = command.reduced_period_price_in_cent
+            return PricesChangedNotification(was_successful=True)
+
+        if isinstance(command, ChangeReducedPeriodCommand):
+            self.is_reduced_period = command.is_active
+            self.reduced_period_start_isotime = command.start_isotime
+            self.reduced_period_end_isotime = command.end_isotime
+            return ReducedPeriodChangedNotification(was_successful=True)
+
+        if isinstance(command, RequestTimerStatusCommand):
+            return TimerStatusRequestedNotification(
+                is_active=self.is_timer_active,
+                is_action_turn_on=self.is_timer_action_turn_on,
+                target_isodatetime=self.timer_target_isodatetime,
+                original_timer_length_in_seconds=self.original_timer_length_in_seconds)
+
+        if isinstance(command, SetTimerCommand):
+            self.is_timer_active = not command.is_reset_timer
+            self.is_timer_action_turn_on = command.is_action_turn_on
+            if not command.is_reset_timer:
+                target = datetime.datetime.fromisoformat(command.target_isodatetime)
+
+                self.timer_target_isodatetime = command.target_isodatetime
+                self.original_timer_length_in_seconds = max(0, int((target - self.now()).total_seconds()))
+            return TimerSetNotification(was_successful=True)
+
+        if isinstance(command, RequestSchedulerCommand):
+            slot_ids = sorted(self.scheduler_by_slot_id.keys())
+            page_slot_ids = slot_ids[command.page_number*4:(command.page_number+1)*4]
+
+            scheduler_entries = []
+            for slot_id in page_slot_ids:
+                scheduler_entries.append(SchedulerEntry(slot_id=slot_id, scheduler=self.scheduler_by_slot_id[slot_id]))
+
+            return SchedulerRequestedNotification(number_of_schedulers=len(slot_ids), scheduler_entries=scheduler_entries)
+
+        if isinstance(command, AddSchedulerCommand):
+            slot_id = 0
+            while slot_id in self.scheduler_by_slot_id:
+                slot_id += 1
+
+            self.scheduler_by_slot_id[slot_id] = command.scheduler
+            return SchedulerChangedNotification(was_successful=True)
+
+        if isinstance(command, EditSchedulerCommand):
+            was_successful = command.slot_id in self.scheduler_by_slot_id
+            if was_successful:
+                self.scheduler_by_slot_id[command.slot_id] = command.scheduler
+            return SchedulerChangedNotification(was_successful=was_successful)
+
+        if isinstance(command, RemoveSchedulerCommand):
+            was_successful = command.slot_id in self.scheduler_by_slot_id
+            if was_successful:
+                del self.scheduler_by_slot_id[command.slot_id]
+            return SchedulerChangedNotification(was_successful=was_successful)
+
+        if isinstance(command, RequestRandomModeStatusCommand):
+            return RandomModeStatusRequestedNotification(
+                is_active=self.is_random_mode_active,
+                active_on_weekdays=self.random_mode_active_on_weekdays,
+                start_isotime=self.random_mode_start_isotime,
+                end_isotime=self.random_mode_end_isotime)
+
+        if isinstance(command, ChangeRandomModeCommand):
+            self.is_random_mode_active = command.is_active
+            self.random_mode_active_on_weekdays = command.active_on_weekdays
+            self.random_mode_start_isotime = command.start_isotime
+            self.random_mode_end_isotime = command.end_isotime
+            return RandomModeChangedNotification(was_successful=True)
+
+        if isinstance(command, RequestMeasurementCommand):
+            power_in_milliwatt = 0
+            current_in_milliampere = 0
+            if self.is_power_active:
+                power_in_milliwatt = self.power_in_milliwatt
+                current_in_milliampere = self.current_in_milliampere
+
+            return MeasurementRequestedNotification(
+                is_power_active=self.is_power_active,
+                power_in_milliwatt=power_in_milliwatt,
+                voltage_in_volt=self.voltage_in_volt,
+                current_in_milliampere=current_in_milliampere,
+                frequency_in_hertz=self.frequency_in_hertz,
+                total_consumption_in_kilowatt_hour=self.total_consumption_in_kilowatt_hour)
+
+        if isinstance(command, RequestConsumptionOfLast12MonthsCommand):
+            return ConsumptionOfLast12MonthsRequestedNotification(consumption_n_months_ago_in_watt_hour=self.get_consumption_n_months_ago_in_watt_hour())
+
+        if isinstance(command, RequestConsumptionOfLast30DaysCommand):
+            return ConsumptionOfLast30DaysRequestedNotification(consumption_n_days_ago_in_watt_hour=self.get_consumption_n_days_ago_in_watt_hour())
+
+        if isinstance(command, RequestConsumptionOfLast23HoursCommand):
+            return ConsumptionOfLast23HoursRequestedNotification(consumption_n_hours_ago_in_watt_hour=self.get_consumption_n_hours_ago_in_watt_hour())
+
+        if isinstance(command, ResetConsumptionCommand):
+            self._reset_consumption()
+            return ConsumptionResetNotification(was_successful=True)
+
+        if isinstance(command, FactoryResetCommand):
+            self._factory_reset()
+            return FactoryResetNotification(was_successful=True)
+
+        if isinstance(command, ChangeDeviceNameCommand):
+            self.name = command.new_name
+            return DeviceNameChangedNotification(was_successful=True)
+
+        if isinstance(command, RequestDeviceSerialCommand):
+            return DeviceSerialRequestedNotification(serial=self.serial)
+
+        raise Exception('Unsupported command ' + str(command))
+
+
+def _get_fragments(message_encoder, notification, fragment_size):
+    encoded_notification = message_encoder.encode(notification)
+
+    return [encoded_notification[offset:offset+fragment_size] for offset in range(0, len(encoded_notification), fragment_size)]
+
+
+class SimulatedBluetoothInterface(abstract_interface.AbstractBluetoothInterface):
+    '''
+    Bluetooth interface talking to in-process SimulatedSEM6000Device instances - i.e. for tests and load tests.
+
+    Notifications are split into fragments of fragment_size bytes. Each fragment is delivered latency seconds
+    (varied by up to +/- jitter seconds) after the command has been written. Writes with response take
+    another latency seconds to return.
+    '''
+
+    def __init__(self, mac_address=None, bluetooth_device='hci0', devices=None, fragment_size=20, latency=0, jitter=0, random_seed=None, connect_latency=0):
+        '''
+        Parameters:
+            devices (dict):         Optional, SimulatedSEM6000Device instances by MAC address. Devices for unknown addresses are created on connect.
+            fragment_size (int):    Optional, maximum number of bytes per notification fragment. Default: 20
+            latency (float):        Optional, seconds between writing a command and receiving its notification fragments. Default: 0
+            jitter (float):         Optional, maximum random deviation of latency in seconds. Default: 0
+            random_seed:            Optional, seed for the jitter
+            connect_latency (float): Optional, seconds it takes to establish a connection. Default: 0
+        '''
+        abstract_interface.AbstractBluetoothInterface.__init__(self, mac_address, bluetooth_device)
+
+        if devices is None:
+            devices = {}
+
+        self.devices = devices
+        self.fragment_size = fragment_size
+        self.latency = latency
+        self.jitter = jitter
+        self.connect_latency = connect_latency
+
+        self._random = random.Random(random_seed)
+        self._encoder = encoder.MessageEncoder()
+
+        self._device = None
+        self._pending_fragments = collections.deque()
+
+    def _get_delay(self):
+        delay = self.latency
+        if self.jitter:
+            delay += self._random.uniform(-self.jitter, self.jitter)
+
+        return max(0, delay)
+
+    def discover(self, timeout, service_uuids=[]):
+        result = []
+
+        for device in self.devices.values():
+            rssi = device.rssi_by_bluetooth_device.get(self.bluetooth_device, device.rssi)
+            result.append({'address': device.mac_address, 'name': device.name, 'rssi': rssi})
+
+        return result
+
+    def scan(self, timeout, advertisement_handler, service_uuids=[], passive=True):
+        for device in self.discover(timeout, service_uuids):
+            advertisement_handler(device)
+
+        time.sleep(timeout)
+
+    def connect(self, mac_address):
+        if not mac_address in self.devices:
+            self.devices[mac_address] = SimulatedSEM6000Device(mac_address)
+
+        if self.connect_latency:
+            time.sleep(self.connect_latency)
+
+        self._device = self.devices[mac_address]
+        self._device.is_authorized = False
+        self._pending_fragments.clear()
+
+    def disconnect(self):
+        self._device = None
+        self._pending_fragments.clear()
+
+    def is_connected(self):
+        return not self._device is None
+
+    def write_to_characteristic(self, uuid, data, with_response=None):
+        if self._device is None:
+            raise Exception("Not connected")
+
+        if uuid != SEM6000.CHARACTERISTIC_UUID_CONTROL:
+            raise Exception("Characteristic is not writable: " + str(uuid))
+
+        if with_response is None:
+            with_response = self._is_notifications_enabled
+
+        # the write response takes one round trip before the write returns
+        if with_response:
+            delay = self._get_delay()
+            if delay:
+                time.sleep(delay)
+
+        notification = self._device.handle_raw_command(data)
+        if notification is None:
+            return
+
+        delivery_time = time.monotonic() + self._get_delay()
+        for fragment in _get_fragments(self._encoder, notification, self.fragment_size):
+            self._pending_fragments.append((delivery_time, SEM6000.CHARACTERISTIC_UUID_RESPONSE, fragment))
+
+    def read_from_characteristic(self, uuid):
+        if self._device is None:
+            raise Exception("Not connected")
+
+        if uuid != SEM6000.CHARACTERISTIC_UUID_NAME:
+            raise Exception("Characteristic is not readable: " + str(uuid))
+
+        return self._device.name.encode()
+
+    def wait_for_notifications(self, timeout=None):
+        if not len(self._pending_fragments):
+            if not timeout is None:
+                time.sleep(timeout)
+            return False
+
+        delivery_time, characteristic_uuid, fragment = self._pending_fragments[0]
+
+        delay = delivery_time - time.monotonic()
+        if not timeout is None and delay > timeout:
+            time.sleep(timeout)
+            return False
+
+        if delay > 0:
+            time.sleep(delay)
+
+        self._pending_fragments.popleft()
+        self._send_notification_to_handlers(characteristic_uuid, fragment)
+
+        return True
+
+
+class AsyncSimulatedBluetoothInterface(async_abstract_interface.AsyncAbstractBluetoothInterface):
+    '''
+    asyncio counterpart of SimulatedBluetoothInterface for AsyncSEM6000.
+
+    The notification fragments of a command are passed to the notification handlers by the event loop latency
+    seconds (varied by up to +/- jitter seconds) after the command has been written.
+    '''
+
+    def __init__(self, mac_address=None, bluetooth_device='hci0', devices=None, fragment_size=20, latency=0, jitter=0, random_seed=None, connect_latency=0):
+        '''
+        Parameters are the same as of SimulatedBluetoothInterface.
+        '''
+        async_abstract_interface.AsyncAbstractBluetoothInterface.__init__(self, mac_address, bluetooth_device)
+
+        if devices is None:
+            devices = {}
+
+        self.devices = devices
+        self.fragment_size = fragment_size
+        self.latency = latency
+        self.jitter = jitter
+        self.connect_latency = connect_latency
+
+        self._random = random.Random(random_seed)
+        self._encoder = encoder.MessageEncoder()
+
+        self._device = None
+        self._pending_deliveries = set()
+
+    def _get_delay(self):
+        delay = self.latency
+        if self.jitter:
+            delay += self._random.uniform(-self.jitter, self.jitter)
+
+        return max(0, delay)
+
+    def _cancel_pending_deliveries(self):
+        for handle in self._pending_deliveries:
+            handle.cancel()
+
+        self._pending_deliveries.clear()
+
+    def _deliver(self, handle_reference, fragments):
+        self._pending_deliveries.discard(handle_reference[0])
+
+        for fragment in fragments:
+            self._send_notification_to_handlers(SEM6000.CHARACTERISTIC_UUID_RESPONSE, fragment)
+
+    async def discover(self, timeout, service_uuids=[]):
+        result = []
+
+        for device in self.devices.values():
+            rssi = device.rssi_by_bluetooth_device.get(self.bluetooth_device, device.rssi)
+            result.append({'address': device.mac_address, 'name': device.name, 'rssi': rssi})
+
+        return result
+
+    async def connect(self, mac_address):
+        if not mac_address in self.devices:
+            self.devices[mac_address] = SimulatedSEM6000Device(mac_address)
+
+        if self.connect_latency:
+            await asyncio.sleep(self.connect_latency)
+
+        self._cancel_pending_deliveries()
+
+        self._device = self.devices[mac_address]
+        self._device.is_authorized = False
+
+    async def disconnect(self):
+        self._cancel_pending_deliveries()
+
+        self._device = None
+
+    def is_connected(self):
+        return not self._device is None
+
+    async def write_to_characteristic(self, uuid, data, with_response=None):
+        if self._device is None:
+            raise Exception("Not connected")
+
+        if uuid != SEM6000.CHARACTERISTIC_UUID_CONTROL:
+            raise Exception("Characteristic is not writable: " + str(uuid))
+
+        if with_response is None:
+            with_response = self._is_notifications_enabled
+
+        # the write response takes one round trip before the write returns
+        if with_response:
+            delay = self._get_delay()
+            if delay:
+                await asyncio.sleep(delay)
+
+            if self._device is None:
+                raise Exception("Not connected")
+
+        notification = self._device.handle_raw_command(data)
+        if notification is None:
+            return
+
+        # all fragments are delivered by one callback so that they keep their order
+        handle_reference = []
+        handle = asyncio.get_running_loop().call_later(self._get_delay(), self._deliver, handle_reference, _get_fragments(self._encoder, notification, self.fragment_size))
+        handle_reference.append(handle)
+        self._pending_deliveries.add(handle)
+
+    async def read_from_characteristic(self, uuid):
+        if self._device is None:
+            raise Exception("Not connected")
+
+        if uuid != SEM6000.CHARACTERISTIC_UUID_NAME:
+            raise Exception("Characteristic is not readable: " + str(uuid))
+
+        return self._device.name.encode()
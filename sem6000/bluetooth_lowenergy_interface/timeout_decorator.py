@@ -1,4 +1,114 @@
+import heapq
+import itertools
+import sys
 import threading
+import time
+
+class Watchdog():
+    '''
+    Calls callbacks after their deadline has passed unless they were cancelled before.
+
+    All deadlines are kept in one heap which is served by a single thread, so scheduling and
+    cancelling a deadline does not create any threads. Each expired callback runs in a daemon thread of its
+    own, so a callback which blocks - i.e. a hanging disconnect - neither delays the other deadlines nor the
+    exit of the interpreter.
+    '''
+
+    def __init__(self, max_callback_threads=8):
+        '''
+        Parameters:
+            max_callback_threads (int): Optional, maximum number of callbacks running at the same time. Default: 8
+        '''
+        self._callback_semaphore = threading.BoundedSemaphore(max_callback_threads)
+
+        self._condition = threading.Condition()
+        self._deadlines = []
+        self._number_of_cancelled_deadlines = 0
+        self._sequence = itertools.count()
+        self._thread = None
+
+    def schedule(self, timeout, callback):
+        '''
+        Schedules callback to be called after timeout seconds.
+
+        Returns a handle to be passed to cancel().
+        '''
+        # entries are lists so that cancel() can clear the callback in place
+        entry = [time.monotonic() + timeout, next(self._sequence), callback]
+
+        with self._condition:
+            heapq.heappush(self._deadlines, entry)
+
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='sem6000-watchdog', daemon=True)
+                self._thread.start()
+
+            if self._deadlines[0] is entry:
+                self._condition.notify()
+
+        return entry
+
+    def cancel(self, entry):
+        '''Cancels a deadline returned by schedule() if it did not expire yet.'''
+        with self._condition:
+            if entry[2] is None:
+                return
+
+            entry[2] = None
+            self._number_of_cancelled_deadlines += 1
+
+            # cancelled deadlines are dropped lazily - rebuild the heap before they dominate it
+            if self._number_of_cancelled_deadlines > len(self._deadlines) // 2:
+                self._deadlines = [e for e in self._deadlines if not e[2] is None]
+                heapq.heapify(self._deadlines)
+                self._number_of_cancelled_deadlines = 0
+
+    def _next_expired_callback(self):
+        with self._condition:
+            while True:
+                while len(self._deadlines) and self._deadlines[0][2] is None:
+                    heapq.heappop(self._deadlines)
+                    self._number_of_cancelled_deadlines -= 1
+
+                if not len(self._deadlines):
+                    self._condition.wait()
+                    continue
+
+                delay = self._deadlines[0][0] - time.monotonic()
+                if delay > 0:
+                    self._condition.wait(delay)
+                    continue
+
+                entry = heapq.heappop(self._deadlines)
+                callback = entry[2]
+                entry[2] = None
+
+                return callback
+
+    def _run_callback(self, callback):
+        try:
+            callback()
+        except Exception as e:
+            print("watchdog callback failed: " + str(e), file=sys.stderr)
+        finally:
+            self._callback_semaphore.release()
+
+    def _run(self):
+        # this thread only keeps track of the deadlines - callbacks run outside of the lock so that they may
+        # schedule or cancel deadlines themselves
+        while True:
+            callback = self._next_expired_callback()
+
+            # further callbacks wait while max_callback_threads callbacks are blocking
+            self._callback_semaphore.acquire()
+            try:
+                threading.Thread(target=self._run_callback, args=(callback,), name='sem6000-watchdog-callback', daemon=True).start()
+            except RuntimeError:
+                # no threads can be started while the interpreter exits
+                self._callback_semaphore.release()
+                return
+
+_watchdog = Watchdog()
 
 def DisconnectAfterTimeout(timeout):
     def Decorator(function):
@@ -7,18 +117,16 @@ def DisconnectAfterTimeout(timeout):
                 disconnectable = s[0]
                 disconnectable.disconnect()
 
-            timer = threading.Timer(timeout, disconnect)
-            timer.start()
-   
-            return_value = None 
+            deadline = _watchdog.schedule(timeout, disconnect)
+
+            return_value = None
             try:
                 return_value = function(*s, **d)
             finally:
-                timer.cancel()
-    
+                _watchdog.cancel(deadline)
+
             return return_value
 
         return decorated_function
 
     return Decorator
-
@@ -0,0 +1,208 @@
+import collections
+import contextlib
+import threading
+
+from .bluetooth_lowenergy_interface.timeout_decorator import Watchdog
+from .sem6000 import SEM6000
+from .state_cache import StateCache
+
+
+class _PooledConnection():
+    def __init__(self, device_address, pin):
+        self.device_address = device_address
+        self.pin = pin
+
+        self.device = None
+        self.is_in_use = False
+        self.idle_deadline = None
+
+
+class SEM6000ConnectionPool():
+    """
+    Keeps authorized SEM6000 connections open for reuse.
+
+    Connections are keyed by MAC address. If max_connections are open the least recently used idle connection
+    is closed to make room for a new one. Idle connections are closed after idle_timeout seconds. A connection that
+    dropped while being pooled is reconnected and authorized again with the cached pin when acquired.
+    """
+
+    def __init__(self, max_connections=5, idle_timeout=60, bluetooth_device='hci0', timeout=3, debug=False, backend='bluepy', state_cache_ttl=None):
+        """
+        Parameters:
+            max_connections     - Optional, maximum number of simultaneously open connections. Default: 5
+            idle_timeout        - Optional, seconds after which an unused connection is closed or None to keep it open. Default: 60
+            bluetooth_device    - Optional, bluetooth device name to use. Default: 'hci0'
+            timeout             - Optional, maximum time in seconds to wait for a response from a device. Default: 3
+            debug               - Optional, if set to true commands and responses are printed to sys.stderr
+            backend             - Optional, 'bluepy', 'bleak' or a callable creating an AbstractBluetoothInterface for a bluetooth device name. Default: 'bluepy'
+            state_cache_ttl     - Optional, seconds the slowly changing states of a pooled device are cached for - see StateCache. Default: None (no caching)
+        """
+        self.max_connections = max_connections
+        self.idle_timeout = idle_timeout
+        self.bluetooth_device = bluetooth_device
+        self.timeout = timeout
+        self.debug = debug
+        self.backend = backend
+        self.state_cache_ttl = state_cache_ttl
+
+        self._condition = threading.Condition()
+        # ordered from least to most recently used
+        self._connection_by_device_address = collections.OrderedDict()
+        # addresses of removed connections which are being disconnected
+        self._closing_device_addresses = set()
+        self._watchdog = Watchdog()
+
+    def _remove_connection(self, connection):
+        # the device has to be disconnected by _close_connection() after the lock has been released
+        del self._connection_by_device_address[connection.device_address]
+
+        if not connection.idle_deadline is None:
+            self._watchdog.cancel(connection.idle_deadline)
+            connection.idle_deadline = None
+
+        self._closing_device_addresses.add(connection.device_address)
+        self._condition.notify_all()
+
+    def _close_connection(self, connection):
+        # disconnecting may take long - the pool is not locked meanwhile
+        try:
+            if not connection.device is None:
+                connection.device.disconnect()
+        finally:
+            with self._condition:
+                self._closing_device_addresses.discard(connection.device_address)
+                self._condition.notify_all()
+
+    def _get_least_recently_used_idle_connection(self):
+        for connection in self._connection_by_device_address.values():
+            if not connection.is_in_use:
+                return connection
+
+        return None
+
+    def _evict_idle_connection(self, connection):
+        with self._condition:
+            if not self._connection_by_device_address.get(connection.device_address) is connection or connection.is_in_use:
+                return
+
+            connection.idle_deadline = None
+            self._remove_connection(connection)
+
+        self._close_connection(connection)
+
+    def _reserve_connection(self, device_address, pin):
+        # returns the connection to use and None or None and a connection which has to be closed first
+        while True:
+            # a device is not connected again before its previous connection is closed
+            if not device_address in self._closing_device_addresses:
+                connection = self._connection_by_device_address.get(device_address)
+                if connection is None:
+                    # closing connections still count as they are connected until they are closed
+                    if len(self._connection_by_device_address) + len(self._closing_device_addresses) < self.max_connections:
+                        connection = _PooledConnection(device_address, pin)
+                        self._connection_by_device_address[device_address] = connection
+                        break
+
+                    evicted_connection = self._get_least_recently_used_idle_connection()
+                    if not evicted_connection is None:
+                        self._remove_connection(evicted_connection)
+                        return None, evicted_connection
+                elif not connection.is_in_use:
+                    break
+
+            self._condition.wait()
+
+        connection.is_in_use = True
+        self._connection_by_device_address.move_to_end(device_address)
+
+        if not connection.idle_deadline is None:
+            self._watchdog.cancel(connection.idle_deadline)
+            connection.idle_deadline = None
+
+        return connection, None
+
+    def acquire(self, device_address, pin):
+        """
+        Get an authorized connection to a remote device. Waits while the connection is used by another thread or
+        all connections are in use.
+
+        Parameters:
+            device_address  - MAC address to connect to, i.e. '00:11:22:33:44:55'.
+            pin             - 4 digit numeric pin, i.e. '0000', or None to use the connection without authorizing, i.e. for reset_pin() or request_device_name().
+
+        Returns a SEM6000 instance which has to be given back by release().
+        """
+        while True:
+            with self._condition:
+                connection, evicted_connection = self._reserve_connection(device_address, pin)
+
+            if evicted_connection is None:
+                break
+
+            self._close_connection(evicted_connection)
+
+        # connecting takes long - other connections may be acquired meanwhile
+        try:
+            if connection.device is None:
+                state_cache = None if self.state_cache_ttl is None else StateCache(self.state_cache_ttl)
+                connection.device = SEM6000(bluetooth_device=self.bluetooth_device, timeout=self.timeout, debug=self.debug, backend=self.backend, state_cache=state_cache)
+
+                # connected before authorizing, so that the link is closed below if the authorization fails
+                connection.device.connect(device_address)
+                if not pin is None:
+                    connection.device.authorize(pin)
+                connection.pin = pin
+            elif not pin is None and connection.pin != pin:
+                connection.device.authorize(pin)
+                connection.pin = pin
+            elif not connection.device._is_connected():
+                connection.device._reconnect()
+        except Exception as e:
+            with self._condition:
+                self._remove_connection(connection)
+            self._close_connection(connection)
+            raise e
+
+        return connection.device
+
+    def release(self, device):
+        """
+        Give back a connection returned by acquire().
+        """
+        with self._condition:
+            connection = self._connection_by_device_address[device.connection_settings["device_address"]]
+            connection.is_in_use = False
+
+            if not self.idle_timeout is None:
+                connection.idle_deadline = self._watchdog.schedule(self.idle_timeout, lambda: self._evict_idle_connection(connection))
+
+            self._condition.notify_all()
+
+    @contextlib.contextmanager
+    def connection(self, device_address, pin):
+        """
+        Context manager acquiring a connection and releasing it when leaving the context.
+        """
+        device = self.acquire(device_address, pin)
+        try:
+            yield device
+        finally:
+            self.release(device)
+
+    def get_number_of_connections(self):
+        with self._condition:
+            return len(self._connection_by_device_address)
+
+    def close(self):
+        """
+        Close all connections which are not in use.
+        """
+        closed_connections = []
+        with self._condition:
+            for connection in list(self._connection_by_device_address.values()):
+                if not connection.is_in_use:
+                    self._remove_connection(connection)
+                    closed_connections.append(connection)
+
+        for connection in closed_connections:
+            self._close_connection(connection)
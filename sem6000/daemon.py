@@ -0,0 +1,243 @@
+import enum
+import json
+import os
+import socket
+import socketserver
+import tempfile
+
+from . import message
+from . import util
+from .connection_pool import SEM6000ConnectionPool
+from .sem6000 import SEM6000
+
+
+# SEM6000 methods callable through the daemon
+METHODS = set([
+    'authorize', 'change_pin', 'reset_pin',
+    'power_on', 'power_off', 'nightmode_on', 'nightmode_off',
+    'change_date_and_time', 'request_settings', 'change_power_limit', 'change_prices', 'change_reduced_period',
+    'request_timer_status', 'activate_timer', 'activate_timer_at', 'reset_timer',
+    'request_scheduler', 'add_onetime_scheduler', 'edit_onetime_scheduler', 'add_repeated_scheduler', 'edit_repeated_scheduler', 'remove_scheduler',
+    'request_random_mode_status', 'change_random_mode', 'reset_random_mode',
+    'request_measurement', 'request_consumption_of_last_12_months', 'request_consumption_of_last_30_days', 'request_consumption_of_last_23_hours', 'reset_consumption',
+    'request_device_name', 'change_device_name', 'factory_reset', 'request_device_serial'
+])
+
+# methods the device answers without authorization - they may be called without a pin
+UNAUTHORIZED_METHODS = set(['reset_pin', 'request_device_name'])
+
+
+def get_default_socket_path():
+    """
+    Returns the path of the daemon socket - $SEM6000D_SOCKET if set, else sem6000d.sock in $XDG_RUNTIME_DIR or the temp directory.
+    """
+    if 'SEM6000D_SOCKET' in os.environ:
+        return os.environ['SEM6000D_SOCKET']
+
+    if 'XDG_RUNTIME_DIR' in os.environ:
+        return os.path.join(os.environ['XDG_RUNTIME_DIR'], 'sem6000d.sock')
+
+    return os.path.join(tempfile.gettempdir(), 'sem6000d-' + str(os.getuid()) + '.sock')
+
+
+def _to_json_object(value):
+    if isinstance(value, enum.Enum):
+        return {'type': value.__class__.__name__, 'value': value.value}
+
+    if isinstance(value, (list, tuple)):
+        return [_to_json_object(v) for v in value]
+
+    if isinstance(value, dict):
+        return {k: _to_json_object(v) for k, v in value.items()}
+
+    if hasattr(value, '__dict__'):
+        return {'type': value.__class__.__name__, 'attributes': _to_json_object(vars(value))}
+
+    return value
+
+
+def _from_json_object(value):
+    if isinstance(value, list):
+        return [_from_json_object(v) for v in value]
+
+    if not isinstance(value, dict):
+        return value
+
+    if 'type' in value and 'value' in value:
+        return getattr(util, value['type'])(value['value'])
+
+    if 'type' in value and 'attributes' in value:
+        cls = getattr(message, value['type'])
+
+        # attributes are restored as they were - bypassing the conversions of __init__
+        result = cls.__new__(cls)
+        result.__dict__.update(_from_json_object(value['attributes']))
+
+        return result
+
+    return {k: _from_json_object(v) for k, v in value.items()}
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+
+            try:
+                request = json.loads(line)
+                response = {'result': _to_json_object(self.server.execute(request))}
+            except Exception as e:
+                response = {'error': str(e)}
+
+            self.wfile.write(json.dumps(response).encode() + b'\n')
+            self.wfile.flush()
+
+
+class SEM6000Daemon(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    Keeps connections to remote devices open and executes SEM6000 methods requested over a unix socket.
+
+    Each request is one line of JSON: {"address": ..., "pin": ..., "method": ..., "args": [...], "kwargs": {...}}
+    Each response is one line of JSON: {"result": ...} or {"error": "message"}
+    The method "discover" takes no address and pin. The methods in UNAUTHORIZED_METHODS take null as pin.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, socket_path=None, connection_pool=None, bluetooth_device='hci0', backend='bluepy'):
+        """
+        Parameters:
+            socket_path         - Optional, path of the unix socket to listen on. Default: get_default_socket_path()
+            connection_pool     - Optional, SEM6000ConnectionPool to take connections from. Default: a new pool using bluetooth_device and backend
+            bluetooth_device    - Optional, bluetooth device name to use. Default: 'hci0'
+            backend             - Optional, 'bluepy', 'bleak' or a callable creating an AbstractBluetoothInterface for a bluetooth device name. Default: 'bluepy'
+        """
+        if socket_path is None:
+            socket_path = get_default_socket_path()
+
+        if connection_pool is None:
+            connection_pool = SEM6000ConnectionPool(bluetooth_device=bluetooth_device, backend=backend)
+
+        self.socket_path = socket_path
+        self.connection_pool = connection_pool
+        self.bluetooth_device = bluetooth_device
+        self.backend = backend
+
+        # remove the socket of a daemon that did not shut down cleanly
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+        socketserver.UnixStreamServer.__init__(self, socket_path, _RequestHandler)
+
+    def server_bind(self):
+        # devices are controlled with the cached pins - only the owner may connect. The socket is created with
+        # these permissions so that it is not accessible by others between bind() and chmod()
+        umask = os.umask(0o177)
+        try:
+            socketserver.UnixStreamServer.server_bind(self)
+        finally:
+            os.umask(umask)
+
+        os.chmod(self.socket_path, 0o600)
+
+    def server_close(self):
+        socketserver.UnixStreamServer.server_close(self)
+
+        self.connection_pool.close()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+    def execute(self, request):
+        method = request['method']
+        args = request.get('args', [])
+        kwargs = request.get('kwargs', {})
+
+        if method == 'discover':
+            return SEM6000.discover(*args, bluetooth_device=self.bluetooth_device, backend=self.backend, **kwargs)
+
+        if not method in METHODS:
+            raise Exception("Unknown method: " + str(method))
+
+        pin = request.get('pin')
+        if pin is None and not method in UNAUTHORIZED_METHODS:
+            raise Exception("Method " + method + " needs a pin")
+
+        with self.connection_pool.connection(request['address'], pin) as device:
+            return getattr(device, method)(*args, **kwargs)
+
+
+class RemoteSEM6000():
+    """
+    Stand-in for a SEM6000 instance executing its methods within a SEM6000Daemon.
+    """
+
+    def __init__(self, client, device_address, pin):
+        self._client = client
+        self._device_address = device_address
+        self._pin = pin
+
+    def __getattr__(self, method):
+        if not method in METHODS:
+            raise AttributeError(method)
+
+        def call(*args, **kwargs):
+            return self._client.call(method, self._device_address, self._pin, *args, **kwargs)
+
+        return call
+
+
+class SEM6000DaemonClient():
+    """
+    Client for a SEM6000Daemon. Notifications are returned as the same objects SEM6000 returns.
+    """
+
+    def __init__(self, socket_path=None):
+        if socket_path is None:
+            socket_path = get_default_socket_path()
+
+        self.socket_path = socket_path
+
+        self._socket = None
+        self._file = None
+
+    def _connect(self):
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._socket.connect(self.socket_path)
+        self._file = self._socket.makefile('rwb')
+
+    def call(self, method, device_address=None, pin=None, *args, **kwargs):
+        if self._socket is None:
+            self._connect()
+
+        request = {'method': method, 'address': device_address, 'pin': pin, 'args': args, 'kwargs': kwargs}
+        self._file.write(json.dumps(request).encode() + b'\n')
+        self._file.flush()
+
+        line = self._file.readline()
+        if not line:
+            self.close()
+            raise Exception("Connection to daemon closed")
+
+        response = json.loads(line)
+        if 'error' in response:
+            raise Exception(response['error'])
+
+        return _from_json_object(response['result'])
+
+    def discover(self, timeout=5):
+        return self.call('discover', None, None, timeout)
+
+    def get_device(self, device_address, pin):
+        """
+        Returns a RemoteSEM6000 executing SEM6000 methods on device_address within the daemon.
+        """
+        return RemoteSEM6000(self, device_address, pin)
+
+    def close(self):
+        if not self._socket is None:
+            self._file.close()
+            self._socket.close()
+
+        self._socket = None
+        self._file = None
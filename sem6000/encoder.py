@@ -1,18 +1,19 @@
 from .message import *
+from . import layout
 
 import datetime
 
 class MessageEncoder():
     def _encode_message(self, payload, suffix=b'\xff\xff'):
-        message = b'\x0f'
+        message = bytearray(b'\x0f')
 
-        message += (len(payload)+1).to_bytes(1, 'big')
+        message.append(len(payload)+1)
         message += payload
 
-        message += ((1+sum(payload)) & 0xff).to_bytes(1, 'big')
+        message.append((1+sum(payload)) & 0xff)
         message += suffix
 
-        return message
+        return bytes(message)
 
     def _encode_pin(self, pin):
             pin_bytes = b''
@@ -21,29 +22,33 @@ class MessageEncoder():
             
             return pin_bytes
 
-    def _encode_scheduler(self, scheduler):
-            is_active = b'\x00'
-            if scheduler.is_active:
-                is_active = b'\x01'
+    def _encode_weekdays_mask(self, weekdays):
+            weekdays_mask = 0
+            for weekday in weekdays:
+                weekdays_mask += 2**weekday.value
 
-            is_action_turn_on = b'\x00'
-            if scheduler.is_action_turn_on:
-                is_action_turn_on = b'\x01'
-
-            repeat_on_weekdays = 0
-            for weekday in scheduler.repeat_on_weekdays:
-                repeat_on_weekdays += 2**weekday.value
-            repeat_on_weekdays = repeat_on_weekdays.to_bytes(1, 'big')
+            return weekdays_mask
 
+    def _encode_scheduler_fields(self, scheduler):
             d = datetime.datetime.fromisoformat(scheduler.isodatetime)
 
-            year = (d.year % 100).to_bytes(1, 'big')
-            month = d.month.to_bytes(1, 'big')
-            day = d.day.to_bytes(1, 'big')
-            hour = d.hour.to_bytes(1, 'big')
-            minute = d.minute.to_bytes(1, 'big')
+            return (
+                int(bool(scheduler.is_active)), 
+                int(bool(scheduler.is_action_turn_on)), 
+                self._encode_weekdays_mask(scheduler.repeat_on_weekdays), 
+                d.year % 100, d.month, d.day, d.hour, d.minute)
+
+    def _encode_scheduler(self, scheduler):
+            return layout.SCHEDULER.pack(*self._encode_scheduler_fields(scheduler))
+
+    def _encode_random_mode(self, random_mode):
+            start_time = datetime.time.fromisoformat(random_mode.start_isotime)
+            end_time = datetime.time.fromisoformat(random_mode.end_isotime)
 
-            return is_active + is_action_turn_on + repeat_on_weekdays + year + month + day + hour + minute
+            return layout.RANDOM_MODE.pack(
+                int(bool(random_mode.is_active)), 
+                self._encode_weekdays_mask(random_mode.active_on_weekdays), 
+                start_time.hour, start_time.minute, end_time.hour, end_time.minute)
 
     def encode(self, message):
         if isinstance(message, AuthorizeCommand):
@@ -161,24 +166,7 @@ class MessageEncoder():
             return self._encode_message(b'\x16\x00' + b'\x00\x00')
 
         if isinstance(message, ChangeRandomModeCommand):
-            is_active = b'\x00'
-            if message.is_active:
-                is_active = b'\x01'
-
-            active_on_weekdays = 0
-            for weekday in message.active_on_weekdays:
-                active_on_weekdays += 2**weekday.value
-            active_on_weekdays = active_on_weekdays.to_bytes(1, 'big')
-
-            start_time = datetime.time.fromisoformat(message.start_isotime)
-            end_time = datetime.time.fromisoformat(message.end_isotime)
-
-            start_hour = start_time.hour.to_bytes(1, 'big')
-            start_minute = start_time.minute.to_bytes(1, 'big')
-            end_hour = end_time.hour.to_bytes(1, 'big')
-            end_minute = end_time.minute.to_bytes(1, 'big')
-
-            return self._encode_message(b'\x15\x00' + is_active + active_on_weekdays + start_hour + start_minute + end_hour + end_minute + b'\x00\x00')
+            return self._encode_message(b'\x15\x00' + self._encode_random_mode(message))
 
         if isinstance(message, RequestMeasurementCommand):
             return self._encode_message(b'\x04\x00' + b'\x00\x00')
@@ -253,26 +241,17 @@ class MessageEncoder():
             return self._encode_message(b'\x01\x00' + was_successful)
 
         if isinstance(message, SettingsRequestedNotification):
-            is_reduced_period = b'\x00'
-            if message.is_reduced_period:
-                is_reduced_period = b'\x01'
-
-            normal_price_in_cent = message.normal_price_in_cent.to_bytes(1, 'big')
-            reduced_period_price_in_cent = message.reduced_period_price_in_cent.to_bytes(1, 'big')
-
             reduced_period_start_time = datetime.time.fromisoformat(message.reduced_period_start_isotime)
             reduced_period_end_time = datetime.time.fromisoformat(message.reduced_period_end_isotime)
 
-            reduced_period_start_time_in_minutes = (reduced_period_start_time.hour*60 + reduced_period_start_time.minute).to_bytes(2, 'big')
-            reduced_period_end_time_in_minutes = (reduced_period_end_time.hour*60 + reduced_period_end_time.minute).to_bytes(2, 'big')
-
-            is_nightmode_active = b'\x01'
-            if message.is_nightmode_active:
-                is_nightmode_active = b'\x00'
-
-            power_limit_in_watt = message.power_limit_in_watt.to_bytes(2, 'big')
-
-            return self._encode_message(b'\x10\x00' + is_reduced_period + normal_price_in_cent + reduced_period_price_in_cent + reduced_period_start_time_in_minutes + reduced_period_end_time_in_minutes + is_nightmode_active + b'\x00' + power_limit_in_watt)
+            return self._encode_message(b'\x10\x00' + layout.SETTINGS.pack(
+                int(bool(message.is_reduced_period)), 
+                message.normal_price_in_cent, 
+                message.reduced_period_price_in_cent, 
+                reduced_period_start_time.hour*60 + reduced_period_start_time.minute, 
+                reduced_period_end_time.hour*60 + reduced_period_end_time.minute, 
+                int(not message.is_nightmode_active), 
+                message.power_limit_in_watt))
 
         if isinstance(message, PowerLimitChangedNotification):
             return self._encode_message(b'\x05\x00' + b'\x00')
@@ -284,47 +263,39 @@ class MessageEncoder():
             return self._encode_message(b'\x0f\x00\x01' + b'\x00')
 
         if isinstance(message, TimerStatusRequestedNotification):
-            timer_action = b'\x00'
+            timer_action = 0x00
             if message.is_active:
-                timer_action = b'\x02'
+                timer_action = 0x02
                 if message.is_action_turn_on:
-                    timer_action = b'\x01'
+                    timer_action = 0x01
 
             d = datetime.datetime.fromisoformat(message.target_isodatetime)
 
-            target_second = d.second.to_bytes(1, 'big')
-            target_minute = d.minute.to_bytes(1, 'big')
-            target_hour = d.hour.to_bytes(1, 'big')
-            target_day = d.day.to_bytes(1, 'big')
-            target_month = d.month.to_bytes(1, 'big')
-            target_year = (d.year % 100).to_bytes(1, 'big')
+            original_timer_length_in_seconds = message.original_timer_length_in_seconds
 
-            original_timer_length_in_seconds = message.original_timer_length_in_seconds.to_bytes(3, 'big')
-
-            return self._encode_message(b'\x09\x00' + timer_action + target_second + target_minute + target_hour + target_day + target_month + target_year + original_timer_length_in_seconds + b'\x00')
+            return self._encode_message(b'\x09\x00' + layout.TIMER_STATUS.pack(
+                timer_action, 
+                d.second, d.minute, d.hour, d.day, d.month, d.year % 100, 
+                original_timer_length_in_seconds >> 16, original_timer_length_in_seconds & 0xffff))
 
         if isinstance(message, TimerSetNotification):
             return self._encode_message(b'\x08\x00\x00')
 
         if isinstance(message, SchedulerRequestedNotification):
-            schedulers_data = b''
-
-            number_of_schedulers = len(message.scheduler_entries)
-            for i in range(number_of_schedulers):
-                scheduler_entry = message.scheduler_entries[i]
-                scheduler = scheduler_entry.scheduler
+            # number_of_schedulers is the total number of schedulers - the message may only contain one page of them
+            payload = bytearray(3 + len(message.scheduler_entries) * layout.SCHEDULER_ENTRY.size)
+            payload[0:3] = b'\x14\x00' + message.number_of_schedulers.to_bytes(1, 'big')
 
-                slot_id = scheduler_entry.slot_id.to_bytes(1, 'big')
+            offset = 3
+            for scheduler_entry in message.scheduler_entries:
+                layout.SCHEDULER_ENTRY.pack_into(payload, offset, scheduler_entry.slot_id, *self._encode_scheduler_fields(scheduler_entry.scheduler), 0)
 
-                scheduler_data = self._encode_scheduler(scheduler) + b'\x00\x00' 
-                checksum = (sum(scheduler_data)+0x14) & 0xff
-                checksum = checksum.to_bytes(1, 'big')
+                # checksum covers the scheduler data including its two trailing bytes
+                payload[offset + layout.SCHEDULER_ENTRY.size - 1] = (sum(payload[offset+1:offset+layout.SCHEDULER_ENTRY.size-1])+0x14) & 0xff
 
-                schedulers_data += slot_id + scheduler_data + checksum
+                offset += layout.SCHEDULER_ENTRY.size
 
-            number_of_schedulers = number_of_schedulers.to_bytes(1, 'big')
-
-            return self._encode_message(b'\x14\x00' + number_of_schedulers + schedulers_data)
+            return self._encode_message(payload)
 
         if isinstance(message, SchedulerChangedNotification):
             was_successful = b'\x01'
@@ -334,24 +305,7 @@ class MessageEncoder():
             return self._encode_message(b'\x13\x00' + was_successful + b'\x00\x00')
 
         if isinstance(message, RandomModeStatusRequestedNotification):
-            is_active = b'\x00'
-            if message.is_active:
-                is_active = b'\x01'
-
-            active_on_weekdays = 0
-            for weekday in message.active_on_weekdays:
-                active_on_weekdays += 2**weekday.value
-            active_on_weekdays = active_on_weekdays.to_bytes(1, 'big')
-
-            start_time = datetime.time.fromisoformat(message.start_isotime)
-            end_time = datetime.time.fromisoformat(message.end_isotime)
-
-            start_hour = start_time.hour.to_bytes(1, 'big')
-            start_minute = start_time.minute.to_bytes(1, 'big')
-            end_hour = end_time.hour.to_bytes(1, 'big')
-            end_minute = end_time.minute.to_bytes(1, 'big')
-
-            return self._encode_message(b'\x16\x00' + is_active + active_on_weekdays + start_hour + start_minute + end_hour + end_minute + b'\x00\x00')
+            return self._encode_message(b'\x16\x00' + self._encode_random_mode(message))
 
         if isinstance(message, RandomModeChangedNotification):
             was_successful = b'\x01'
@@ -361,18 +315,16 @@ class MessageEncoder():
             return self._encode_message(b'\x15\x00' + was_successful + b'\x00')
 
         if isinstance(message, MeasurementRequestedNotification):
-            is_power_active = b'\x00'
-            if message.is_power_active:
-                is_power_active = b'\x01'
-
-            power_in_milliwatt = message.power_in_milliwatt.to_bytes(3, 'big')
-            voltage_in_volt = message.voltage_in_volt.to_bytes(1, 'big')
-            current_in_milliampere = message.current_in_milliampere.to_bytes(2, 'big')
-            frequency_in_hertz = message.frequency_in_hertz.to_bytes(1, 'big')
-            total_consumption_in_kilowatt_hour = message.total_consumption_in_kilowatt_hour.to_bytes(4, 'big')
+            power_in_milliwatt = message.power_in_milliwatt
 
             # suffix=b'\xff\xff' is missing in this notification
-            return self._encode_message(b'\x04\x00' + is_power_active + power_in_milliwatt + voltage_in_volt + current_in_milliampere + frequency_in_hertz + b'\x00\x00' + total_consumption_in_kilowatt_hour, suffix=b'')
+            return self._encode_message(b'\x04\x00' + layout.MEASUREMENT.pack(
+                int(bool(message.is_power_active)), 
+                power_in_milliwatt >> 16, power_in_milliwatt & 0xffff, 
+                message.voltage_in_volt, 
+                message.current_in_milliampere, 
+                message.frequency_in_hertz, 
+                message.total_consumption_in_kilowatt_hour), suffix=b'')
 
         if isinstance(message, ConsumptionOfLast12MonthsRequestedNotification):
             consumptions = b''
@@ -0,0 +1,320 @@
+import asyncio
+import collections
+import queue
+import sys
+import threading
+import time
+
+from .adapter_scheduler import AdapterScheduler
+from .sem6000 import SEM6000
+
+
+class FleetSample():
+    def __init__(self, device_address, bluetooth_device, timestamp, measurement=None, error=None):
+        self.device_address = device_address
+        self.bluetooth_device = bluetooth_device
+        self.timestamp = timestamp
+        self.measurement = measurement
+        self.error = error
+
+    def __str__(self):
+        name = self.__class__.__name__
+        return name + "(device_address=" + str(self.device_address) + ", bluetooth_device=" + str(self.bluetooth_device) + ", timestamp=" + str(self.timestamp) + ", measurement=" + str(self.measurement) + ", error=" + str(self.error) + ")"
+
+
+class _LinkLimiter():
+    """
+    Limits the number of simultaneous links. Free links are handed to the waiting threads in the order they
+    started waiting so that no device is starved by devices releasing and acquiring their link in a loop.
+    """
+
+    def __init__(self, number_of_links, stop_event):
+        self._condition = threading.Condition()
+        self._number_of_free_links = number_of_links
+        self._waiting_tickets = collections.deque()
+        self._stop_event = stop_event
+
+    def acquire(self):
+        """
+        Returns True once a link is acquired or False if the stop event was set while waiting.
+        """
+        ticket = object()
+
+        with self._condition:
+            self._waiting_tickets.append(ticket)
+            try:
+                self._condition.wait_for(lambda: self._stop_event.is_set() or (self._waiting_tickets[0] is ticket and self._number_of_free_links > 0))
+                if self._stop_event.is_set():
+                    return False
+
+                self._number_of_free_links -= 1
+                return True
+            finally:
+                self._waiting_tickets.remove(ticket)
+                self._condition.notify_all()
+
+    def release(self):
+        with self._condition:
+            self._number_of_free_links += 1
+            self._condition.notify_all()
+
+    def wake_up(self):
+        with self._condition:
+            self._condition.notify_all()
+
+
+class FleetPoller():
+    """
+    Polls the measurement of many remote devices on a fixed cadence.
+
+    Every device is polled by its own thread. The number of devices connected through the same bluetooth device
+    at the same time is limited by max_connections_per_bluetooth_device. If more devices share a bluetooth device
+    they are disconnected after each poll to free the link for the others. A device keeping its connection keeps
+    its link as well until it is disconnected.
+
+    Samples are passed to callback if given. Otherwise they can be consumed by iterating over the poller - either
+    with "for" or "async for".
+    """
+
+    def __init__(self, devices, interval=10, max_connections_per_bluetooth_device=3, bluetooth_device='hci0', timeout=3, backend='bluepy', callback=None, debug=False, adapter_scheduler=None):
+        """
+        Parameters:
+            devices                                 - list of (address, pin) or (address, pin, bluetooth_device) tuples
+            interval                                - Optional, seconds between two polls of the same device. Default: 10
+            max_connections_per_bluetooth_device    - Optional, maximum number of simultaneous links per bluetooth device. Default: 3
+            bluetooth_device                        - Optional, bluetooth device for devices without one. Default: 'hci0'
+            timeout                                 - Optional, maximum time in seconds to wait for a response from a device. Default: 3
+            backend                                 - Optional, 'bluepy', 'bleak' or a callable returning an AbstractBluetoothInterface for a bluetooth device name. Default: 'bluepy'
+            callback                                - Optional, called with each FleetSample from the polling threads
+            debug                                   - Optional, if set to true commands and responses are printed to sys.stderr
+            adapter_scheduler                       - Optional, AdapterScheduler choosing the bluetooth device for devices without one instead of bluetooth_device
+        """
+        self.adapter_scheduler = adapter_scheduler
+
+        # devices without a bluetooth device are assigned one by the adapter scheduler on each connect
+        if not adapter_scheduler is None:
+            bluetooth_device = None
+
+        self.devices = []
+        for device in devices:
+            if len(device) == 2:
+                device = (device[0], device[1], bluetooth_device)
+            self.devices.append(tuple(device))
+
+        self.interval = interval
+        self.max_connections_per_bluetooth_device = max_connections_per_bluetooth_device
+        self.timeout = timeout
+        self.backend = backend
+        self.callback = callback
+        self.debug = debug
+
+        self._number_of_devices_by_bluetooth_device = {}
+        for address, pin, bluetooth_device in self.devices:
+            if not bluetooth_device is None:
+                self._number_of_devices_by_bluetooth_device[bluetooth_device] = self._number_of_devices_by_bluetooth_device.get(bluetooth_device, 0) + 1
+
+        bluetooth_devices = set(self._number_of_devices_by_bluetooth_device)
+        if not adapter_scheduler is None:
+            bluetooth_devices.update(adapter_scheduler.bluetooth_devices)
+
+        self._samples = queue.Queue()
+        self._stop_event = threading.Event()
+
+        self._link_limiter_by_bluetooth_device = {}
+        for bluetooth_device in bluetooth_devices:
+            self._link_limiter_by_bluetooth_device[bluetooth_device] = _LinkLimiter(max_connections_per_bluetooth_device, self._stop_event)
+        self._threads = []
+
+    def _is_keeping_connection(self, bluetooth_device):
+        number_of_devices = self._number_of_devices_by_bluetooth_device.get(bluetooth_device, 0)
+        if not self.adapter_scheduler is None:
+            number_of_devices += self.adapter_scheduler.get_number_of_links(bluetooth_device)
+
+        return number_of_devices <= self.max_connections_per_bluetooth_device
+
+    def _publish(self, sample):
+        if self.callback is None:
+            self._samples.put(sample)
+        else:
+            self.callback(sample)
+
+    def _poll_device(self, address, pin, bluetooth_device):
+        is_scheduled = bluetooth_device is None
+        device = None
+
+        # a kept connection keeps its link so that devices assigned to the same bluetooth device later on can not
+        # exceed max_connections_per_bluetooth_device
+        link_limiter = None
+
+        next_poll_time = time.monotonic()
+        while not self._stop_event.is_set():
+            delay = next_poll_time - time.monotonic()
+            if delay > 0 and self._stop_event.wait(delay):
+                break
+
+            if device is None:
+                if is_scheduled:
+                    bluetooth_device = self.adapter_scheduler.acquire(address)
+
+                device = SEM6000(bluetooth_device=bluetooth_device, timeout=self.timeout, debug=self.debug, backend=self.backend)
+
+            if link_limiter is None:
+                if not self._link_limiter_by_bluetooth_device[bluetooth_device].acquire():
+                    break
+
+                link_limiter = self._link_limiter_by_bluetooth_device[bluetooth_device]
+
+            # connecting and authorizing are separate steps so that only failing connections count against the
+            # bluetooth device - i.e. a wrong pin fails on every bluetooth device
+            has_connected = False
+            has_failed_to_connect = False
+            was_successful = True
+            try:
+                if not device._is_connected():
+                    # authorized after the connection has been established
+                    device.pin = None
+
+                    try:
+                        device.connect(address)
+                    except Exception as e:
+                        has_failed_to_connect = True
+                        raise e
+
+                    has_connected = True
+                    device.authorize(pin)
+
+                measurement = device.request_measurement()
+                sample = FleetSample(address, bluetooth_device, time.time(), measurement=measurement)
+            except Exception as e:
+                sample = FleetSample(address, bluetooth_device, time.time(), error=e)
+                was_successful = False
+            finally:
+                if not was_successful or not self._is_keeping_connection(bluetooth_device):
+                    device.disconnect()
+                    link_limiter.release()
+                    link_limiter = None
+
+            if is_scheduled:
+                if has_connected:
+                    self.adapter_scheduler.record_result(bluetooth_device, True)
+                elif has_failed_to_connect:
+                    # fail over - the bluetooth device is chosen again on the next poll
+                    self.adapter_scheduler.release(bluetooth_device, was_successful=False)
+                    device = None
+
+            self._publish(sample)
+
+            # polls missed while waiting for a link are skipped instead of being caught up with
+            next_poll_time = max(next_poll_time + self.interval, time.monotonic())
+
+        if not device is None:
+            device.disconnect()
+
+            if is_scheduled:
+                self.adapter_scheduler.release(bluetooth_device)
+
+        if not link_limiter is None:
+            link_limiter.release()
+
+    def start(self):
+        """
+        Start polling all devices.
+        """
+        self._stop_event.clear()
+
+        for address, pin, bluetooth_device in self.devices:
+            thread = threading.Thread(target=self._poll_device, args=(address, pin, bluetooth_device), name='sem6000-poller-' + address, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        """
+        Stop polling and disconnect all devices.
+        """
+        self._stop_event.set()
+        for link_limiter in self._link_limiter_by_bluetooth_device.values():
+            link_limiter.wake_up()
+
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+        self._samples.put(None)
+
+    def __iter__(self):
+        while True:
+            sample = self._samples.get()
+            if sample is None:
+                return
+
+            yield sample
+
+    def _get_sample(self, timeout):
+        try:
+            return self._samples.get(timeout=timeout)
+        except queue.Empty:
+            return queue.Empty
+
+    async def __aiter__(self):
+        loop = asyncio.get_running_loop()
+
+        while True:
+            # the executor thread returns after a short timeout so that it is not blocked forever once the
+            # consumer stops iterating
+            sample = await loop.run_in_executor(None, self._get_sample, 0.1)
+            if sample is queue.Empty:
+                continue
+
+            if sample is None:
+                return
+
+            yield sample
+
+
+def benchmark(number_of_devices, duration=10, number_of_bluetooth_devices=1, max_connections_per_bluetooth_device=3, interval=0, latency=0.03, connect_latency=1):
+    """
+    Polls simulated devices for duration seconds.
+
+    Parameters:
+        number_of_devices                       - number of simulated devices
+        duration                                - Optional, seconds to poll. Default: 10
+        number_of_bluetooth_devices             - Optional, number of bluetooth devices the AdapterScheduler spreads the devices over. Default: 1
+        max_connections_per_bluetooth_device    - Optional, maximum number of simultaneous links per bluetooth device. Default: 3
+        interval                                - Optional, seconds between two polls of the same device. Default: 0
+        latency                                 - Optional, simulated seconds between a command and its response. Default: 0.03
+        connect_latency                         - Optional, simulated seconds to establish a connection. Default: 1
+
+    Returns the number of samples per second.
+    """
+    from .bluetooth_lowenergy_interface.simulated_interface import SimulatedBluetoothInterface, SimulatedSEM6000Device
+
+    simulated_devices = {}
+    devices = []
+    for i in range(number_of_devices):
+        address = '02:00:00:00:{:02x}:{:02x}'.format(i >> 8, i & 0xff)
+        simulated_devices[address] = SimulatedSEM6000Device(address)
+        devices.append((address, '0000'))
+
+    adapter_scheduler = AdapterScheduler(['hci' + str(i) for i in range(number_of_bluetooth_devices)])
+
+    def create_bluetooth_lowenergy_interface(bluetooth_device):
+        return SimulatedBluetoothInterface(bluetooth_device=bluetooth_device, devices=simulated_devices, latency=latency, connect_latency=connect_latency)
+
+    lock = threading.Lock()
+    number_of_samples = 0
+    def count_sample(sample):
+        nonlocal number_of_samples
+        if sample.error is None:
+            with lock:
+                number_of_samples += 1
+        else:
+            print("poll failed: " + str(sample), file=sys.stderr)
+
+    poller = FleetPoller(devices, interval=interval, max_connections_per_bluetooth_device=max_connections_per_bluetooth_device, backend=create_bluetooth_lowenergy_interface, callback=count_sample, adapter_scheduler=adapter_scheduler)
+
+    start_time = time.monotonic()
+    poller.start()
+    time.sleep(duration)
+    poller.stop()
+
+    return number_of_samples / (time.monotonic() - start_time)
@@ -0,0 +1,236 @@
+import concurrent.futures
+import contextlib
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+
+from .sem6000 import SEM6000
+from . import settings
+
+
+def read_inventory(path, default_bluetooth_device='hci0'):
+    """
+    Read an inventory file. Each line holds a MAC address, the pin and optionally the bluetooth device to reach the device with, i.e. '00:11:22:33:44:55 1234 hci1'.
+    Empty lines and lines starting with '#' are ignored.
+
+    Returns a list of (device_address, pin, bluetooth_device) tuples.
+    """
+    inventory = []
+
+    with open(path) as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+
+            fields = line.split()
+            if not len(fields) in [2, 3]:
+                raise Exception("Invalid inventory line " + str(line_number) + ": " + line)
+
+            bluetooth_device = fields[2] if len(fields) == 3 else default_bluetooth_device
+            inventory.append((fields[0], fields[1], bluetooth_device))
+
+    return inventory
+
+
+def _write_json(path, data):
+    # sorted keys and a final newline keep files of unchanged devices equal in a diff
+    temporary_path = path + '.' + str(os.getpid()) + '.tmp'
+    with open(temporary_path, 'w') as f:
+        json.dump(data, f, indent=1, sort_keys=True)
+        f.write('\n')
+    os.replace(temporary_path, path)
+
+
+class _Progress():
+    # results of finished devices as JSON lines - survives an interrupted run. The first line records the start of the run
+    def __init__(self, path, max_age=None):
+        self.path = path
+        self.max_age = max_age
+
+        self._lock = threading.Lock()
+
+    def load(self):
+        result_by_device_address = {}
+        started_at = None
+
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                for line in f:
+                    try:
+                        result = json.loads(line)
+                    except ValueError:
+                        # a line of an interrupted write
+                        continue
+
+                    if "started_at" in result:
+                        started_at = result["started_at"]
+                    else:
+                        result_by_device_address[result["address"]] = result
+
+        if started_at is None or (not self.max_age is None and time.time() - started_at > self.max_age):
+            # the results of an earlier run are outdated - a new run starts
+            self.remove()
+            result_by_device_address = {}
+            self.append({"started_at": time.time()})
+
+        return result_by_device_address
+
+    def append(self, result):
+        with self._lock:
+            with open(self.path, 'a') as f:
+                f.write(json.dumps(result, sort_keys=True) + '\n')
+                f.flush()
+
+    def remove(self):
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+
+@contextlib.contextmanager
+def _connection(device_address, pin, bluetooth_device, timeout, backend):
+    device = SEM6000(bluetooth_device=bluetooth_device, timeout=timeout, backend=backend)
+    try:
+        # the connection is closed as well if the authorization fails
+        device.connect(device_address)
+        device.authorize(pin)
+
+        yield device
+    finally:
+        device.disconnect()
+
+
+def _run(inventory, task, progress, max_connections_per_bluetooth_device, verbose, get_key=None):
+    # get_key returns what the task of a device depends on - results of another key are outdated
+    if get_key is None:
+        get_key = lambda device_address: None
+
+    result_by_device_address = progress.load()
+
+    # devices which failed before are tried again
+    finished_device_addresses = set(device_address for device_address, result in result_by_device_address.items() if not "error" in result and result.get("key") == get_key(device_address))
+    pending_inventory = [entry for entry in inventory if not entry[0] in finished_device_addresses]
+
+    def run_task(device_address, pin, bluetooth_device):
+        try:
+            result = {"address": device_address, "result": task(device_address, pin, bluetooth_device)}
+        except Exception as e:
+            result = {"address": device_address, "error": str(e)}
+
+        key = get_key(device_address)
+        if not key is None:
+            result["key"] = key
+
+        progress.append(result)
+
+        if verbose:
+            print(device_address + ": " + ("failed: " + result["error"] if "error" in result else "done"), file=sys.stderr)
+
+        return result
+
+    # one pool per bluetooth device bounds the number of simultaneous connections of each adapter
+    executor_by_bluetooth_device = {}
+    futures = []
+    try:
+        for device_address, pin, bluetooth_device in pending_inventory:
+            if not bluetooth_device in executor_by_bluetooth_device:
+                executor_by_bluetooth_device[bluetooth_device] = concurrent.futures.ThreadPoolExecutor(max_workers=max_connections_per_bluetooth_device, thread_name_prefix='sem6000-' + bluetooth_device)
+
+            futures.append(executor_by_bluetooth_device[bluetooth_device].submit(run_task, device_address, pin, bluetooth_device))
+
+        for future in futures:
+            result = future.result()
+            result_by_device_address[result["address"]] = result
+    finally:
+        # devices which did not start yet are skipped if the run is interrupted
+        for executor in executor_by_bluetooth_device.values():
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    results = {}
+    errors = {}
+    for device_address, pin, bluetooth_device in inventory:
+        result = result_by_device_address[device_address]
+
+        if "error" in result:
+            errors[device_address] = result["error"]
+        else:
+            results[device_address] = result["result"]
+
+    return results, errors
+
+
+def backup(inventory, output_path, max_connections_per_bluetooth_device=3, timeout=3, backend='bluepy', verbose=False, max_progress_age=24*3600):
+    """
+    Back up the settings of many devices concurrently into one JSON file.
+
+    The file maps the addresses to the states returned by settings.get_state() in "devices" and to error messages in "errors".
+    Finished devices are recorded in output_path + '.progress', so an interrupted backup resumes with the missing and failed devices
+    unless it started more than max_progress_age seconds ago.
+
+    Parameters:
+        inventory                               - list of (device_address, pin, bluetooth_device) tuples, i.e. from read_inventory()
+        output_path                             - JSON file to write
+        max_connections_per_bluetooth_device    - Optional, maximum number of simultaneously connected devices per bluetooth device. Default: 3
+        timeout                                 - Optional, maximum time in seconds to wait for a response from a device. Default: 3
+        backend                                 - Optional, 'bluepy', 'bleak' or a callable creating an AbstractBluetoothInterface for a bluetooth device name. Default: 'bluepy'
+        verbose                                 - Optional, if set to true the result of each device is printed to sys.stderr
+        max_progress_age                        - Optional, seconds after the start of an interrupted run after which it is started anew instead of being resumed. Default: 24*3600
+
+    Returns a dictionary of error messages by address of the devices which could not be backed up.
+    """
+    def backup_device(device_address, pin, bluetooth_device):
+        with _connection(device_address, pin, bluetooth_device, timeout, backend) as device:
+            return settings.get_state(device)
+
+    progress = _Progress(output_path + '.progress', max_progress_age)
+    states, errors = _run(inventory, backup_device, progress, max_connections_per_bluetooth_device, verbose)
+
+    _write_json(output_path, {"devices": states, "errors": errors})
+    if not errors:
+        progress.remove()
+
+    return errors
+
+
+def restore(inventory, backup_path, report_path, max_connections_per_bluetooth_device=3, timeout=3, backend='bluepy', verbose=False, max_progress_age=24*3600):
+    """
+    Apply the settings of a backup written by backup() to many devices concurrently. Only differing settings are changed - see settings.apply_settings().
+
+    The report maps the addresses to the commands sent in "devices" and to error messages in "errors".
+    Finished devices are recorded in report_path + '.progress' together with a hash of the state they were restored to, so an
+    interrupted restore resumes with the missing and failed devices and with the devices whose state in the backup changed.
+
+    Parameters:
+        inventory       - list of (device_address, pin, bluetooth_device) tuples, i.e. from read_inventory()
+        backup_path     - JSON file written by backup()
+        report_path     - JSON file to write the report to
+
+    The other parameters are the same as of backup().
+
+    Returns a dictionary of error messages by address of the devices which could not be restored.
+    """
+    with open(backup_path) as f:
+        state_by_device_address = json.load(f)["devices"]
+
+    def restore_device(device_address, pin, bluetooth_device):
+        if not device_address in state_by_device_address:
+            raise Exception("No backup of " + device_address)
+
+        with _connection(device_address, pin, bluetooth_device, timeout, backend) as device:
+            return [str(command) for command in settings.apply_settings(device, state_by_device_address[device_address])]
+
+    def get_state_hash(device_address):
+        state = json.dumps(state_by_device_address.get(device_address), sort_keys=True)
+        return hashlib.sha256(state.encode()).hexdigest()
+
+    progress = _Progress(report_path + '.progress', max_progress_age)
+    commands, errors = _run(inventory, restore_device, progress, max_connections_per_bluetooth_device, verbose, get_state_hash)
+
+    _write_json(report_path, {"devices": commands, "errors": errors})
+    if not errors:
+        progress.remove()
+
+    return errors
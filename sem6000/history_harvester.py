@@ -0,0 +1,261 @@
+import datetime
+import os
+import struct
+import threading
+
+
+HOUR = 'hour'
+DAY = 'day'
+MONTH = 'month'
+
+UNITS = [HOUR, DAY, MONTH]
+
+# start of the period as seconds since 1970-01-01 of the device clock and consumption in watt hours
+_RECORD = struct.Struct('<qI')
+
+_EPOCH = datetime.datetime(1970, 1, 1)
+
+
+def _floor(dt, unit):
+    if unit == HOUR:
+        return dt.replace(minute=0, second=0, microsecond=0)
+
+    if unit == DAY:
+        return dt.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    return dt.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def _add(dt, unit, n):
+    if unit == HOUR:
+        return dt + datetime.timedelta(hours=n)
+
+    if unit == DAY:
+        return dt + datetime.timedelta(days=n)
+
+    months = dt.year*12 + dt.month - 1 + n
+    return dt.replace(year=months // 12, month=months % 12 + 1)
+
+
+def _get_number_of_periods(start, end, unit):
+    # number of periods from start up to but excluding end - both aligned to unit
+    if unit == MONTH:
+        return (end.year*12 + end.month) - (start.year*12 + start.month)
+
+    seconds_per_period = 3600 if unit == HOUR else 24*3600
+    return int((end - start).total_seconds()) // seconds_per_period
+
+
+class ConsumptionHistoryStore():
+    """
+    Stores the hourly, daily and monthly consumptions of devices in one append-only file per device and unit.
+
+    Periods are stored in ascending order, so the last stored period of a device is its watermark.
+    """
+
+    def __init__(self, path):
+        """
+        Parameters:
+            path    - directory to store the history files in
+        """
+        self.path = path
+
+        self._lock = threading.Lock()
+
+    def _get_file_path(self, device_address, unit):
+        return os.path.join(self.path, device_address.lower().replace(':', '-') + '-' + unit)
+
+    def get_last_period(self, device_address, unit):
+        """
+        Returns the start of the last stored period of a device as datetime or None if nothing has been stored.
+        """
+        file_path = self._get_file_path(device_address, unit)
+
+        with self._lock:
+            if not os.path.exists(file_path):
+                return None
+
+            with open(file_path, 'rb') as f:
+                # an interrupted append may have left an incomplete record
+                size = os.path.getsize(file_path) // _RECORD.size * _RECORD.size
+                if not size:
+                    return None
+
+                f.seek(size - _RECORD.size)
+                seconds, consumption = _RECORD.unpack(f.read(_RECORD.size))
+
+        return _EPOCH + datetime.timedelta(seconds=seconds)
+
+    def append(self, device_address, unit, consumption_by_period):
+        """
+        Add periods after the last stored one.
+
+        Parameters:
+            device_address          - MAC address of the device, i.e. '00:11:22:33:44:55'.
+            unit                    - HOUR, DAY or MONTH
+            consumption_by_period   - list of (datetime, consumption_in_watt_hour) tuples in ascending order
+        """
+        if not consumption_by_period:
+            return
+
+        last_period = self.get_last_period(device_address, unit)
+        if not last_period is None and consumption_by_period[0][0] <= last_period:
+            raise Exception("Period " + consumption_by_period[0][0].isoformat() + " is not after the last stored period " + last_period.isoformat())
+
+        data = b''.join(_RECORD.pack(int((period - _EPOCH).total_seconds()), consumption) for period, consumption in consumption_by_period)
+
+        with self._lock:
+            os.makedirs(self.path, exist_ok=True)
+
+            file_path = self._get_file_path(device_address, unit)
+            with open(file_path, 'ab') as f:
+                # drop an incomplete record of an interrupted append
+                f.truncate(os.path.getsize(file_path) // _RECORD.size * _RECORD.size)
+                f.write(data)
+
+    def load(self, device_address, unit, since=None):
+        """
+        Returns a list of (datetime, consumption_in_watt_hour) tuples of a device starting at since or of all stored periods if since is None.
+        """
+        file_path = self._get_file_path(device_address, unit)
+
+        with self._lock:
+            if not os.path.exists(file_path):
+                return []
+
+            with open(file_path, 'rb') as f:
+                data = f.read()
+
+        data = data[:len(data) // _RECORD.size * _RECORD.size]
+
+        consumption_by_period = []
+        for seconds, consumption in _RECORD.iter_unpack(data):
+            period = _EPOCH + datetime.timedelta(seconds=seconds)
+            if since is None or period >= since:
+                consumption_by_period.append((period, consumption))
+
+        return consumption_by_period
+
+
+class HistoryHarvester():
+    """
+    Collects the consumption histories of devices into a ConsumptionHistoryStore without fetching known periods twice.
+
+    Only completed periods are stored. Each harvest requests the 23 hours history only if hours are missing. Missing
+    days and months are summed up from stored hours and days if those cover them completely - the 30 days and 12
+    months histories are only requested for periods that can not be derived. Polling at least every 23 hours
+    therefore needs a single request per harvest.
+
+    The device reports each period in whole watt hours, so a derived day or month is a sum of rounded values and may
+    differ from the total the device reports for it - by up to 1 Wh per summed hour, i.e. up to 24 Wh a day and
+    about 740 Wh a month. Set derive_coarser_periods to False to store the device's own totals instead.
+    """
+
+    def __init__(self, store, derive_coarser_periods=True):
+        """
+        Parameters:
+            store                   - ConsumptionHistoryStore to merge the harvested periods into
+            derive_coarser_periods  - Optional, if set to false missing days and months are always requested from the device. Default: True
+        """
+        self.store = store
+        self.derive_coarser_periods = derive_coarser_periods
+
+    def _get_missing_periods(self, device_address, unit, device_datetime):
+        # completed periods after the last stored one - None if nothing has been stored yet
+        last_period = self.store.get_last_period(device_address, unit)
+        if last_period is None:
+            return None
+
+        first_missing_period = _add(last_period, unit, 1)
+        current_period = _floor(device_datetime, unit)
+
+        return [_add(first_missing_period, unit, i) for i in range(max(0, _get_number_of_periods(first_missing_period, current_period, unit)))]
+
+    def _derive(self, device_address, unit, finer_unit, missing_periods):
+        # sums of the finer periods if all of them are stored - None otherwise
+        consumption_by_finer_period = dict(self.store.load(device_address, finer_unit, since=missing_periods[0]))
+
+        consumption_by_period = []
+        for period in missing_periods:
+            next_period = _add(period, unit, 1)
+            finer_periods = [_add(period, finer_unit, i) for i in range(_get_number_of_periods(period, next_period, finer_unit))]
+
+            if not all(finer_period in consumption_by_finer_period for finer_period in finer_periods):
+                return None
+
+            consumption_by_period.append((period, sum(consumption_by_finer_period[finer_period] for finer_period in finer_periods)))
+
+        return consumption_by_period
+
+    def _to_periods(self, consumption_n_ago_in_watt_hour, unit, device_datetime, last_period):
+        current_period = _floor(device_datetime, unit)
+
+        # entry 0 is the running period
+        consumption_by_period = []
+        for n in range(len(consumption_n_ago_in_watt_hour) - 1, 0, -1):
+            period = _add(current_period, unit, -n)
+            consumption = consumption_n_ago_in_watt_hour[n]
+
+            if not last_period is None and period <= last_period:
+                continue
+
+            if consumption is None:
+                # unknown periods before the history of the device are skipped. Later ones end the periods, so they
+                # are requested again instead of being passed by the last stored period
+                if consumption_by_period or not last_period is None:
+                    break
+
+                continue
+
+            consumption_by_period.append((period, consumption))
+
+        return consumption_by_period
+
+    def _request(self, device, unit):
+        if unit == HOUR:
+            return device.request_consumption_of_last_23_hours().consumption_n_hours_ago_in_watt_hour
+
+        if unit == DAY:
+            return device.request_consumption_of_last_30_days().consumption_n_days_ago_in_watt_hour
+
+        return device.request_consumption_of_last_12_months().consumption_n_months_ago_in_watt_hour
+
+    def harvest(self, device, device_address=None, device_datetime=None):
+        """
+        Merge the periods completed since the last harvest of a device into the store.
+
+        Parameters:
+            device          - connected SEM6000 instance
+            device_address  - Optional, MAC address to store the periods for. Default: the address device is connected to
+            device_datetime - Optional, date and time of the device clock. Default: device.get_device_datetime()
+
+        Returns a dictionary of the number of stored periods by unit.
+        """
+        if device_address is None:
+            device_address = device.connection_settings["device_address"]
+
+        if device_datetime is None:
+            device_datetime = device.get_device_datetime()
+
+        number_of_periods_by_unit = {}
+        finer_unit = None
+
+        for unit in UNITS:
+            missing_periods = self._get_missing_periods(device_address, unit, device_datetime)
+
+            consumption_by_period = None
+            if missing_periods == []:
+                consumption_by_period = []
+            elif self.derive_coarser_periods and not missing_periods is None and not finer_unit is None:
+                consumption_by_period = self._derive(device_address, unit, finer_unit, missing_periods)
+
+            if consumption_by_period is None:
+                last_period = self.store.get_last_period(device_address, unit)
+                consumption_by_period = self._to_periods(self._request(device, unit), unit, device_datetime, last_period)
+
+            self.store.append(device_address, unit, consumption_by_period)
+            number_of_periods_by_unit[unit] = len(consumption_by_period)
+
+            finer_unit = unit
+
+        return number_of_periods_by_unit
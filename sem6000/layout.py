@@ -0,0 +1,32 @@
+import struct
+
+# Precompiled layouts of fixed size message fields.
+#
+# All layouts start right after the two byte opcode of a payload, so they are
+# decoded with unpack_from(payload, PAYLOAD_FIELDS_OFFSET) and encoded with
+# opcode + pack(...). All values are big endian. Three byte values which have
+# no struct format are split into a high byte and a low word.
+
+PAYLOAD_FIELDS_OFFSET = 2
+
+# is_reduced_period, normal_price_in_cent, reduced_period_price_in_cent,
+# reduced_period_start_time_in_minutes, reduced_period_end_time_in_minutes,
+# is_nightmode_inactive, (unknown), power_limit_in_watt
+SETTINGS = struct.Struct('>BBBHHBxH')
+
+# timer_action, target_second, target_minute, target_hour, target_day, target_month, target_year,
+# original_timer_length_in_seconds (high byte), original_timer_length_in_seconds (low word), (unknown)
+TIMER_STATUS = struct.Struct('>BBBBBBBBHx')
+
+# is_power_active, power_in_milliwatt (high byte), power_in_milliwatt (low word), voltage_in_volt,
+# current_in_milliampere, frequency_in_hertz, (unknown), total_consumption_in_kilowatt_hour
+MEASUREMENT = struct.Struct('>BBHBHB2xI')
+
+# is_active, active_on_weekdays_mask, start_hour, start_minute, end_hour, end_minute, (unknown)
+RANDOM_MODE = struct.Struct('>BBBBBB2x')
+
+# is_active, is_action_turn_on, repeat_on_weekdays_mask, year, month, day, hour, minute
+SCHEDULER = struct.Struct('>BBBBBBBB')
+
+# slot_id, scheduler (see SCHEDULER), (unknown), checksum
+SCHEDULER_ENTRY = struct.Struct('>BBBBBBBBB2xB')
@@ -479,3 +479,34 @@ class DeviceSerialRequestedNotification:
         name = self.__class__.__name__
         return name + "(serial=" + str(self.serial) + ")"
 
+
+
+# notification the device answers each command with
+NOTIFICATION_CLASS_BY_COMMAND_CLASS = {
+    AuthorizeCommand: AuthorizedNotification,
+    ChangePinCommand: PinChangedNotification,
+    ResetPinCommand: PinResetNotification,
+    PowerSwitchCommand: PowerSwitchedNotification,
+    ChangeNightmodeCommand: NightmodeChangedNotification,
+    SynchronizeDateAndTimeCommand: DateAndTimeChangedNotification,
+    RequestSettingsCommand: SettingsRequestedNotification,
+    ChangePowerLimitCommand: PowerLimitChangedNotification,
+    ChangePricesCommand: PricesChangedNotification,
+    ChangeReducedPeriodCommand: ReducedPeriodChangedNotification,
+    RequestTimerStatusCommand: TimerStatusRequestedNotification,
+    SetTimerCommand: TimerSetNotification,
+    RequestSchedulerCommand: SchedulerRequestedNotification,
+    AddSchedulerCommand: SchedulerChangedNotification,
+    EditSchedulerCommand: SchedulerChangedNotification,
+    RemoveSchedulerCommand: SchedulerChangedNotification,
+    RequestRandomModeStatusCommand: RandomModeStatusRequestedNotification,
+    ChangeRandomModeCommand: RandomModeChangedNotification,
+    RequestMeasurementCommand: MeasurementRequestedNotification,
+    RequestConsumptionOfLast12MonthsCommand: ConsumptionOfLast12MonthsRequestedNotification,
+    RequestConsumptionOfLast30DaysCommand: ConsumptionOfLast30DaysRequestedNotification,
+    RequestConsumptionOfLast23HoursCommand: ConsumptionOfLast23HoursRequestedNotification,
+    ResetConsumptionCommand: ConsumptionResetNotification,
+    FactoryResetCommand: FactoryResetNotification,
+    ChangeDeviceNameCommand: DeviceNameChangedNotification,
+    RequestDeviceSerialCommand: DeviceSerialRequestedNotification,
+}
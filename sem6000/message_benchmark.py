@@ -0,0 +1,272 @@
+import datetime
+import gc
+import inspect
+import json
+import platform
+import statistics
+import time
+import tracemalloc
+
+from . import message
+from .message import *
+from .encoder import MessageEncoder
+from .parser import MessageParser, CommandParser
+from . import util
+
+
+# message classes which have no frame format - their values are read from GATT characteristics
+NOT_ENCODABLE_CLASSES = {
+    DeviceNameRequestedNotification: "read from the device name characteristic"
+}
+
+
+def get_sample_messages():
+    """
+    Returns a list of one message of each command and notification class with realistic values.
+    """
+    one_time_scheduler = OneTimeScheduler(is_active=True, is_action_turn_on=True, isodatetime='2030-01-01T10:00')
+    repeated_scheduler = RepeatedScheduler(is_active=True, is_action_turn_on=False, repeat_on_weekdays=[util.Weekday.MONDAY, util.Weekday.FRIDAY], isotime='22:30')
+
+    return [
+        AuthorizeCommand(pin='1234'),
+        ChangePinCommand(pin='1234', new_pin='4321'),
+        ResetPinCommand(),
+        PowerSwitchCommand(on=True),
+        ChangeNightmodeCommand(on=True),
+        SynchronizeDateAndTimeCommand(isodatetime='2030-01-01T10:00:00'),
+        RequestSettingsCommand(),
+        ChangePowerLimitCommand(power_limit_in_watt=1000),
+        ChangePricesCommand(normal_price_in_cent=30, reduced_period_price_in_cent=20),
+        ChangeReducedPeriodCommand(is_active=True, start_isotime='22:00', end_isotime='06:00'),
+        RequestTimerStatusCommand(),
+        SetTimerCommand(is_reset_timer=False, is_action_turn_on=True, target_isodatetime='2030-01-01T10:00:00'),
+        RequestSchedulerCommand(page_number=0),
+        AddSchedulerCommand(scheduler=repeated_scheduler),
+        EditSchedulerCommand(slot_id=1, scheduler=one_time_scheduler),
+        RemoveSchedulerCommand(slot_id=1),
+        RequestRandomModeStatusCommand(),
+        ChangeRandomModeCommand(is_active=True, active_on_weekdays=[util.Weekday.SATURDAY, util.Weekday.SUNDAY], start_isotime='18:00', end_isotime='23:00'),
+        RequestMeasurementCommand(),
+        RequestConsumptionOfLast12MonthsCommand(),
+        RequestConsumptionOfLast30DaysCommand(),
+        RequestConsumptionOfLast23HoursCommand(),
+        ResetConsumptionCommand(),
+        FactoryResetCommand(),
+        ChangeDeviceNameCommand(new_name='kitchen'),
+        RequestDeviceSerialCommand(),
+        AuthorizedNotification(was_successful=True),
+        PinChangedNotification(was_successful=True),
+        PinResetNotification(was_successful=True),
+        PowerSwitchedNotification(was_successful=True),
+        NightmodeChangedNotification(was_successful=True),
+        DateAndTimeChangedNotification(was_successful=True),
+        SettingsRequestedNotification(is_reduced_period=True, normal_price_in_cent=30, reduced_period_price_in_cent=20, reduced_period_start_isotime='22:00', reduced_period_end_isotime='06:00', is_nightmode_active=False, power_limit_in_watt=1000),
+        PowerLimitChangedNotification(was_successful=True),
+        PricesChangedNotification(was_successful=True),
+        ReducedPeriodChangedNotification(was_successful=True),
+        TimerStatusRequestedNotification(is_active=True, is_action_turn_on=True, target_isodatetime='2030-01-01T10:00:00', original_timer_length_in_seconds=3600),
+        TimerSetNotification(was_successful=True),
+        SchedulerRequestedNotification(number_of_schedulers=4, scheduler_entries=[SchedulerEntry(slot_id=i, scheduler=one_time_scheduler if i % 2 else repeated_scheduler) for i in range(4)]),
+        SchedulerChangedNotification(was_successful=True),
+        RandomModeStatusRequestedNotification(is_active=True, active_on_weekdays=[util.Weekday.SATURDAY, util.Weekday.SUNDAY], start_isotime='18:00', end_isotime='23:00'),
+        RandomModeChangedNotification(was_successful=True),
+        MeasurementRequestedNotification(is_power_active=True, power_in_milliwatt=60000, voltage_in_volt=230, current_in_milliampere=260, frequency_in_hertz=50, total_consumption_in_kilowatt_hour=12),
+        ConsumptionOfLast12MonthsRequestedNotification(consumption_n_months_ago_in_watt_hour=[None] + list(range(1000, 13000, 1000))),
+        ConsumptionOfLast30DaysRequestedNotification(consumption_n_days_ago_in_watt_hour=[None] + list(range(100, 3100, 100))),
+        ConsumptionOfLast23HoursRequestedNotification(consumption_n_hours_ago_in_watt_hour=list(range(10, 250, 10))),
+        ConsumptionResetNotification(was_successful=True),
+        FactoryResetNotification(was_successful=True),
+        DeviceNameChangedNotification(was_successful=True),
+        DeviceSerialRequestedNotification(serial='ML01D10012000000')
+    ]
+
+
+def get_message_classes():
+    """
+    Returns a list of all command and notification classes of sem6000.message.
+    """
+    return [cls for name, cls in vars(message).items() if inspect.isclass(cls) and cls.__module__ == message.__name__ and not name.startswith('Abstract') and (name.endswith('Command') or name.endswith('Notification'))]
+
+
+def _get_parser(message_object):
+    if type(message_object).__name__.endswith('Command'):
+        return CommandParser()
+
+    return MessageParser()
+
+
+def _measure_time_per_call(function, number, repeat):
+    # the fastest repetition is the least disturbed one
+    best_time = None
+    for i in range(repeat):
+        start_time = time.perf_counter_ns()
+        for j in range(number):
+            function()
+        elapsed_time = time.perf_counter_ns() - start_time
+
+        if best_time is None or elapsed_time < best_time:
+            best_time = elapsed_time
+
+    return best_time / number
+
+
+def _measure_allocations_per_call(function, number):
+    # tracemalloc slows down the calls - allocations are measured separately from the time
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start()
+
+    try:
+        function()
+        gc.collect()
+
+        # peak of a single call including temporary objects
+        memory_before, peak = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        result = function()
+        memory_after, peak = tracemalloc.get_traced_memory()
+        peak_bytes = peak - memory_before
+        del result
+
+        results = []
+        snapshot_before = tracemalloc.take_snapshot()
+
+        for i in range(number):
+            results.append(function())
+
+        snapshot_after = tracemalloc.take_snapshot()
+    finally:
+        if not was_tracing:
+            tracemalloc.stop()
+
+    # blocks still referenced by the results - the results list itself is not counted
+    differences = snapshot_after.filter_traces([tracemalloc.Filter(False, __file__)]).compare_to(snapshot_before.filter_traces([tracemalloc.Filter(False, __file__)]), 'filename')
+    retained_blocks = sum(difference.count_diff for difference in differences)
+
+    return {
+        "retained_blocks": retained_blocks / number,
+        "peak_bytes": peak_bytes
+    }
+
+
+def measure(message_object, number=1000, repeat=5):
+    """
+    Measure encoding and parsing of a message.
+
+    Parameters:
+        message_object  - command or notification to encode and parse
+        number          - Optional, calls per repetition. Default: 1000
+        repeat          - Optional, number of repetitions - the fastest one is taken. Default: 5
+
+    Returns a dictionary of the length of the encoded frame, the nanoseconds per encode and parse, and the allocations per encode and parse.
+    """
+    encoder = MessageEncoder()
+    parser = _get_parser(message_object)
+
+    encoded_message = encoder.encode(message_object)
+    if type(parser.parse(encoded_message)) != type(message_object):
+        raise Exception("Parsing the encoded " + type(message_object).__name__ + " returned another class")
+
+    encode = lambda: encoder.encode(message_object)
+    parse = lambda: parser.parse(encoded_message)
+
+    encode_allocations = _measure_allocations_per_call(encode, number)
+    parse_allocations = _measure_allocations_per_call(parse, number)
+
+    return {
+        "frame_length": len(encoded_message),
+        "encode_ns": _measure_time_per_call(encode, number, repeat),
+        "parse_ns": _measure_time_per_call(parse, number, repeat),
+        "encode_retained_blocks": encode_allocations["retained_blocks"],
+        "encode_peak_bytes": encode_allocations["peak_bytes"],
+        "parse_retained_blocks": parse_allocations["retained_blocks"],
+        "parse_peak_bytes": parse_allocations["peak_bytes"]
+    }
+
+
+def run(number=1000, repeat=5):
+    """
+    Measure all sample messages.
+
+    Returns a record for a benchmark history: a dictionary of the date, the python version and the results by message class name.
+    """
+    results = {}
+    for message_object in get_sample_messages():
+        results[type(message_object).__name__] = measure(message_object, number, repeat)
+
+    return {
+        "datetime": datetime.datetime.now().isoformat(timespec='seconds'),
+        "python": platform.python_implementation() + " " + platform.python_version(),
+        "number": number,
+        "results": results
+    }
+
+
+def load_history(path):
+    """
+    Returns the records of a JSON lines history file - an empty list if it does not exist.
+    """
+    records = []
+
+    try:
+        with open(path) as f:
+            for line in f:
+                if line.strip():
+                    records.append(json.loads(line))
+    except FileNotFoundError:
+        pass
+
+    return records
+
+
+def append_to_history(path, record):
+    with open(path, 'a') as f:
+        f.write(json.dumps(record, sort_keys=True) + '\n')
+
+
+def get_baseline(records, length=5):
+    """
+    Combine the last records of a history into one record of the medians of each metric - a single disturbed run does not shift the baseline then.
+
+    Returns a record or None if records is empty.
+    """
+    records = records[-length:]
+    if not records:
+        return None
+
+    results = {}
+    for name in records[-1]["results"]:
+        results_of_name = [record["results"][name] for record in records if name in record["results"]]
+        results[name] = {metric: statistics.median(result[metric] for result in results_of_name) for metric in results_of_name[-1]}
+
+    return {"results": results}
+
+
+def find_regressions(baseline, record, time_tolerance=0.2, allocation_tolerance=0):
+    """
+    Compare two history records.
+
+    Parameters:
+        baseline                - earlier record of run() or of get_baseline()
+        record                  - current record of run()
+        time_tolerance          - Optional, relative slowdown which is not reported. Default: 0.2
+        allocation_tolerance    - Optional, additional retained blocks per call which are not reported. Default: 0
+
+    Returns a list of (message class name, metric, baseline value, current value) tuples.
+    """
+    regressions = []
+
+    for name, result in sorted(record["results"].items()):
+        baseline_result = baseline["results"].get(name)
+        if baseline_result is None:
+            continue
+
+        for metric in ["encode_ns", "parse_ns"]:
+            if result[metric] > baseline_result[metric] * (1 + time_tolerance):
+                regressions.append((name, metric, baseline_result[metric], result[metric]))
+
+        for metric in ["encode_retained_blocks", "parse_retained_blocks"]:
+            if result[metric] > baseline_result[metric] + allocation_tolerance:
+                regressions.append((name, metric, baseline_result[metric], result[metric]))
+
+    return regressions
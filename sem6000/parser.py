@@ -1,7 +1,9 @@
 from .message import *
+from . import layout
 from . import util
 
 import datetime
+import struct
 import sys
 
 class InvalidPayloadLengthException(Exception):
@@ -13,7 +15,96 @@ class InvalidPayloadLengthException(Exception):
     def __str__(self):
         return "message has invalid payload length for " + self.message_class.__name__ +  " (expected: " + str(self.expected_payload_length) + ", actual=" + str(self.actual_payload_length) + ")"
 
+_CONSUMPTION = struct.Struct('>H')
+_CONSUMPTION_WITH_PADDING = struct.Struct('>I')
+
+class FrameDecoder:
+    """
+    Resumable decoder which splits a stream of notification fragments into frames.
+
+    A frame starts with b'\x0f' followed by the length byte, the payload and the checksum. Bytes before
+    a start byte - i.e. the optional suffix b'\xff\xff' of the previous frame - are skipped. Each frame is
+    passed as memoryview to the frame handler as soon as its last byte has been fed. The view is only
+    valid while the handler is running.
+    """
+
+    # largest possible frame: start byte, length byte, 255 bytes of payload and checksum
+    INITIAL_BUFFER_SIZE = 2 + 255
+
+    def __init__(self, frame_handler, invalid_frame_handler=None):
+        """
+        Parameters:
+            frame_handler           - callable being called with a memoryview of each complete frame having a valid checksum
+            invalid_frame_handler   - Optional, callable being called with a memoryview of each complete frame having an invalid checksum
+        """
+        self._frame_handler = frame_handler
+        self._invalid_frame_handler = invalid_frame_handler
+
+        self._buffer = bytearray(FrameDecoder.INITIAL_BUFFER_SIZE)
+        self._length = 0
+
+    def reset(self):
+        """Discards all buffered data."""
+        self._length = 0
+
+    def has_partial_frame(self):
+        """Returns True if data of an incomplete frame is buffered."""
+        return self._length > 0
+
+    def feed(self, data):
+        """
+        Appends a fragment and emits all frames being complete afterwards.
+
+        Parameters:
+            data    - bytes-like fragment as received
+        """
+        end = self._length + len(data)
+        if end > len(self._buffer):
+            # a bytearray can not be resized while a view on it is alive, i.e. one kept by a frame handler
+            buffer = bytearray(end)
+            buffer[0:self._length] = self._buffer[0:self._length]
+            self._buffer = buffer
+
+        self._buffer[self._length:end] = data
+        self._length = end
+
+        buffer = self._buffer
+        offset = 0
+
+        while True:
+            # skip suffix bytes and garbage until the next start byte
+            while offset < self._length and buffer[offset] != 0x0f:
+                offset += 1
+
+            if self._length - offset < 2:
+                break
+
+            frame_length = 2 + buffer[offset+1]
+            if self._length - offset < frame_length:
+                break
+
+            with memoryview(buffer) as view, view[offset:offset+frame_length] as frame:
+                checksum = (1 + sum(frame[2:frame_length-1])) & 0xff
+
+                if frame_length > 2 and frame[frame_length-1] == checksum:
+                    offset += frame_length
+                    self._frame_handler(frame)
+                else:
+                    # not a frame - resynchronize at the next start byte
+                    offset += 1
+                    if not self._invalid_frame_handler is None:
+                        self._invalid_frame_handler(frame)
+
+        if offset:
+            buffer[0:self._length-offset] = buffer[offset:self._length]
+            self._length -= offset
+
+
 class MessageParser:
+    # maps the two byte opcode of a payload (as integer) to its decoder or - for
+    # opcodes shared by several messages - to a tuple (sub_opcode_index, {sub_opcode: decoder})
+    _decoder_by_opcode = {}
+
     def __init__(self, year_diff=None):
         # the device only operates with two digit years
         # determine or set the difference to the current 4 digit year
@@ -23,7 +114,7 @@ class MessageParser:
             self.year_diff = year_diff
 
     def _parse_payload(self, data):
-        if data[0:1] != b'\x0f':
+        if len(data) < 3 or data[0] != 0x0f:
             raise Exception("Invalid response")
 
         length_of_payload = data[1]
@@ -40,296 +131,486 @@ class MessageParser:
             # if suffix exists it must be b'\xff\xff'
             suffix = data[2+length_of_payload:]
             if suffix != b'\xff\xff':
-                raise Exception("Invalid suffix " + str(suffix))
+                raise Exception("Invalid suffix " + str(bytes(suffix)))
 
         return payload
 
-    def _parse_scheduler(self, data):
-        is_active = False
-        if data[0:1] == b'\x01':
-            is_active = True
-
-        is_action_turn_on = False
-        if data[1:2] == b'\x01':
-            is_action_turn_on = True
-
-        repeat_on_weekdays_mask = int.from_bytes(data[2:3], 'big')
+    def _parse_scheduler(self, is_active, is_action_turn_on, repeat_on_weekdays_mask, year, month, day, hour, minute):
         repeat_on_weekdays = []
         for w in range(7):
             if repeat_on_weekdays_mask & 2**w:
                 repeat_on_weekdays.append(w)
 
         # only the last two digits are returned for the year
-        year = int.from_bytes(data[3:4], 'big') + self.year_diff
-        month = int.from_bytes(data[4:5], 'big')
-        day  = int.from_bytes(data[5:6], 'big')
-        hour = int.from_bytes(data[6:7], 'big')
-        minute = int.from_bytes(data[7:8], 'big')
+        year += self.year_diff
 
         d = datetime.datetime(year, month, day, hour, minute)
 
         if len(repeat_on_weekdays):
             return RepeatedScheduler(
-                is_active=is_active, 
-                is_action_turn_on=is_action_turn_on, 
+                is_active=(is_active == 0x01), 
+                is_action_turn_on=(is_action_turn_on == 0x01), 
                 repeat_on_weekdays=repeat_on_weekdays, 
                 isotime=d.time().isoformat(timespec='minutes'))
         else:
             return OneTimeScheduler(
-                is_active=is_active, 
-                is_action_turn_on=is_action_turn_on, 
+                is_active=(is_active == 0x01), 
+                is_action_turn_on=(is_action_turn_on == 0x01), 
                 isodatetime=d.isoformat(timespec='minutes'))
 
-    def parse(self, data):
-        payload = self._parse_payload(data)
+    def _parse_consumptions(self, payload, consumption_struct, shift=0):
+        number_of_values = (len(payload)-2) // consumption_struct.size
+        values = payload[2:2 + number_of_values*consumption_struct.size]
 
-        if payload[0:2] == b'\x17\x00' and payload[3:4] == b'\x00':
-            if len(payload) != 5:
-                raise InvalidPayloadLengthException(message_class=AuthenticationNotification.__class__, expected_payload_length=5, actual_payload_length=len(payload))
+        consumptions = [value >> shift for value, in consumption_struct.iter_unpack(values)]
 
-            was_successful = False
-            if payload[2:3] == b'\x00':
-                was_successful = True
+        # values are sent oldest first - return the most recent value first
+        consumptions.reverse()
 
-            return AuthorizedNotification(was_successful=was_successful)
+        return consumptions
 
-        if payload[0:2] == b'\x17\x00' and payload[3:4] == b'\x01':
-            if len(payload) != 5:
-                raise InvalidPayloadLengthException(message_class=PinChangedNotification.__class__, expected_payload_length=5, actual_payload_length=len(payload))
+    def _decode_authorized(self, payload):
+        if len(payload) != 5:
+            raise InvalidPayloadLengthException(message_class=AuthorizedNotification, expected_payload_length=5, actual_payload_length=len(payload))
 
-            was_successful = False
-            if payload[2:3] == b'\x00':
-                was_successful = True
-            
-            return PinChangedNotification(was_successful=was_successful)
+        was_successful = False
+        if payload[2] == 0x00:
+            was_successful = True
 
-        if payload[0:2] == b'\x17\x00' and payload[3:4] == b'\x02':
-            if len(payload) != 5:
-                raise InvalidPayloadLengthException(message_class=PinResetNotification.__class__, expected_payload_length=5, actual_payload_length=len(payload))
+        return AuthorizedNotification(was_successful=was_successful)
 
-            was_successful = False
-            if payload[2:3] == b'\x00':
-                was_successful = True
+    def _decode_pin_changed(self, payload):
+        if len(payload) != 5:
+            raise InvalidPayloadLengthException(message_class=PinChangedNotification, expected_payload_length=5, actual_payload_length=len(payload))
 
-            return PinResetNotification(was_successful=was_successful)
+        was_successful = False
+        if payload[2] == 0x00:
+            was_successful = True
 
-        if payload[0:2] == b'\x03\x00':
-            if len(payload) != 3:
-                raise InvalidPayloadLengthException(message_class=PowerSwitchedNotification.__class__, expected_payload_length=3, actual_payload_length=len(payload))
+        return PinChangedNotification(was_successful=was_successful)
 
-            was_successful = False
-            if payload[2:3] == b'\x00':
-                was_successful = True
+    def _decode_pin_reset(self, payload):
+        if len(payload) != 5:
+            raise InvalidPayloadLengthException(message_class=PinResetNotification, expected_payload_length=5, actual_payload_length=len(payload))
 
-            return PowerSwitchedNotification(was_successful=was_successful)
+        was_successful = False
+        if payload[2] == 0x00:
+            was_successful = True
 
-        if payload[0:3] == b'\x0f\x00\x05':
-            if len(payload) != 4:
-                raise InvalidPayloadLengthException(message_class=NightmodeChangedNotification.__class__, expected_payload_length=4, actual_payload_length=len(payload))
+        return PinResetNotification(was_successful=was_successful)
 
-            return NightmodeChangedNotification(was_successful=True)
+    def _decode_power_switched(self, payload):
+        if len(payload) != 3:
+            raise InvalidPayloadLengthException(message_class=PowerSwitchedNotification, expected_payload_length=3, actual_payload_length=len(payload))
 
-        if payload[0:2] == b'\x01\x00':
-            if len(payload) != 3:
-                raise InvalidPayloadLengthException(message_class=DateAndTimeChangedNotification.__class__, expected_payload_length=3, actual_payload_length=len(payload))
+        was_successful = False
+        if payload[2] == 0x00:
+            was_successful = True
 
-            was_successful = False
-            if payload[2:3] == b'\x00':
-                was_successful = True
+        return PowerSwitchedNotification(was_successful=was_successful)
 
-            return DateAndTimeChangedNotification(was_successful=was_successful)
+    def _decode_nightmode_changed(self, payload):
+        if len(payload) != 4:
+            raise InvalidPayloadLengthException(message_class=NightmodeChangedNotification, expected_payload_length=4, actual_payload_length=len(payload))
 
-        if payload[0:2] == b'\x10\x00':
-            if len(payload) != 13:
-                raise InvalidPayloadLengthException(message_class=SettingsRequestedNotification.__class__, expected_payload_length=13, actual_payload_length=len(payload))
+        return NightmodeChangedNotification(was_successful=True)
 
-            is_reduced_period = False
-            if payload[2:3] == b'\x01':
-                is_reduced_period = True
+    def _decode_date_and_time_changed(self, payload):
+        if len(payload) != 3:
+            raise InvalidPayloadLengthException(message_class=DateAndTimeChangedNotification, expected_payload_length=3, actual_payload_length=len(payload))
 
-            normal_price_in_cent = int.from_bytes(payload[3:4], 'big')
-            reduced_period_price_in_cent = int.from_bytes(payload[4:5], 'big')
+        was_successful = False
+        if payload[2] == 0x00:
+            was_successful = True
 
-            reduced_period_start_time_in_minutes = int.from_bytes(payload[5:7], 'big')
-            reduced_period_end_time_in_minutes = int.from_bytes(payload[7:9], 'big')
+        return DateAndTimeChangedNotification(was_successful=was_successful)
 
-            reduced_period_start_time = util._parse_time_from_minutes(reduced_period_start_time_in_minutes)
-            reduced_period_end_time = util._parse_time_from_minutes(reduced_period_end_time_in_minutes)
+    def _decode_settings_requested(self, payload):
+        if len(payload) != 13:
+            raise InvalidPayloadLengthException(message_class=SettingsRequestedNotification, expected_payload_length=13, actual_payload_length=len(payload))
 
-            is_nightmode_active = True
-            if payload[9:10] == b'\x01':
-                is_nightmode_active = False
+        is_reduced_period, normal_price_in_cent, reduced_period_price_in_cent, reduced_period_start_time_in_minutes, reduced_period_end_time_in_minutes, is_nightmode_inactive, power_limit_in_watt = layout.SETTINGS.unpack_from(payload, layout.PAYLOAD_FIELDS_OFFSET)
 
-            power_limit_in_watt = int.from_bytes(payload[11:13], 'big')
+        reduced_period_start_time = util._parse_time_from_minutes(reduced_period_start_time_in_minutes)
+        reduced_period_end_time = util._parse_time_from_minutes(reduced_period_end_time_in_minutes)
 
-            return SettingsRequestedNotification(is_reduced_period=is_reduced_period, normal_price_in_cent=normal_price_in_cent, reduced_period_price_in_cent=reduced_period_price_in_cent, reduced_period_start_isotime=reduced_period_start_time.isoformat(timespec='minutes'), reduced_period_end_isotime=reduced_period_end_time.isoformat('minutes'), is_nightmode_active=is_nightmode_active, power_limit_in_watt=power_limit_in_watt)
+        return SettingsRequestedNotification(is_reduced_period=(is_reduced_period == 0x01), normal_price_in_cent=normal_price_in_cent, reduced_period_price_in_cent=reduced_period_price_in_cent, reduced_period_start_isotime=reduced_period_start_time.isoformat(timespec='minutes'), reduced_period_end_isotime=reduced_period_end_time.isoformat('minutes'), is_nightmode_active=(is_nightmode_inactive != 0x01), power_limit_in_watt=power_limit_in_watt)
 
-        if payload[0:3] == b'\x05\x00\x00' and len(payload) == 3:
-            return PowerLimitChangedNotification(was_successful=True)
+    def _decode_power_limit_changed(self, payload):
+        if payload[2] != 0x00 or len(payload) != 3:
+            raise Exception('Unsupported message')
 
-        if payload[0:3] == b'\x0f\x00\x04':
-            if len(payload) != 4:
-                raise InvalidPayloadLengthException(message_class=PricesChangedNotification.__class__, expected_payload_length=4, actual_payload_length=len(payload))
+        return PowerLimitChangedNotification(was_successful=True)
 
-            return PricesChangedNotification(was_successful=True)
+    def _decode_prices_changed(self, payload):
+        if len(payload) != 4:
+            raise InvalidPayloadLengthException(message_class=PricesChangedNotification, expected_payload_length=4, actual_payload_length=len(payload))
 
-        if payload[0:3] == b'\x0f\x00\x01':
-            if len(payload) != 4:
-                raise InvalidPayloadLengthException(message_class=ReducedPeriodChangedNotification.__class__, expected_payload_length=4, actual_payload_length=len(payload))
+        return PricesChangedNotification(was_successful=True)
 
-            return ReducedPeriodChangedNotification(was_successful=True)
+    def _decode_reduced_period_changed(self, payload):
+        if len(payload) != 4:
+            raise InvalidPayloadLengthException(message_class=ReducedPeriodChangedNotification, expected_payload_length=4, actual_payload_length=len(payload))
 
-        if payload[0:2] == b'\x09\x00':
-            if len(payload) != 13:
-                raise InvalidPayloadLengthException(message_class=TimerStatusRequestedNotification.__class__, expected_payload_length=13, actual_payload_length=len(payload))
+        return ReducedPeriodChangedNotification(was_successful=True)
 
-            is_active = False 
-            is_action_turn_on = False
+    def _decode_timer_status_requested(self, payload):
+        if len(payload) != 13:
+            raise InvalidPayloadLengthException(message_class=TimerStatusRequestedNotification, expected_payload_length=13, actual_payload_length=len(payload))
 
-            if payload[2:3] == b'\x01':
-                is_active = True
-                is_action_turn_on = True
-            if payload[2:3] == b'\x02':
-                is_active = True
+        timer_action, target_second, target_minute, target_hour, target_day, target_month, target_year, original_timer_length_high, original_timer_length_low = layout.TIMER_STATUS.unpack_from(payload, layout.PAYLOAD_FIELDS_OFFSET)
 
-            target_second = payload[3]
-            target_minute = payload[4]
-            target_hour = payload[5]
-            target_day = payload[6]
-            target_month = payload[7]
-            # only the last two digits are returned for the year
-            target_year = payload[8] + self.year_diff
+        is_active = False 
+        is_action_turn_on = False
 
-            original_timer_length_in_seconds = int.from_bytes(payload[9:12], 'big')
+        if timer_action == 0x01:
+            is_active = True
+            is_action_turn_on = True
+        if timer_action == 0x02:
+            is_active = True
 
-            if target_year and target_month and target_day:
-                d = datetime.datetime(target_year, target_month, target_day, target_hour, target_minute, target_second)
-            else:
-                d = datetime.datetime(1970, 1, 1, target_hour, target_minute, target_second)
+        # only the last two digits are returned for the year
+        target_year += self.year_diff
+
+        original_timer_length_in_seconds = original_timer_length_high << 16 | original_timer_length_low
 
-            return TimerStatusRequestedNotification(is_active=is_active, is_action_turn_on=is_action_turn_on, target_isodatetime=d.isoformat(timespec='seconds'), original_timer_length_in_seconds=original_timer_length_in_seconds)
+        if target_year and target_month and target_day:
+            d = datetime.datetime(target_year, target_month, target_day, target_hour, target_minute, target_second)
+        else:
+            d = datetime.datetime(1970, 1, 1, target_hour, target_minute, target_second)
 
-        if payload[0:2] == b'\x08\x00':
-            if len(payload) != 3:
-                raise InvalidPayloadLengthException(message_class=TimerSetNotification, expected_payload_length=3, actual_payload_length=len(payload))
+        return TimerStatusRequestedNotification(is_active=is_active, is_action_turn_on=is_action_turn_on, target_isodatetime=d.isoformat(timespec='seconds'), original_timer_length_in_seconds=original_timer_length_in_seconds)
 
-            return TimerSetNotification(was_successful=True)
+    def _decode_timer_set(self, payload):
+        if len(payload) != 3:
+            raise InvalidPayloadLengthException(message_class=TimerSetNotification, expected_payload_length=3, actual_payload_length=len(payload))
 
-        if payload[0:2] == b'\x14\x00':
-            if len(payload) < 3:
-                raise InvalidPayloadLengthException(message_class=SchedulerRequestedNotification, expected_payload_length=3, actual_payload_length=len(payload))
-            if (len(payload)-3) % 12 != 0:
-                expected = len(payload) + 12 - (len(payload)-3) % 12
-                raise InvalidPayloadLengthException(message_class=SchedulerRequestedNotification, expected_payload_length=expected, actual_payload_length=len(payload))
+        return TimerSetNotification(was_successful=True)
 
-            number_of_schedulers = int.from_bytes(payload[2:3], 'big')
-            number_of_schedulers_in_message = (len(payload)-3)//12
+    def _decode_scheduler_requested(self, payload):
+        if len(payload) < 3:
+            raise InvalidPayloadLengthException(message_class=SchedulerRequestedNotification, expected_payload_length=3, actual_payload_length=len(payload))
+        if (len(payload)-3) % layout.SCHEDULER_ENTRY.size != 0:
+            expected = len(payload) + layout.SCHEDULER_ENTRY.size - (len(payload)-3) % layout.SCHEDULER_ENTRY.size
+            raise InvalidPayloadLengthException(message_class=SchedulerRequestedNotification, expected_payload_length=expected, actual_payload_length=len(payload))
 
-            scheduler_entries = []
-            for i in range(number_of_schedulers_in_message):
-                slot_id = int.from_bytes(payload[3 + i*12:4 + i*12], 'big')
+        number_of_schedulers = payload[2]
 
-                checksum_received = int.from_bytes(payload[14 + i*12:15 + i*12], 'big')
-                checksum = (sum(payload[4 + i*12:14 + i*12])+0x14) & 0xff
+        scheduler_entries = []
+        for offset in range(3, len(payload), layout.SCHEDULER_ENTRY.size):
+            slot_id, *scheduler_fields, checksum_received = layout.SCHEDULER_ENTRY.unpack_from(payload, offset)
 
-                if checksum_received != checksum:
-                    # TODO: how to calculate the correct checksum?
-                    print("Invalid checksum for scheduler " + str(slot_id) + ": actual=" + str(checksum) + ", received=" + str(checksum_received), file=sys.stderr)
-                    # raise Exception("Invalid checksum for scheduler " + str(slot_id) + ": actual=" + str(checksum) + ", received=" + str(checksum_received))
+            checksum = (sum(payload[offset+1:offset+layout.SCHEDULER_ENTRY.size-1])+0x14) & 0xff
 
-                scheduler = self._parse_scheduler(payload[4 + i*12:12 + i*12])
+            if checksum_received != checksum:
+                # TODO: how to calculate the correct checksum?
+                print("Invalid checksum for scheduler " + str(slot_id) + ": actual=" + str(checksum) + ", received=" + str(checksum_received), file=sys.stderr)
+                # raise Exception("Invalid checksum for scheduler " + str(slot_id) + ": actual=" + str(checksum) + ", received=" + str(checksum_received))
 
-                scheduler_entries.append(SchedulerEntry(slot_id=slot_id, scheduler=scheduler))
+            scheduler = self._parse_scheduler(*scheduler_fields)
 
-            return SchedulerRequestedNotification(number_of_schedulers=number_of_schedulers, scheduler_entries=scheduler_entries)
+            scheduler_entries.append(SchedulerEntry(slot_id=slot_id, scheduler=scheduler))
 
-        if payload[0:2] == b'\x13\x00':
-            was_successful = False
-            if payload[2:3] == b'\x00':
-                was_successful = True
+        return SchedulerRequestedNotification(number_of_schedulers=number_of_schedulers, scheduler_entries=scheduler_entries)
 
-            return SchedulerChangedNotification(was_successful=was_successful)
+    def _decode_scheduler_changed(self, payload):
+        was_successful = False
+        if payload[2] == 0x00:
+            was_successful = True
 
-        if payload[0:2] == b'\x16\x00':
-            is_active = False
-            if payload[2:3] == b'\x01':
-                is_active = True
+        return SchedulerChangedNotification(was_successful=was_successful)
 
-            active_on_weekdays_mask = int.from_bytes(payload[3:4], 'big')
-            active_on_weekdays = []
-            for w in range(7):
-                if active_on_weekdays_mask & 2**w:
-                    active_on_weekdays.append(w)
+    def _decode_random_mode_status_requested(self, payload):
+        if len(payload) < layout.PAYLOAD_FIELDS_OFFSET + layout.RANDOM_MODE.size:
+            raise InvalidPayloadLengthException(message_class=RandomModeStatusRequestedNotification, expected_payload_length=layout.PAYLOAD_FIELDS_OFFSET + layout.RANDOM_MODE.size, actual_payload_length=len(payload))
 
-            start_hour = int.from_bytes(payload[4:5], 'big')
-            start_minute = int.from_bytes(payload[5:6], 'big')
-            end_hour = int.from_bytes(payload[6:7], 'big')
-            end_minute = int.from_bytes(payload[7:8], 'big')
+        is_active, active_on_weekdays_mask, start_hour, start_minute, end_hour, end_minute = layout.RANDOM_MODE.unpack_from(payload, layout.PAYLOAD_FIELDS_OFFSET)
 
-            start_time = datetime.time(start_hour, start_minute)
-            end_time = datetime.time(end_hour, end_minute)
+        active_on_weekdays = []
+        for w in range(7):
+            if active_on_weekdays_mask & 2**w:
+                active_on_weekdays.append(w)
 
-            return RandomModeStatusRequestedNotification(is_active=is_active, active_on_weekdays=active_on_weekdays, start_isotime=start_time.isoformat(timespec='minutes'), end_isotime=end_time.isoformat(timespec='minutes'))
+        start_time = datetime.time(start_hour, start_minute)
+        end_time = datetime.time(end_hour, end_minute)
 
-        if payload[0:2] == b'\x15\x00':
-            was_successful = False
-            if payload[2:3] == b'\x00':
-                was_successful = True
+        return RandomModeStatusRequestedNotification(is_active=(is_active == 0x01), active_on_weekdays=active_on_weekdays, start_isotime=start_time.isoformat(timespec='minutes'), end_isotime=end_time.isoformat(timespec='minutes'))
 
-            return RandomModeChangedNotification(was_successful=was_successful)
+    def _decode_random_mode_changed(self, payload):
+        was_successful = False
+        if payload[2] == 0x00:
+            was_successful = True
 
-        if payload[0:2] == b'\x04\x00':
-            is_power_active = False
-            if payload[2:3] == b'\x01':
-                is_power_active = True
+        return RandomModeChangedNotification(was_successful=was_successful)
 
-            power_in_milliwatt = int.from_bytes(payload[3:6], 'big')
-            voltage_in_volt = int.from_bytes(payload[6:7], 'big')
-            current_in_milliampere = int.from_bytes(payload[7:9], 'big')
-            frequency_in_hertz = int.from_bytes(payload[9:10], 'big')
-            total_consumption_in_kilowatt_hour = int.from_bytes(payload[12:16], 'big')
+    def _decode_measurement_requested(self, payload):
+        if len(payload) < layout.PAYLOAD_FIELDS_OFFSET + layout.MEASUREMENT.size:
+            raise InvalidPayloadLengthException(message_class=MeasurementRequestedNotification, expected_payload_length=layout.PAYLOAD_FIELDS_OFFSET + layout.MEASUREMENT.size, actual_payload_length=len(payload))
 
-            return MeasurementRequestedNotification(is_power_active=is_power_active, power_in_milliwatt=power_in_milliwatt, voltage_in_volt=voltage_in_volt, current_in_milliampere=current_in_milliampere, frequency_in_hertz=frequency_in_hertz, total_consumption_in_kilowatt_hour=total_consumption_in_kilowatt_hour)
+        is_power_active, power_in_milliwatt_high, power_in_milliwatt_low, voltage_in_volt, current_in_milliampere, frequency_in_hertz, total_consumption_in_kilowatt_hour = layout.MEASUREMENT.unpack_from(payload, layout.PAYLOAD_FIELDS_OFFSET)
 
-        if payload[0:2] == b'\x0c\x00':
-            consumptions = []
-            for i in range((len(payload)-2) // 4):
-                consumptions.insert(0, int.from_bytes(payload[2 + 4*i:2 + 4*i + 3], 'big'))
+        power_in_milliwatt = power_in_milliwatt_high << 16 | power_in_milliwatt_low
 
-            # notification does not contain measurement for current month
-            consumptions.insert(0, None)
+        return MeasurementRequestedNotification(is_power_active=(is_power_active == 0x01), power_in_milliwatt=power_in_milliwatt, voltage_in_volt=voltage_in_volt, current_in_milliampere=current_in_milliampere, frequency_in_hertz=frequency_in_hertz, total_consumption_in_kilowatt_hour=total_consumption_in_kilowatt_hour)
 
-            return ConsumptionOfLast12MonthsRequestedNotification(consumption_n_months_ago_in_watt_hour=consumptions)
+    def _decode_consumption_of_last_12_months_requested(self, payload):
+        # each value has 3 bytes followed by an unused byte
+        consumptions = self._parse_consumptions(payload, _CONSUMPTION_WITH_PADDING, shift=8)
 
-        if payload[0:2] == b'\x0b\x00':
-            consumptions = []
-            for i in range((len(payload)-2) // 4):
-                consumptions.insert(0, int.from_bytes(payload[2 + 4*i:2 + 4*i + 3], 'big'))
+        # notification does not contain measurement for current month
+        consumptions.insert(0, None)
 
-            # notification does not contain measurement for today
-            consumptions.insert(0, None)
+        return ConsumptionOfLast12MonthsRequestedNotification(consumption_n_months_ago_in_watt_hour=consumptions)
 
-            return ConsumptionOfLast30DaysRequestedNotification(consumption_n_days_ago_in_watt_hour=consumptions)
+    def _decode_consumption_of_last_30_days_requested(self, payload):
+        # each value has 3 bytes followed by an unused byte
+        consumptions = self._parse_consumptions(payload, _CONSUMPTION_WITH_PADDING, shift=8)
 
-        if payload[0:2] == b'\x0a\x00':
-            consumptions = []
-            for i in range((len(payload)-2) // 2):
-                consumptions.insert(0, int.from_bytes(payload[2 + 2*i:2 + 2*(i+1)], 'big'))
+        # notification does not contain measurement for today
+        consumptions.insert(0, None)
 
-            return ConsumptionOfLast23HoursRequestedNotification(consumption_n_hours_ago_in_watt_hour=consumptions)
+        return ConsumptionOfLast30DaysRequestedNotification(consumption_n_days_ago_in_watt_hour=consumptions)
 
-        if payload[0:3] == b'\x0f\x00\x02':
-            return ConsumptionResetNotification(was_successful=True)
+    def _decode_consumption_of_last_23_hours_requested(self, payload):
+        consumptions = self._parse_consumptions(payload, _CONSUMPTION)
 
-        if payload[0:3] == b'\x0f\x00\x00':
-            return FactoryResetNotification(was_successful=True)
+        return ConsumptionOfLast23HoursRequestedNotification(consumption_n_hours_ago_in_watt_hour=consumptions)
+
+    def _decode_consumption_reset(self, payload):
+        return ConsumptionResetNotification(was_successful=True)
+
+    def _decode_factory_reset(self, payload):
+        return FactoryResetNotification(was_successful=True)
+
+    def _decode_device_name_changed(self, payload):
+        return DeviceNameChangedNotification(was_successful=True)
+
+    def _decode_device_serial_requested(self, payload):
+        serial = str(payload[2:-2], 'utf-8')
+
+        return DeviceSerialRequestedNotification(serial=serial)
+
+    @classmethod
+    def register_decoder(cls, opcode, decoder, sub_opcode=None, sub_opcode_index=2):
+        """
+        Register a decoder for payloads starting with the given opcode.
+
+        Parameters:
+            opcode              - two byte opcode the payload starts with, i.e. b'\x04\x00'
+            decoder             - callable being called with (parser, payload) returning the decoded message
+            sub_opcode          - Optional, value of the byte at sub_opcode_index selecting the decoder for opcodes shared by several messages
+            sub_opcode_index    - Optional, position of the sub-opcode byte within the payload. Default: 2
+        """
+        if len(opcode) != 2:
+            raise Exception("opcode is expected to be two bytes long: " + str(opcode))
+
+        key = opcode[0] << 8 | opcode[1]
+
+        # copy the registry on first registration so that subclasses do not alter the registry of their base classes
+        if not '_decoder_by_opcode' in cls.__dict__:
+            cls._decoder_by_opcode = dict(cls._decoder_by_opcode)
+
+        if sub_opcode is None:
+            cls._decoder_by_opcode[key] = decoder
+            return
+
+        entry = cls._decoder_by_opcode.get(key)
+        if not isinstance(entry, tuple) or entry[0] != sub_opcode_index:
+            entry = (sub_opcode_index, {})
+        else:
+            entry = (sub_opcode_index, dict(entry[1]))
+
+        entry[1][sub_opcode] = decoder
+        cls._decoder_by_opcode[key] = entry
+
+    def parse(self, data):
+        # work on a view of the received data so that neither the payload nor its fields are copied
+        if not isinstance(data, memoryview):
+            data = memoryview(data)
+
+        payload = self._parse_payload(data)
 
-        if payload[0:2] == b'\x02\x00':
-            return DeviceNameChangedNotification(was_successful=True)
+        if len(payload) < 2:
+            raise Exception('Unsupported message')
 
-        if payload[0:2] == b'\x11\x00':
-            serial = payload[2:-2].decode('utf-8')
+        decoder = self._decoder_by_opcode.get(payload[0] << 8 | payload[1])
 
-            return DeviceSerialRequestedNotification(serial=serial)
+        if isinstance(decoder, tuple):
+            sub_opcode_index, decoder_by_sub_opcode = decoder
 
-        raise Exception('Unsupported message')
+            decoder = None
+            if len(payload) > sub_opcode_index:
+                decoder = decoder_by_sub_opcode.get(payload[sub_opcode_index])
+
+        if decoder is None:
+            raise Exception('Unsupported message')
+
+        return decoder(self, payload)
+
+MessageParser.register_decoder(b'\x17\x00', MessageParser._decode_authorized, sub_opcode=0x00, sub_opcode_index=3)
+MessageParser.register_decoder(b'\x17\x00', MessageParser._decode_pin_changed, sub_opcode=0x01, sub_opcode_index=3)
+MessageParser.register_decoder(b'\x17\x00', MessageParser._decode_pin_reset, sub_opcode=0x02, sub_opcode_index=3)
+MessageParser.register_decoder(b'\x03\x00', MessageParser._decode_power_switched)
+MessageParser.register_decoder(b'\x01\x00', MessageParser._decode_date_and_time_changed)
+MessageParser.register_decoder(b'\x10\x00', MessageParser._decode_settings_requested)
+MessageParser.register_decoder(b'\x05\x00', MessageParser._decode_power_limit_changed)
+MessageParser.register_decoder(b'\x0f\x00', MessageParser._decode_factory_reset, sub_opcode=0x00)
+MessageParser.register_decoder(b'\x0f\x00', MessageParser._decode_reduced_period_changed, sub_opcode=0x01)
+MessageParser.register_decoder(b'\x0f\x00', MessageParser._decode_consumption_reset, sub_opcode=0x02)
+MessageParser.register_decoder(b'\x0f\x00', MessageParser._decode_prices_changed, sub_opcode=0x04)
+MessageParser.register_decoder(b'\x0f\x00', MessageParser._decode_nightmode_changed, sub_opcode=0x05)
+MessageParser.register_decoder(b'\x09\x00', MessageParser._decode_timer_status_requested)
+MessageParser.register_decoder(b'\x08\x00', MessageParser._decode_timer_set)
+MessageParser.register_decoder(b'\x14\x00', MessageParser._decode_scheduler_requested)
+MessageParser.register_decoder(b'\x13\x00', MessageParser._decode_scheduler_changed)
+MessageParser.register_decoder(b'\x16\x00', MessageParser._decode_random_mode_status_requested)
+MessageParser.register_decoder(b'\x15\x00', MessageParser._decode_random_mode_changed)
+MessageParser.register_decoder(b'\x04\x00', MessageParser._decode_measurement_requested)
+MessageParser.register_decoder(b'\x0c\x00', MessageParser._decode_consumption_of_last_12_months_requested)
+MessageParser.register_decoder(b'\x0b\x00', MessageParser._decode_consumption_of_last_30_days_requested)
+MessageParser.register_decoder(b'\x0a\x00', MessageParser._decode_consumption_of_last_23_hours_requested)
+MessageParser.register_decoder(b'\x02\x00', MessageParser._decode_device_name_changed)
+MessageParser.register_decoder(b'\x11\x00', MessageParser._decode_device_serial_requested)
+
+
+class CommandParser(MessageParser):
+    """Parses commands sent to the device - i.e. for simulating a device."""
+
+    def _parse_pin(self, data):
+        pin = ''
+        for digit in data:
+            pin += str(digit)
+
+        return pin
+
+    def _decode_authorize(self, payload):
+        return AuthorizeCommand(pin=self._parse_pin(payload[3:7]))
+
+    def _decode_change_pin(self, payload):
+        return ChangePinCommand(pin=self._parse_pin(payload[7:11]), new_pin=self._parse_pin(payload[3:7]))
+
+    def _decode_reset_pin(self, payload):
+        return ResetPinCommand()
+
+    def _decode_power_switch(self, payload):
+        return PowerSwitchCommand(on=(payload[2] == 0x01))
+
+    def _decode_change_nightmode(self, payload):
+        return ChangeNightmodeCommand(on=(payload[3] == 0x00))
+
+    def _decode_synchronize_date_and_time(self, payload):
+        second, minute, hour, day, month, year = struct.unpack_from('>BBBBBH', payload, 2)
+
+        return SynchronizeDateAndTimeCommand(isodatetime=datetime.datetime(year, month, day, hour, minute, second).isoformat())
+
+    def _decode_request_settings(self, payload):
+        return RequestSettingsCommand()
+
+    def _decode_change_power_limit(self, payload):
+        power_limit_in_watt, = struct.unpack_from('>H', payload, 2)
+
+        return ChangePowerLimitCommand(power_limit_in_watt=power_limit_in_watt)
+
+    def _decode_change_prices(self, payload):
+        return ChangePricesCommand(normal_price_in_cent=payload[3], reduced_period_price_in_cent=payload[4])
+
+    def _decode_change_reduced_period(self, payload):
+        is_active, start_time_in_minutes, end_time_in_minutes = struct.unpack_from('>BHH', payload, 3)
+
+        start_time = util._parse_time_from_minutes(start_time_in_minutes)
+        end_time = util._parse_time_from_minutes(end_time_in_minutes)
+
+        return ChangeReducedPeriodCommand(is_active=(is_active == 0x01), start_isotime=start_time.isoformat(timespec='minutes'), end_isotime=end_time.isoformat(timespec='minutes'))
+
+    def _decode_request_timer_status(self, payload):
+        return RequestTimerStatusCommand()
+
+    def _decode_set_timer(self, payload):
+        timer_action, second, minute, hour, day, month, year = struct.unpack_from('>BBBBBBB', payload, 2)
+
+        if timer_action == 0x00:
+            return SetTimerCommand(is_reset_timer=True, is_action_turn_on=False)
+
+        target_isodatetime = datetime.datetime(year + self.year_diff, month, day, hour, minute, second).isoformat()
+
+        return SetTimerCommand(is_reset_timer=False, is_action_turn_on=(timer_action == 0x01), target_isodatetime=target_isodatetime)
+
+    def _decode_request_scheduler(self, payload):
+        return RequestSchedulerCommand(page_number=payload[2])
+
+    def _decode_add_scheduler(self, payload):
+        return AddSchedulerCommand(scheduler=self._parse_scheduler(*layout.SCHEDULER.unpack_from(payload, 4)))
+
+    def _decode_edit_scheduler(self, payload):
+        return EditSchedulerCommand(slot_id=payload[3], scheduler=self._parse_scheduler(*layout.SCHEDULER.unpack_from(payload, 4)))
+
+    def _decode_remove_scheduler(self, payload):
+        return RemoveSchedulerCommand(slot_id=payload[3])
+
+    def _decode_request_random_mode_status(self, payload):
+        return RequestRandomModeStatusCommand()
+
+    def _decode_change_random_mode(self, payload):
+        is_active, active_on_weekdays_mask, start_hour, start_minute, end_hour, end_minute = layout.RANDOM_MODE.unpack_from(payload, layout.PAYLOAD_FIELDS_OFFSET)
+
+        active_on_weekdays = []
+        for w in range(7):
+            if active_on_weekdays_mask & 2**w:
+                active_on_weekdays.append(w)
+
+        return ChangeRandomModeCommand(is_active=(is_active == 0x01), active_on_weekdays=active_on_weekdays, start_isotime=datetime.time(start_hour, start_minute).isoformat(timespec='minutes'), end_isotime=datetime.time(end_hour, end_minute).isoformat(timespec='minutes'))
+
+    def _decode_request_measurement(self, payload):
+        return RequestMeasurementCommand()
+
+    def _decode_request_consumption_of_last_12_months(self, payload):
+        return RequestConsumptionOfLast12MonthsCommand()
+
+    def _decode_request_consumption_of_last_30_days(self, payload):
+        return RequestConsumptionOfLast30DaysCommand()
+
+    def _decode_request_consumption_of_last_23_hours(self, payload):
+        return RequestConsumptionOfLast23HoursCommand()
+
+    def _decode_reset_consumption(self, payload):
+        return ResetConsumptionCommand()
+
+    def _decode_factory_reset_command(self, payload):
+        return FactoryResetCommand()
+
+    def _decode_change_device_name(self, payload):
+        new_name = str(payload[2:-2], 'utf-8').rstrip('\x00')
+
+        return ChangeDeviceNameCommand(new_name=new_name)
+
+    def _decode_request_device_serial(self, payload):
+        return RequestDeviceSerialCommand()
+
+CommandParser._decoder_by_opcode = {}
+
+CommandParser.register_decoder(b'\x17\x00', CommandParser._decode_authorize, sub_opcode=0x00)
+CommandParser.register_decoder(b'\x17\x00', CommandParser._decode_change_pin, sub_opcode=0x01)
+CommandParser.register_decoder(b'\x17\x00', CommandParser._decode_reset_pin, sub_opcode=0x02)
+CommandParser.register_decoder(b'\x03\x00', CommandParser._decode_power_switch)
+CommandParser.register_decoder(b'\x01\x00', CommandParser._decode_synchronize_date_and_time)
+CommandParser.register_decoder(b'\x10\x00', CommandParser._decode_request_settings)
+CommandParser.register_decoder(b'\x05\x00', CommandParser._decode_change_power_limit)
+CommandParser.register_decoder(b'\x0f\x00', CommandParser._decode_factory_reset_command, sub_opcode=0x00)
+CommandParser.register_decoder(b'\x0f\x00', CommandParser._decode_change_reduced_period, sub_opcode=0x01)
+CommandParser.register_decoder(b'\x0f\x00', CommandParser._decode_reset_consumption, sub_opcode=0x02)
+CommandParser.register_decoder(b'\x0f\x00', CommandParser._decode_change_prices, sub_opcode=0x04)
+CommandParser.register_decoder(b'\x0f\x00', CommandParser._decode_change_nightmode, sub_opcode=0x05)
+CommandParser.register_decoder(b'\x09\x00', CommandParser._decode_request_timer_status)
+CommandParser.register_decoder(b'\x08\x00', CommandParser._decode_set_timer)
+CommandParser.register_decoder(b'\x14\x00', CommandParser._decode_request_scheduler)
+CommandParser.register_decoder(b'\x13\x00', CommandParser._decode_add_scheduler, sub_opcode=0x00)
+CommandParser.register_decoder(b'\x13\x00', CommandParser._decode_edit_scheduler, sub_opcode=0x01)
+CommandParser.register_decoder(b'\x13\x00', CommandParser._decode_remove_scheduler, sub_opcode=0x02)
+CommandParser.register_decoder(b'\x16\x00', CommandParser._decode_request_random_mode_status)
+CommandParser.register_decoder(b'\x15\x00', CommandParser._decode_change_random_mode)
+CommandParser.register_decoder(b'\x04\x00', CommandParser._decode_request_measurement)
+CommandParser.register_decoder(b'\x0c\x00', CommandParser._decode_request_consumption_of_last_12_months)
+CommandParser.register_decoder(b'\x0b\x00', CommandParser._decode_request_consumption_of_last_30_days)
+CommandParser.register_decoder(b'\x0a\x00', CommandParser._decode_request_consumption_of_last_23_hours)
+CommandParser.register_decoder(b'\x02\x00', CommandParser._decode_change_device_name)
+CommandParser.register_decoder(b'\x11\x00', CommandParser._decode_request_device_serial)
@@ -0,0 +1,330 @@
+import collections
+import datetime
+
+from .message import *
+from . import util
+
+
+class Request():
+    """
+    A command and the notification the device answers it with. Shared by SEM6000 and AsyncSEM6000, so that both
+    send the same commands and check the replies the same way.
+    """
+
+    def __init__(self, command, notification_class, error_message, is_confirmation=True):
+        """
+        Parameters:
+            command             - command from sem6000.message
+            notification_class  - class of the notification answering the command
+            error_message       - message of the exception raised if the reply is not as expected
+            is_confirmation     - Optional, True if the notification has to confirm the command by was_successful. Default: True
+        """
+        self.command = command
+        self.notification_class = notification_class
+        self.error_message = error_message
+        self.is_confirmation = is_confirmation
+
+    def validate(self, notification):
+        """
+        Returns notification if it answers the command successfully - raises an Exception otherwise.
+        """
+        if not isinstance(notification, self.notification_class):
+            raise Exception(self.error_message)
+
+        if self.is_confirmation and not notification.was_successful:
+            raise Exception(self.error_message)
+
+        return notification
+
+
+class PipelinedReplies():
+    """
+    Assigns the notifications answering commands which were sent back to back to the commands.
+
+    The replies are assigned by the notification type the device answers each command with. Replies of the same
+    type are assigned in the order of their commands.
+    """
+
+    def __init__(self, commands):
+        self.commands = commands
+
+        self._pending_indexes_by_notification_class = {}
+        for index, command in enumerate(commands):
+            notification_class = NOTIFICATION_CLASS_BY_COMMAND_CLASS[type(command)]
+            self._pending_indexes_by_notification_class.setdefault(notification_class, collections.deque()).append(index)
+
+        self._notifications = [None] * len(commands)
+        self._number_of_pending_notifications = len(commands)
+
+    def add(self, notification):
+        """
+        Returns False if notification does not answer any of the pending commands.
+        """
+        pending_indexes = self._pending_indexes_by_notification_class.get(type(notification))
+        if not pending_indexes:
+            return False
+
+        self._notifications[pending_indexes.popleft()] = notification
+        self._number_of_pending_notifications -= 1
+
+        return True
+
+    def is_complete(self):
+        return self._number_of_pending_notifications == 0
+
+    def get_notifications(self):
+        """
+        Returns a list of notifications in the order of the commands - raises an Exception if a reply is missing.
+        """
+        if not self.is_complete():
+            index = self._notifications.index(None)
+            raise Exception("No response received for " + str(self.commands[index]))
+
+        return self._notifications
+
+
+def validate_reply(command, notification):
+    """
+    Returns notification if it is of the class answering command - raises an Exception otherwise.
+    """
+    if not isinstance(notification, NOTIFICATION_CLASS_BY_COMMAND_CLASS[type(command)]):
+        raise Exception("Unexpected response for " + str(command) + ": " + str(notification))
+
+    return notification
+
+
+def parse_device_name(data):
+    """
+    Returns a DeviceNameRequestedNotification of the value of the device name characteristic.
+    """
+    return DeviceNameRequestedNotification(bytes(data).decode(encoding='utf-8'))
+
+
+def get_clock_offset(isodatetime):
+    """
+    Returns the offset of the device clock to the local clock after its date and time has been set to isodatetime.
+    """
+    return datetime.datetime.fromisoformat(isodatetime) - datetime.datetime.now()
+
+
+def get_device_datetime(clock_offset):
+    """
+    Returns the current date and time of a device clock or the local date and time if clock_offset is None.
+    """
+    if clock_offset is None:
+        return datetime.datetime.now()
+
+    return datetime.datetime.now() + clock_offset
+
+
+def authorize(pin):
+    # the authorization is checked by the client as it forgets the pin if it is rejected
+    return Request(AuthorizeCommand(pin), AuthorizedNotification, "Authentication failed", is_confirmation=False)
+
+
+def change_pin(pin, new_pin):
+    return Request(ChangePinCommand(pin, new_pin), PinChangedNotification, "Change PIN failed")
+
+
+def reset_pin():
+    return Request(ResetPinCommand(), PinResetNotification, "Reset PIN failed")
+
+
+def power_on():
+    return Request(PowerSwitchCommand(True), PowerSwitchedNotification, "Power on failed")
+
+
+def power_off():
+    return Request(PowerSwitchCommand(False), PowerSwitchedNotification, "Power off failed")
+
+
+def nightmode_on():
+    return Request(ChangeNightmodeCommand(True), NightmodeChangedNotification, "Nightmode on failed")
+
+
+def nightmode_off():
+    return Request(ChangeNightmodeCommand(False), NightmodeChangedNotification, "Nightmode off failed")
+
+
+def change_date_and_time(isodatetime):
+    return Request(SynchronizeDateAndTimeCommand(isodatetime), DateAndTimeChangedNotification, "Set date and time failed")
+
+
+def request_settings():
+    return Request(RequestSettingsCommand(), SettingsRequestedNotification, "Request settings failed", is_confirmation=False)
+
+
+def change_power_limit(power_limit_in_watt):
+    return Request(ChangePowerLimitCommand(power_limit_in_watt=int(power_limit_in_watt)), PowerLimitChangedNotification, "Set power limit failed")
+
+
+def change_prices(normal_price_in_cent, reduced_period_price_in_cent):
+    command = ChangePricesCommand(normal_price_in_cent=int(normal_price_in_cent), reduced_period_price_in_cent=int(reduced_period_price_in_cent))
+
+    return Request(command, PricesChangedNotification, "Set prices failed")
+
+
+def change_reduced_period(is_active, start_isotime, end_isotime):
+    command = ChangeReducedPeriodCommand(
+        is_active=util._parse_boolean(is_active),
+        start_isotime=start_isotime,
+        end_isotime=end_isotime)
+
+    return Request(command, ReducedPeriodChangedNotification, "Set reduced period failed")
+
+
+def request_timer_status():
+    return Request(RequestTimerStatusCommand(), TimerStatusRequestedNotification, "Request timer status failed", is_confirmation=False)
+
+
+def activate_timer(is_action_turn_on, delay_isotime):
+    time = datetime.time.fromisoformat(delay_isotime)
+    timedelta = datetime.timedelta(hours=time.hour, minutes=time.minute, seconds=time.second)
+    dt = datetime.datetime.now() + timedelta
+
+    return activate_timer_at(is_action_turn_on, dt.isoformat(timespec='seconds'))
+
+
+def activate_timer_at(is_action_turn_on, target_isodatetime):
+    command = SetTimerCommand(
+        is_reset_timer=False,
+        is_action_turn_on=util._parse_boolean(is_action_turn_on),
+        target_isodatetime=target_isodatetime)
+
+    return Request(command, TimerSetNotification, "Set timer failed")
+
+
+def reset_timer():
+    return Request(SetTimerCommand(is_reset_timer=True, is_action_turn_on=False), TimerSetNotification, "Reset timer failed")
+
+
+def request_scheduler_page(page_number):
+    return Request(RequestSchedulerCommand(page_number=page_number), SchedulerRequestedNotification, "Request scheduler page " + str(page_number + 1) + " failed", is_confirmation=False)
+
+
+def get_further_scheduler_page_requests(first_page):
+    """
+    Returns the requests of the pages following the SchedulerRequestedNotification of page 0. They do not depend on
+    each other and may be sent pipelined.
+    """
+    max_page_number = first_page.number_of_schedulers // 4
+
+    return [request_scheduler_page(page_number) for page_number in range(1, max_page_number+1)]
+
+
+def merge_scheduler_pages(first_page, further_pages):
+    """
+    Returns first_page with the scheduler entries of further_pages appended.
+    """
+    for further_page in further_pages:
+        first_page.scheduler_entries.extend(further_page.scheduler_entries)
+
+    return first_page
+
+
+def add_onetime_scheduler(is_active, is_action_turn_on, isodatetime):
+    command = AddSchedulerCommand(
+        OneTimeScheduler(
+            is_active=util._parse_boolean(is_active),
+            is_action_turn_on=util._parse_boolean(is_action_turn_on),
+            isodatetime=isodatetime
+        ))
+
+    return Request(command, SchedulerChangedNotification, "Add scheduler failed")
+
+
+def edit_onetime_scheduler(slot_id, is_active, is_action_turn_on, isodatetime):
+    command = EditSchedulerCommand(
+        slot_id=int(slot_id),
+        scheduler=OneTimeScheduler(
+            is_active=util._parse_boolean(is_active),
+            is_action_turn_on=util._parse_boolean(is_action_turn_on),
+            isodatetime=isodatetime
+        ))
+
+    return Request(command, SchedulerChangedNotification, "Edit scheduler failed")
+
+
+def add_repeated_scheduler(is_active, is_action_turn_on, repeat_on_weekdays, isotime):
+    command = AddSchedulerCommand(
+        RepeatedScheduler(
+            is_active=util._parse_boolean(is_active),
+            is_action_turn_on=util._parse_boolean(is_action_turn_on),
+            repeat_on_weekdays=util._parse_weekdays_list(repeat_on_weekdays),
+            isotime=isotime
+        ))
+
+    return Request(command, SchedulerChangedNotification, "Add scheduler failed")
+
+
+def edit_repeated_scheduler(slot_id, is_active, is_action_turn_on, repeat_on_weekdays, isotime):
+    command = EditSchedulerCommand(
+        slot_id=int(slot_id),
+        scheduler=RepeatedScheduler(
+            is_active=util._parse_boolean(is_active),
+            is_action_turn_on=util._parse_boolean(is_action_turn_on),
+            repeat_on_weekdays=util._parse_weekdays_list(repeat_on_weekdays),
+            isotime=isotime
+        ))
+
+    return Request(command, SchedulerChangedNotification, "Edit scheduler failed")
+
+
+def remove_scheduler(slot_id):
+    return Request(RemoveSchedulerCommand(slot_id=int(slot_id)), SchedulerChangedNotification, "Remove scheduler failed")
+
+
+def request_random_mode_status():
+    return Request(RequestRandomModeStatusCommand(), RandomModeStatusRequestedNotification, "Request random mode status failed", is_confirmation=False)
+
+
+def change_random_mode(active_on_weekdays, start_isotime, end_isotime):
+    command = ChangeRandomModeCommand(
+        is_active=True,
+        active_on_weekdays=util._parse_weekdays_list(active_on_weekdays),
+        start_isotime=start_isotime,
+        end_isotime=end_isotime)
+
+    return Request(command, RandomModeChangedNotification, "Set random mode failed")
+
+
+def reset_random_mode():
+    command = ChangeRandomModeCommand(
+        is_active=False,
+        active_on_weekdays=[],
+        start_isotime="00:00",
+        end_isotime="00:00")
+
+    return Request(command, RandomModeChangedNotification, "Set random mode failed")
+
+
+def request_measurement():
+    return Request(RequestMeasurementCommand(), MeasurementRequestedNotification, "Request measurement failed", is_confirmation=False)
+
+
+def request_consumption_of_last_12_months():
+    return Request(RequestConsumptionOfLast12MonthsCommand(), ConsumptionOfLast12MonthsRequestedNotification, "Request consumption of last 12 months failed", is_confirmation=False)
+
+
+def request_consumption_of_last_30_days():
+    return Request(RequestConsumptionOfLast30DaysCommand(), ConsumptionOfLast30DaysRequestedNotification, "Request consumption of last 30 days failed", is_confirmation=False)
+
+
+def request_consumption_of_last_23_hours():
+    return Request(RequestConsumptionOfLast23HoursCommand(), ConsumptionOfLast23HoursRequestedNotification, "Request consumption of last 23 hours failed", is_confirmation=False)
+
+
+def reset_consumption():
+    return Request(ResetConsumptionCommand(), ConsumptionResetNotification, "Reset consumption failed")
+
+
+def factory_reset():
+    return Request(FactoryResetCommand(), FactoryResetNotification, "Factory reset failed")
+
+
+def change_device_name(new_name):
+    return Request(ChangeDeviceNameCommand(new_name=new_name), DeviceNameChangedNotification, "Set device name failed")
+
+
+def request_device_serial():
+    return Request(RequestDeviceSerialCommand(), DeviceSerialRequestedNotification, "Request device serial failed", is_confirmation=False)
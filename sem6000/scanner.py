@@ -0,0 +1,118 @@
+import sys
+import threading
+import time
+
+from .sem6000 import SEM6000, _create_bluetooth_lowenergy_interface
+
+
+class Advertisement():
+    def __init__(self, address, name, rssi, last_seen, bluetooth_device):
+        self.address = address
+        self.name = name
+        self.rssi = rssi
+        self.last_seen = last_seen
+        self.bluetooth_device = bluetooth_device
+
+    def __str__(self):
+        name = self.__class__.__name__
+        return name + "(address=" + str(self.address) + ", name=" + str(self.name) + ", rssi=" + str(self.rssi) + ", last_seen=" + str(self.last_seen) + ", bluetooth_device=" + str(self.bluetooth_device) + ")"
+
+
+class BackgroundScanner():
+    """
+    Scans for SEM6000 advertisements in a background thread and keeps the latest advertisement of each device.
+
+    Queries are answered from the index and never wait for a scan.
+    """
+
+    def __init__(self, bluetooth_device='hci0', backend='bluepy', scan_duration=10, passive=True, adapter_scheduler=None):
+        """
+        Parameters:
+            bluetooth_device    - Optional, bluetooth device name to scan with. Default: 'hci0'
+            backend             - Optional, 'bluepy', 'bleak', an AbstractBluetoothInterface instance or a callable creating one for a bluetooth device name. Default: 'bluepy'
+            scan_duration       - Optional, seconds per scan - the scan is restarted afterwards. Default: 10
+            passive             - Optional, scan without requesting scan responses. Names are kept from earlier advertisements then. Default: True
+            adapter_scheduler   - Optional, AdapterScheduler to report the signal strengths to
+        """
+        self.bluetooth_device = bluetooth_device
+        self.scan_duration = scan_duration
+        self.passive = passive
+        self.adapter_scheduler = adapter_scheduler
+
+        self._bluetooth_lowenergy_interface = _create_bluetooth_lowenergy_interface(backend, bluetooth_device)
+
+        # advertisements are replaced instead of being modified so that readers need no lock
+        self._advertisement_by_address = {}
+
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def _handle_advertisement(self, device):
+        address = device['address'].lower()
+        name = device.get('name')
+
+        if name is None:
+            previous_advertisement = self._advertisement_by_address.get(address)
+            if not previous_advertisement is None:
+                name = previous_advertisement.name
+
+        self._advertisement_by_address[address] = Advertisement(address, name, device.get('rssi'), time.time(), self.bluetooth_device)
+
+        if not self.adapter_scheduler is None and not device.get('rssi') is None:
+            self.adapter_scheduler.update_rssi(self.bluetooth_device, device['address'], device['rssi'])
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                self._bluetooth_lowenergy_interface.scan(self.scan_duration, self._handle_advertisement, service_uuids=[SEM6000.SERVICECLASS_UUID], passive=self.passive)
+            except Exception as e:
+                print("scan failed: " + str(e), file=sys.stderr)
+                self._stop_event.wait(self.scan_duration)
+
+    def start(self):
+        """
+        Start scanning in the background.
+        """
+        if not self._thread is None:
+            return
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='sem6000-scanner-' + self.bluetooth_device, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stop scanning after the current scan has finished.
+        """
+        self._stop_event.set()
+
+        if not self._thread is None:
+            self._thread.join()
+            self._thread = None
+
+    def get(self, address):
+        """
+        Returns the latest Advertisement of address or None if it has not been seen.
+        """
+        return self._advertisement_by_address.get(address.lower())
+
+    def is_reachable(self, address, max_age=60):
+        """
+        Returns True if address has been seen within the last max_age seconds.
+        """
+        advertisement = self._advertisement_by_address.get(address.lower())
+        if advertisement is None:
+            return False
+
+        return time.time() - advertisement.last_seen <= max_age
+
+    def get_all(self, max_age=None):
+        """
+        Returns a list of the latest Advertisement of each device seen within the last max_age seconds or of all devices if max_age is None.
+        """
+        advertisements = list(self._advertisement_by_address.values())
+        if max_age is None:
+            return advertisements
+
+        now = time.time()
+        return [advertisement for advertisement in advertisements if now - advertisement.last_seen <= max_age]
@@ -1,12 +1,35 @@
 import binascii
-import datetime
+import collections
 import sys
 
-from .bluetooth_lowenergy_interface.bluepy_interface import *
+from .bluetooth_lowenergy_interface.abstract_interface import AbstractBluetoothInterface
 from . import encoder
 from .message import *
 from . import parser
-from . import util
+from . import protocol
+from .state_cache import cached_state, SETTINGS, SCHEDULER, RANDOM_MODE_STATUS, DEVICE_SERIAL, DEVICE_NAME
+
+
+def _create_bluetooth_lowenergy_interface(backend, bluetooth_device, timeout=10):
+    if isinstance(backend, AbstractBluetoothInterface):
+        return backend
+
+    # backends are only imported when being used so that their libraries are optional
+    if backend == 'bluepy':
+        from .bluetooth_lowenergy_interface.bluepy_interface import BluePyBtLeInterface
+
+        return BluePyBtLeInterface(bluetooth_device=bluetooth_device)
+
+    if backend == 'bleak':
+        from .bluetooth_lowenergy_interface.bleak_interface import BleakBtLeInterface
+
+        # a GATT operation must not take longer than the wait for its notification
+        return BleakBtLeInterface(bluetooth_device=bluetooth_device, timeout=timeout)
+
+    if callable(backend):
+        return backend(bluetooth_device)
+
+    raise Exception("Unsupported backend: " + str(backend))
 
 
 class SEM6000Delegate():
@@ -15,7 +38,9 @@ class SEM6000Delegate():
         if debug:
             self.debug = True
 
-        self._raw_notifications = []
+        # frames are parsed as soon as their last fragment arrives
+        self._frame_decoder = parser.FrameDecoder(self._handle_frame, self._handle_invalid_frame)
+        self._notifications = collections.deque()
 
         self._parser = parser.MessageParser()
 
@@ -23,52 +48,44 @@ class SEM6000Delegate():
         self._handle_notification(characteristic_uuid, data)
 
     def _handle_notification(self, characteristic_uuid, data):
-        self._raw_notifications.append(data)
-
-    def has_final_raw_notification(self):
-        if len(self._raw_notifications) == 0:
-            return False
-
-        last_notification = self._raw_notifications[-1]
-
-        if len(last_notification) < 2:
-            return False
-
-        # command b'\x04\x00' lacks suffix b'\xff\xff'
-        if last_notification[2:4] == b'\x04\x00':
-            return True
-
-        return ( last_notification[-2:] == b'\xff\xff' )
-
-    def consume_notification(self):
-        exception = None
-        notification = None
-
-        data = b''
-        for n in self._raw_notifications:
-            data += n
+        self._frame_decoder.feed(data)
 
+    def _handle_frame(self, frame):
         try:
-            if not self.has_final_raw_notification():
-                raise Exception("Incomplete notification data")
-
-            notification = self._parser.parse(data)
+            notification = self._parser.parse(frame)
         except Exception as e:
             if self.debug:
-                print("received data: " + str(binascii.hexlify(data)) + " (Unknown Notification)", file=sys.stderr)
-            raise e
+                print("received data: " + str(binascii.hexlify(frame)) + " (Unknown Notification)", file=sys.stderr)
+
+            # raised when the notification is being consumed - without the traceback which keeps the frame alive
+            self._notifications.append(e.with_traceback(None))
+            return
+
+        if self.debug:
+            print("received data: " + str(binascii.hexlify(frame)) + " (" + str(notification) + ")", file=sys.stderr)
 
+        self._notifications.append(notification)
+
+    def _handle_invalid_frame(self, frame):
         if self.debug:
-            print("received data: " + str(binascii.hexlify(data)) + " (" + str(notification) + ")", file=sys.stderr)
+            print("received data: " + str(binascii.hexlify(frame)) + " (Invalid checksum)", file=sys.stderr)
+
+    def has_notification(self):
+        return len(self._notifications) > 0
 
+    def consume_notification(self):
+        if not self.has_notification():
+            raise Exception("Incomplete notification data")
 
-        while len(self._raw_notifications):
-            self._raw_notifications.pop(0)
+        notification = self._notifications.popleft()
+        if isinstance(notification, Exception):
+            raise notification
 
         return notification
 
     def reset_notification_data(self):
-        self._raw_notifications.clear()
+        self._frame_decoder.reset()
+        self._notifications.clear()
 
 
 class SEM6000():
@@ -77,27 +94,35 @@ class SEM6000():
     CHARACTERISTIC_UUID_CONTROL='0000fff3-0000-1000-8000-00805f9b34fb'
     CHARACTERISTIC_UUID_RESPONSE='0000fff4-0000-1000-8000-00805f9b34fb'
 
-    def __init__(self, deviceAddr=None, pin=None, bluetooth_device='hci0', timeout=3, debug=False):
+    def __init__(self, deviceAddr=None, pin=None, bluetooth_device='hci0', timeout=3, debug=False, backend='bluepy', write_without_response=False, state_cache=None):
         """ Create a new SEM6000() instance
         
             Parameters:
-                deviceAddr          - Optional, MAC address of a remote device to connect to immediately, i.e. '00:11:22:33:44:55'.
-                pin                 - Optional, 4 digit numeric pin, i.e. '0000'.
-                bluetooth_device    - Optional, bluetooth device name to use. Default: 'hci0'
-                timeout             - Optional, maximum time in seconds to wait for a response from the device. Default: 3
-                debug               - Optional, if set to true commands and responses are printed to sys.stderr
+                deviceAddr              - Optional, MAC address of a remote device to connect to immediately, i.e. '00:11:22:33:44:55'.
+                pin                     - Optional, 4 digit numeric pin, i.e. '0000'.
+                bluetooth_device        - Optional, bluetooth device name to use. Default: 'hci0'
+                timeout                 - Optional, maximum time in seconds to wait for a response from the device. Default: 3
+                debug                   - Optional, if set to true commands and responses are printed to sys.stderr
+                backend                 - Optional, 'bluepy', 'bleak', an AbstractBluetoothInterface instance or a callable creating one for a bluetooth device name. Default: 'bluepy'
+                write_without_response  - Optional, if set to true all commands are written without waiting for a write response. The notification the device answers each command with confirms it instead. Default: False
+                state_cache             - Optional, StateCache answering request_settings(), request_scheduler(), request_random_mode_status(), request_device_serial() and request_device_name(). Default: None
         """
         self.timeout = timeout
         self.debug = debug
+        self.write_without_response = write_without_response
+        self.state_cache = state_cache
 
         self.connection_settings = {}
 
         self.pin = None
 
+        # offset of the device clock to the local clock as set by change_date_and_time() - None if unknown
+        self.clock_offset = None
+
         self._encoder = encoder.MessageEncoder()
 
         self._delegate = SEM6000Delegate(self.debug)
-        self._bluetooth_lowenergy_interface = BluePyBtLeInterface(bluetooth_device=bluetooth_device)
+        self._bluetooth_lowenergy_interface = _create_bluetooth_lowenergy_interface(backend, bluetooth_device, timeout)
         self._bluetooth_lowenergy_interface.add_notification_handler(self._delegate._handle_notification)
 
         if not deviceAddr is None:
@@ -139,33 +164,138 @@ class SEM6000():
         return self._bluetooth_lowenergy_interface.is_connected()
 
     def _send_command(self, command):
-        encoded_command = self._encoder.encode(command)
-
-        if self.debug:
-            print("sent data: " + str(binascii.hexlify(encoded_command)) + " (" + str(command) + ")", file=sys.stderr)
-
         self._delegate.reset_notification_data()
+        self._ensure_connected()
 
+        self._write_command(command)
+        self._wait_for_notifications()
+
+    def _ensure_connected(self):
         if not self._is_connected():
             if self.connection_settings["device_address"] and self.pin:
                 self._reconnect()
             else:
                 raise Exception("Not connected and no deviceAddress / pin set")
 
-        self._bluetooth_lowenergy_interface.write_to_characteristic(SEM6000.CHARACTERISTIC_UUID_CONTROL, encoded_command)
-        self._wait_for_notifications()
+    def _write_command(self, command):
+        encoded_command = self._encoder.encode(command)
+
+        if self.debug:
+            print("sent data: " + str(binascii.hexlify(encoded_command)) + " (" + str(command) + ")", file=sys.stderr)
+
+        # the device answers every command with a notification which confirms that the command has been received
+        with_response = None
+        if self.write_without_response:
+            with_response = False
+
+        if not self.state_cache is None:
+            self.state_cache.invalidate_for_command(command)
+
+        self._bluetooth_lowenergy_interface.write_to_characteristic(SEM6000.CHARACTERISTIC_UUID_CONTROL, encoded_command, with_response)
 
     def _wait_for_notifications(self):
         while True:
             if not self._bluetooth_lowenergy_interface.wait_for_notifications(self.timeout):
                 break
 
-            if self._delegate.has_final_raw_notification():
+            if self._delegate.has_notification():
                 break
 
     def _consume_notification(self):
         return self._delegate.consume_notification()
 
+    def _execute(self, request):
+        self._send_command(request.command)
+
+        return request.validate(self._consume_notification())
+
+    def run_pipelined(self, commands):
+        """
+        Sends several commands back to back without waiting for the reply of each command in between.
+
+        The replies are assigned to the commands by the notification type the device answers each command with.
+        Replies of the same type are assigned in the order of their commands. The commands must not depend on
+        each other's results.
+
+        Parameters:
+          commands: list of commands from sem6000.message
+
+        Returns a list of notifications in the order of the commands.
+        """
+        replies = protocol.PipelinedReplies(commands)
+
+        self._delegate.reset_notification_data()
+        self._ensure_connected()
+
+        for command in commands:
+            self._write_command(command)
+
+        while not replies.is_complete():
+            if not self._delegate.has_notification():
+                if not self._bluetooth_lowenergy_interface.wait_for_notifications(self.timeout):
+                    break
+
+                continue
+
+            notification = self._consume_notification()
+
+            if not replies.add(notification) and self.debug:
+                print("ignoring unexpected notification: " + str(notification), file=sys.stderr)
+
+        return replies.get_notifications()
+
+    def _execute_pipelined(self, requests):
+        notifications = self.run_pipelined([request.command for request in requests])
+
+        return [request.validate(notification) for request, notification in zip(requests, notifications)]
+
+    def _run_command(self, command):
+        self._delegate.reset_notification_data()
+
+        self._write_command(command)
+        self._wait_for_notifications()
+
+        return protocol.validate_reply(command, self._consume_notification())
+
+    def run_batch(self, commands, retries=1, pipelined=False):
+        """
+        Runs several commands within one connection.
+
+        The connection is checked once for the whole batch. If it drops while the batch is running the remote
+        device is reconnected and authorized again and the commands not answered yet are sent again.
+
+        Parameters:
+            commands    - list of commands from sem6000.message
+            retries     - Optional, number of reconnects before giving up. Default: 1
+            pipelined   - Optional, True to send the commands back to back as in run_pipelined(). On a reconnect
+                          all commands of the batch are sent again then. Default: False
+
+        Returns a list of notifications in the order of the commands.
+        """
+        notifications = []
+
+        self._ensure_connected()
+        while True:
+            try:
+                if pipelined:
+                    notifications = self.run_pipelined(commands)
+                else:
+                    for command in commands[len(notifications):]:
+                        notification = self._run_command(command)
+                        notifications.append(notification)
+
+                        # authorize again with the new pin after a reconnect
+                        if isinstance(notification, PinChangedNotification) and notification.was_successful:
+                            self.pin = command.new_pin
+
+                return notifications
+            except Exception as e:
+                if self._is_connected() or retries <= 0:
+                    raise e
+
+                retries -= 1
+                self._reconnect()
+
     def connect(self, device_address):
         """
         Connect to a remote device.
@@ -175,6 +305,9 @@ class SEM6000():
         """
         self.connection_settings["device_address"] = device_address
 
+        if not self.state_cache is None:
+            self.state_cache.invalidate()
+
         return self._reconnect()
 
     def disconnect(self):
@@ -183,7 +316,7 @@ class SEM6000():
         """
         return self._disconnect()
 
-    def discover(timeout=5, bluetooth_device='hci0'):
+    def discover(timeout=5, bluetooth_device='hci0', backend='bluepy'):
         """
         Discover remote devices.
 
@@ -192,11 +325,13 @@ class SEM6000():
         Parameters:
             timeout             - Optional, time in seconds to wait for devices to respond. Default: 5
             bluetooth_device    - Optional, bluetooth device name to use. Default: 'hciß'
+            backend             - Optional, 'bluepy', 'bleak', an AbstractBluetoothInterface instance or a callable creating one for a bluetooth device name. Default: 'bluepy'
         """
-        bluetooth_lowenergy_interface = BluePyBtLeInterface(bluetooth_device=bluetooth_device)
+        bluetooth_lowenergy_interface = _create_bluetooth_lowenergy_interface(backend, bluetooth_device)
 
         return bluetooth_lowenergy_interface.discover(timeout, service_uuids=[SEM6000.SERVICECLASS_UUID])
 
+    @cached_state(DEVICE_NAME)
     def request_device_name(self):
         """
         Request the name of the remote device.
@@ -208,9 +343,7 @@ class SEM6000():
         if self.debug:
             print("received data: " + str(binascii.hexlify(data)), file=sys.stderr)
 
-        device_name = data.decode(encoding='utf-8')
-
-        return DeviceNameRequestedNotification(device_name)
+        return protocol.parse_device_name(data)
 
     def authorize(self, pin):
         """
@@ -221,12 +354,7 @@ class SEM6000():
 
         Returns an AuthorizedNotification.
         """
-        command = AuthorizeCommand(pin)
-        self._send_command(command)
-        notification = self._consume_notification()
-
-        if not isinstance(notification, AuthorizedNotification):
-            raise Exception("Authentication failed")
+        notification = self._execute(protocol.authorize(pin))
 
         if notification.was_successful:
             self.pin = pin
@@ -245,14 +373,7 @@ class SEM6000():
 
         Returns a PinChangedNotification.
         """
-        command = ChangePinCommand(self.pin, new_pin)
-        self._send_command(command)
-        notification = self._consume_notification()
-
-        if not isinstance(notification, PinChangedNotification) or not notification.was_successful:
-            raise Exception("Change PIN failed")
-
-        return notification
+        return self._execute(protocol.change_pin(self.pin, new_pin))
 
     def reset_pin(self):
         """
@@ -260,14 +381,7 @@ class SEM6000():
 
         Returns a PinResetNotification.
         """
-        command = ResetPinCommand()
-        self._send_command(command)
-        notification = self._consume_notification()
-
-        if not isinstance(notification, PinResetNotification) or not notification.was_successful:
-            raise Exception("Reset PIN failed")
-
-        return notification
+        return self._execute(protocol.reset_pin())
 
     def power_on(self):
         """
@@ -275,14 +389,7 @@ class SEM6000():
 
         Returns a PowerSwitchedNotification.
         """
-        command = PowerSwitchCommand(True)
-        self._send_command(command)
-        notification = self._consume_notification()
-        
-        if not isinstance(notification, PowerSwitchedNotification) or not notification.was_successful:
-            raise Exception("Power on failed")
-
-        return notification
+        return self._execute(protocol.power_on())
 
     def power_off(self):
         """
@@ -290,14 +397,7 @@ class SEM6000():
 
         Returns a PowerSwitchedNotification.
         """
-        command = PowerSwitchCommand(False)
-        self._send_command(command)
-        notification = self._consume_notification()
-        
-        if not isinstance(notification, PowerSwitchedNotification) or not notification.was_successful:
-            raise Exception("Power off failed")
-
-        return notification
+        return self._execute(protocol.power_off())
 
     def nightmode_on(self):
         """
@@ -305,14 +405,7 @@ class SEM6000():
 
         Returns a NightmodeChangedNotification.
         """
-        command = ChangeNightmodeCommand(True)
-        self._send_command(command)
-        notification = self._consume_notification()
-        
-        if not isinstance(notification, NightmodeChangedNotification) or not notification.was_successful:
-            raise Exception("Nightmode on failed")
-
-        return notification
+        return self._execute(protocol.nightmode_on())
 
     def nightmode_off(self):
         """
@@ -320,14 +413,7 @@ class SEM6000():
 
         Returns a NightmodeChangedNotification.
         """
-        command = ChangeNightmodeCommand(False)
-        self._send_command(command)
-        notification = self._consume_notification()
-        
-        if not isinstance(notification, NightmodeChangedNotification) or not notification.was_successful:
-            raise Exception("Nightmode off failed")
-
-        return notification
+        return self._execute(protocol.nightmode_off())
 
     def change_date_and_time(self, isodatetime):
         """
@@ -338,29 +424,26 @@ class SEM6000():
 
         Returns a DateAndTimeChangedNotification.
         """
-        command = SynchronizeDateAndTimeCommand(isodatetime)
-        self._send_command(command)
-        notification = self._consume_notification()
+        notification = self._execute(protocol.change_date_and_time(isodatetime))
 
-        if not isinstance(notification, DateAndTimeChangedNotification) or not notification.was_successful:
-            raise Exception("Set date and time failed")
+        self.clock_offset = protocol.get_clock_offset(isodatetime)
 
         return notification
 
+    def get_device_datetime(self):
+        """
+        Returns the current date and time of the device clock as set by change_date_and_time() or the local date and time if the device clock has not been set.
+        """
+        return protocol.get_device_datetime(self.clock_offset)
+
+    @cached_state(SETTINGS)
     def request_settings(self):
         """
         Request the current settings from the remote device.
 
         Returns a SettingsRequestedNotification.
         """
-        command = RequestSettingsCommand()
-        self._send_command(command)
-        notification = self._consume_notification()
-
-        if not isinstance(notification, SettingsRequestedNotification):
-            raise Exception("Request settings failed")
-
-        return notification
+        return self._execute(protocol.request_settings())
 
     def change_power_limit(self, power_limit_in_watt):
         """
@@ -368,14 +451,7 @@ class SEM6000():
 
         Returns a PowerLimitChangedNotification.
         """
-        command = ChangePowerLimitCommand(power_limit_in_watt=int(power_limit_in_watt))
-        self._send_command(command)
-        notification = self._consume_notification()
-
-        if not isinstance(notification, PowerLimitChangedNotification) or not notification.was_successful:
-            raise Exception("Set power limit failed")
-
-        return notification
+        return self._execute(protocol.change_power_limit(power_limit_in_watt))
 
     def change_prices(self, normal_price_in_cent, reduced_period_price_in_cent):
         """
@@ -387,14 +463,7 @@ class SEM6000():
 
         Returns a PricesChangedNotification.
         """
-        command = ChangePricesCommand(normal_price_in_cent=int(normal_price_in_cent), reduced_period_price_in_cent=int(reduced_period_price_in_cent))
-        self._send_command(command)
-        notification = self._consume_notification()
-
-        if not isinstance(notification, PricesChangedNotification) or not notification.was_successful:
-            raise Exception("Set prices failed")
-
-        return notification
+        return self._execute(protocol.change_prices(normal_price_in_cent, reduced_period_price_in_cent))
 
     def change_reduced_period(self, is_active, start_isotime, end_isotime):
         """
@@ -407,18 +476,7 @@ class SEM6000():
 
         Returns a ReducedPeriodChangedNotification.
         """
-        command = ChangeReducedPeriodCommand(
-            is_active=util._parse_boolean(is_active), 
-            start_isotime=start_isotime, 
-            end_isotime=end_isotime)
-
-        self._send_command(command)
-        notification = self._consume_notification()
-
-        if not isinstance(notification, ReducedPeriodChangedNotification) or not notification.was_successful:
-            raise Exception("Set reduced period failed")
-
-        return notification
+        return self._execute(protocol.change_reduced_period(is_active, start_isotime, end_isotime))
 
     def request_timer_status(self):
         """
@@ -426,14 +484,7 @@ class SEM6000():
 
         Returns a TimerStatusRequestedNotification.
         """
-        command = RequestTimerStatusCommand()
-        self._send_command(command)
-        notification = self._consume_notification()
-
-        if not isinstance(notification, TimerStatusRequestedNotification):
-            raise Exception("Request timer status failed")
-
-        return notification
+        return self._execute(protocol.request_timer_status())
 
     def activate_timer(self, is_action_turn_on, delay_isotime):
         """
@@ -445,22 +496,7 @@ class SEM6000():
 
         Returns a TimerSetNotification.
         """
-        time = datetime.time.fromisoformat(delay_isotime)
-        timedelta = datetime.timedelta(hours=time.hour, minutes=time.minute, seconds=time.second)
-        dt = datetime.datetime.now() + timedelta
-
-        command = SetTimerCommand(
-            is_reset_timer=False, 
-            is_action_turn_on=util._parse_boolean(is_action_turn_on), 
-            target_isodatetime=dt.isoformat(timespec='seconds'))
-
-        self._send_command(command)
-        notification = self._consume_notification()
-
-        if not isinstance(notification, TimerSetNotification) or not notification.was_successful:
-            raise Exception("Set timer failed")
-
-        return notification
+        return self._execute(protocol.activate_timer(is_action_turn_on, delay_isotime))
 
     def activate_timer_at(self, is_action_turn_on, target_isodatetime):
         """
@@ -472,18 +508,7 @@ class SEM6000():
 
         Returns a TimerSetNotification.
         """
-        command = SetTimerCommand(
-            is_reset_timer=False, 
-            is_action_turn_on=util._parse_boolean(is_action_turn_on), 
-            target_isodatetime=target_isodatetime)
-
-        self._send_command(command)
-        notification = self._consume_notification()
-
-        if not isinstance(notification, TimerSetNotification) or not notification.was_successful:
-            raise Exception("Set timer failed")
-
-        return notification
+        return self._execute(protocol.activate_timer_at(is_action_turn_on, target_isodatetime))
 
     def reset_timer(self):
         """
@@ -491,40 +516,19 @@ class SEM6000():
 
         Returns a TimerSetNotification.
         """
-        command = SetTimerCommand(is_reset_timer=True, is_action_turn_on=False)
-        self._send_command(command)
-        notification = self._consume_notification()
-
-        if not isinstance(notification, TimerSetNotification) or not notification.was_successful:
-            raise Exception("Reset timer failed")
-
-        return notification
+        return self._execute(protocol.reset_timer())
 
+    @cached_state(SCHEDULER)
     def request_scheduler(self):
         """
         Request all currently set schedulers.
 
         Returns a SchedulerRequestedNotification.
         """
-        command = RequestSchedulerCommand(page_number=0)
-        self._send_command(command)
-        notification = self._consume_notification()
-
-        if not isinstance(notification, SchedulerRequestedNotification):
-            raise Exception('Request scheduler 1st page failed')
-
-        max_page_number = notification.number_of_schedulers // 4
-        for page_number in range(1, max_page_number+1):
-            command = RequestSchedulerCommand(page_number=page_number)
-            self._send_command(command)
-            further_notification = self._consume_notification()
+        first_page = self._execute(protocol.request_scheduler_page(0))
+        further_pages = self._execute_pipelined(protocol.get_further_scheduler_page_requests(first_page))
 
-            if not isinstance(further_notification, SchedulerRequestedNotification):
-                raise Exception('Request scheduler 2nd page failed')
-
-            notification.scheduler_entries.extend(further_notification.scheduler_entries)
-
-        return notification
+        return protocol.merge_scheduler_pages(first_page, further_pages)
 
     def add_onetime_scheduler(self, is_active, is_action_turn_on, isodatetime):
         """
@@ -537,20 +541,7 @@ class SEM6000():
 
         Returns a SchedulerChangedNotification.
         """
-        command = AddSchedulerCommand(
-            OneTimeScheduler(
-                is_active=util._parse_boolean(is_active), 
-                is_action_turn_on=util._parse_boolean(is_action_turn_on), 
-                isodatetime=isodatetime
-            ))
-
-        self._send_command(command)
-        notification = self._consume_notification()
-
-        if not isinstance(notification, SchedulerChangedNotification) or not notification.was_successful:
-            raise Exception("Add scheduler failed")
-
-        return notification
+        return self._execute(protocol.add_onetime_scheduler(is_active, is_action_turn_on, isodatetime))
 
     def edit_onetime_scheduler(self, slot_id, is_active, is_action_turn_on, isodatetime):
         """
@@ -564,21 +555,7 @@ class SEM6000():
 
         Returns a SchedulerChangedNotification.
         """
-        command = EditSchedulerCommand(
-            slot_id=int(slot_id), 
-            scheduler=OneTimeScheduler(
-                is_active=util._parse_boolean(is_active), 
-                is_action_turn_on=util._parse_boolean(is_action_turn_on), 
-                isodatetime=isodatetime
-            ))
-
-        self._send_command(command)
-        notification = self._consume_notification()
-
-        if not isinstance(notification, SchedulerChangedNotification) or not notification.was_successful:
-            raise Exception("Edit scheduler failed")
-
-        return notification
+        return self._execute(protocol.edit_onetime_scheduler(slot_id, is_active, is_action_turn_on, isodatetime))
 
     def add_repeated_scheduler(self, is_active, is_action_turn_on, repeat_on_weekdays, isotime):
         """
@@ -592,21 +569,7 @@ class SEM6000():
 
         Returns a SchedulerChangedNotification.
         """
-        command = AddSchedulerCommand(
-            RepeatedScheduler(
-                is_active=util._parse_boolean(is_active), 
-                is_action_turn_on=util._parse_boolean(is_action_turn_on), 
-                repeat_on_weekdays=util._parse_weekdays_list(repeat_on_weekdays), 
-                isotime=isotime
-            ))
-
-        self._send_command(command)
-        notification = self._consume_notification()
-
-        if not isinstance(notification, SchedulerChangedNotification) or not notification.was_successful:
-            raise Exception("Add scheduler failed")
-
-        return notification
+        return self._execute(protocol.add_repeated_scheduler(is_active, is_action_turn_on, repeat_on_weekdays, isotime))
 
     def edit_repeated_scheduler(self, slot_id, is_active, is_action_turn_on, repeat_on_weekdays, isotime):
         """
@@ -621,22 +584,7 @@ class SEM6000():
 
         Returns a SchedulerChangedNotification.
         """
-        command = EditSchedulerCommand(
-            slot_id=int(slot_id), 
-            scheduler=RepeatedScheduler(
-                is_active=util._parse_boolean(is_active), 
-                is_action_turn_on=util._parse_boolean(is_action_turn_on), 
-                repeat_on_weekdays=util._parse_weekdays_list(repeat_on_weekdays), 
-                isotime=isotime
-            ))
-
-        self._send_command(command)
-        notification = self._consume_notification()
-
-        if not isinstance(notification, SchedulerChangedNotification) or not notification.was_successful:
-            raise Exception("Edit scheduler failed")
-
-        return notification
+        return self._execute(protocol.edit_repeated_scheduler(slot_id, is_active, is_action_turn_on, repeat_on_weekdays, isotime))
 
     def remove_scheduler(self, slot_id):
         """
@@ -647,29 +595,16 @@ class SEM6000():
 
         Returns a SchedulerChangedNotification.
         """
-        command = RemoveSchedulerCommand(slot_id=int(slot_id))
-        self._send_command(command)
-        notification = self._consume_notification()
-
-        if not isinstance(notification, SchedulerChangedNotification) or not notification.was_successful:
-            raise Exception("Remove scheduler failed")
-
-        return notification
+        return self._execute(protocol.remove_scheduler(slot_id))
 
+    @cached_state(RANDOM_MODE_STATUS)
     def request_random_mode_status(self):
         """
         Request the current status of the random mode from the remote device.
 
         Returns a RandomModeStatusRequestedNotification.
         """
-        command = RequestRandomModeStatusCommand()
-        self._send_command(command)
-        notification = self._consume_notification()
-
-        if not isinstance(notification, RandomModeStatusRequestedNotification):
-            raise Exception("Request random mode status failed")
-
-        return notification
+        return self._execute(protocol.request_random_mode_status())
 
     def change_random_mode(self, active_on_weekdays, start_isotime, end_isotime):
         """
@@ -682,19 +617,7 @@ class SEM6000():
 
         Returns a RandomModeChangedNotification.
         """
-        command = ChangeRandomModeCommand(
-            is_active=True, 
-            active_on_weekdays=util._parse_weekdays_list(active_on_weekdays), 
-            start_isotime=start_isotime, 
-            end_isotime=end_isotime)
-
-        self._send_command(command)
-        notification = self._consume_notification()
-
-        if not isinstance(notification, RandomModeChangedNotification) or not notification.was_successful:
-            raise Exception("Set random mode failed")
-
-        return notification
+        return self._execute(protocol.change_random_mode(active_on_weekdays, start_isotime, end_isotime))
 
     def reset_random_mode(self):
         """
@@ -702,19 +625,7 @@ class SEM6000():
 
         Returns a RandomModeChangedNotification.
         """
-        command = ChangeRandomModeCommand(
-            is_active=False, 
-            active_on_weekdays=[], 
-            start_isotime="00:00", 
-            end_isotime="00:00")
-
-        self._send_command(command)
-        notification = self._consume_notification()
-
-        if not isinstance(notification, RandomModeChangedNotification) or not notification.was_successful:
-            raise Exception("Set random mode failed")
-
-        return notification
+        return self._execute(protocol.reset_random_mode())
 
     def request_measurement(self):
         """
@@ -722,14 +633,7 @@ class SEM6000():
 
         Returns a MeasurementRequestedNotification.
         """
-        command = RequestMeasurementCommand()
-        self._send_command(command)
-        notification = self._consume_notification()
-
-        if not isinstance(notification, MeasurementRequestedNotification):
-            raise Exception("Request measurement failed")
-
-        return notification
+        return self._execute(protocol.request_measurement())
 
     def request_consumption_of_last_12_months(self):
         """
@@ -739,14 +643,7 @@ class SEM6000():
 
         Returns a ConsumptionOfLast12MonthsRequestedNotification.
         """
-        command = RequestConsumptionOfLast12MonthsCommand()
-        self._send_command(command)
-        notification = self._consume_notification()
-
-        if not isinstance(notification, ConsumptionOfLast12MonthsRequestedNotification):
-            raise("Request consumption of last 12 months failed")
-
-        return notification
+        return self._execute(protocol.request_consumption_of_last_12_months())
 
     def request_consumption_of_last_30_days(self):
         """
@@ -756,14 +653,7 @@ class SEM6000():
 
         Returns a ConsumptionOfLast30DaysRequestedNotification.
         """
-        command = RequestConsumptionOfLast30DaysCommand()
-        self._send_command(command)
-        notification = self._consume_notification()
-
-        if not isinstance(notification, ConsumptionOfLast30DaysRequestedNotification):
-            raise("Request consumption of last 30 days failed")
-
-        return notification
+        return self._execute(protocol.request_consumption_of_last_30_days())
 
     def request_consumption_of_last_23_hours(self):
         """
@@ -773,14 +663,7 @@ class SEM6000():
 
         Returns a ConsumptionOfLast23HoursRequestedNotification.
         """
-        command = RequestConsumptionOfLast23HoursCommand()
-        self._send_command(command)
-        notification = self._consume_notification()
-
-        if not isinstance(notification, ConsumptionOfLast23HoursRequestedNotification):
-            raise("Request consumption of last 23 hours failed")
-
-        return notification
+        return self._execute(protocol.request_consumption_of_last_23_hours())
 
     def reset_consumption(self):
         """
@@ -788,14 +671,7 @@ class SEM6000():
 
         Returns a ResetConsumptionNoticiation.
         """
-        command = ResetConsumptionCommand()
-        self._send_command(command)
-        notification = self._consume_notification()
-
-        if not isinstance(notification, ConsumptionResetNotification) or not notification.was_successful:
-            raise("Reset consumption failed")
-
-        return notification
+        return self._execute(protocol.reset_consumption())
 
     def factory_reset(self):
         """
@@ -803,14 +679,7 @@ class SEM6000():
 
         Returns a FactoryResetNotification.
         """
-        command = FactoryResetCommand()
-        self._send_command(command)
-        notification = self._consume_notification()
-
-        if not isinstance(notification, FactoryResetNotification) or not notification.was_successful:
-            raise("Factory reset failed")
-
-        return notification
+        return self._execute(protocol.factory_reset())
 
     def change_device_name(self, new_name):
         """
@@ -821,26 +690,14 @@ class SEM6000():
 
         Returns a DeviceNameChangedNotification.
         """
-        command = ChangeDeviceNameCommand(new_name=new_name)
-        self._send_command(command)
-        notification = self._consume_notification()
-
-        if not isinstance(notification, DeviceNameChangedNotification) or not notification.was_successful:
-            raise Exception("Set device name failed")
-
-        return notification
+        return self._execute(protocol.change_device_name(new_name))
 
+    @cached_state(DEVICE_SERIAL)
     def request_device_serial(self):
         """
         Request the serial number of the remote device.
 
         Returns a DeviceSerialRequestedNotification.
         """
-        command = RequestDeviceSerialCommand()
-        self._send_command(command)
-        notification = self._consume_notification()
+        return self._execute(protocol.request_device_serial())
 
-        if not isinstance(notification, DeviceSerialRequestedNotification):
-            raise Exception("Request device serial failed")
-
-        return notification
@@ -0,0 +1,245 @@
+import datetime
+
+from .message import *
+from . import protocol
+from . import util
+
+
+def _get_weekday_values(weekdays):
+    return [w.value for w in weekdays]
+
+
+def get_state(device):
+    """
+    Read the settings of a device.
+
+    Parameters:
+        device  - connected SEM6000 instance
+
+    Returns a dictionary like written by sem6000-settings-backup-demo.py.
+    """
+    device_name_response = device.request_device_name()
+
+    settings_response, timer_response, random_mode_response, scheduler_response = device.run_pipelined([
+        RequestSettingsCommand(),
+        RequestTimerStatusCommand(),
+        RequestRandomModeStatusCommand(),
+        RequestSchedulerCommand(page_number=0)
+    ])
+
+    # further scheduler pages can only be requested once the number of schedulers is known
+    further_scheduler_requests = protocol.get_further_scheduler_page_requests(scheduler_response)
+    if len(further_scheduler_requests):
+        further_scheduler_responses = device.run_pipelined([request.command for request in further_scheduler_requests])
+        scheduler_response = protocol.merge_scheduler_pages(scheduler_response, further_scheduler_responses)
+
+    state = {}
+    state["device-name"] = device_name_response.device_name
+
+    state["settings"] = {
+        "reduced-period": {
+            "is-active": settings_response.is_reduced_period,
+            "price-in-cent": settings_response.reduced_period_price_in_cent,
+            "start-isotime": settings_response.reduced_period_start_isotime,
+            "end-isotime": settings_response.reduced_period_end_isotime
+        },
+        "normal-price-in-cent": settings_response.normal_price_in_cent,
+        "is-nightmode-active": settings_response.is_nightmode_active,
+        "power-limit-in-watt": settings_response.power_limit_in_watt
+    }
+
+    state["random-mode"] = {
+        "is-active": random_mode_response.is_active,
+        "active-on-weekdays": _get_weekday_values(random_mode_response.active_on_weekdays),
+        "start-isotime": random_mode_response.start_isotime,
+        "end-isotime": random_mode_response.end_isotime
+    }
+
+    state["timer"] = {
+        "is-active": timer_response.is_active,
+        "is-action-turn-on": timer_response.is_action_turn_on,
+        "isodatetime": timer_response.target_isodatetime
+    }
+
+    # slot ids are strings like in the JSON backup files
+    entries = {}
+    for entry in scheduler_response.scheduler_entries:
+        scheduler = entry.scheduler
+        weekdays = _get_weekday_values(scheduler.repeat_on_weekdays)
+
+        if not len(weekdays):
+            entries[str(entry.slot_id)] = {
+                "is-active": scheduler.is_active,
+                "is-action-turn-on": scheduler.is_action_turn_on,
+                "isodatetime": scheduler.isodatetime
+            }
+        else:
+            entries[str(entry.slot_id)] = {
+                "is-active": scheduler.is_active,
+                "is-action-turn-on": scheduler.is_action_turn_on,
+                "repeat-on-weekdays": weekdays,
+                "isotime": datetime.datetime.fromisoformat(scheduler.isodatetime).time().isoformat(timespec='minutes')
+            }
+
+    state["scheduler"] = {
+        "number-of-schedulers": scheduler_response.number_of_schedulers,
+        "entries": entries
+    }
+
+    return state
+
+
+def _to_minutes(isodatetime):
+    if isodatetime is None:
+        return None
+
+    return datetime.datetime.fromisoformat(isodatetime).isoformat(timespec='minutes')
+
+
+def _to_isotime(isotime):
+    return datetime.time.fromisoformat(isotime).isoformat(timespec='minutes')
+
+
+def _to_weekdays(weekday_values):
+    # weekdays are given as values, i.e. [1, 3] or as names, i.e. 'Mon,Wed'
+    if isinstance(weekday_values, str):
+        return util._parse_weekdays_list(weekday_values)
+
+    return [util.Weekday(value) for value in weekday_values]
+
+
+def _get_scheduler_key(entry):
+    if not "repeat-on-weekdays" in entry:
+        return (entry["is-active"], entry["is-action-turn-on"], _to_minutes(entry["isodatetime"]))
+
+    weekdays = tuple(sorted(w.value for w in _to_weekdays(entry["repeat-on-weekdays"])))
+    return (entry["is-active"], entry["is-action-turn-on"], weekdays, _to_isotime(entry["isotime"]))
+
+
+def _create_scheduler(entry):
+    if not "repeat-on-weekdays" in entry:
+        return OneTimeScheduler(is_active=entry["is-active"], is_action_turn_on=entry["is-action-turn-on"], isodatetime=entry["isodatetime"])
+
+    return RepeatedScheduler(is_active=entry["is-active"], is_action_turn_on=entry["is-action-turn-on"], repeat_on_weekdays=_to_weekdays(entry["repeat-on-weekdays"]), isotime=entry["isotime"])
+
+
+def _get_scheduler_commands(current_entries, desired_entries):
+    unmatched_current_slot_ids = sorted(current_entries, key=int)
+    unmatched_desired_slot_ids = []
+
+    # slot ids are assigned by the device - an equal scheduler in another slot is kept as well
+    for slot_id in sorted(desired_entries, key=int):
+        key = _get_scheduler_key(desired_entries[slot_id])
+
+        candidates = [slot_id] if slot_id in unmatched_current_slot_ids else []
+        candidates += [s for s in unmatched_current_slot_ids if s != slot_id]
+
+        for current_slot_id in candidates:
+            if _get_scheduler_key(current_entries[current_slot_id]) == key:
+                unmatched_current_slot_ids.remove(current_slot_id)
+                break
+        else:
+            unmatched_desired_slot_ids.append(slot_id)
+
+    # an edit replaces a remove and an add
+    commands = []
+    for current_slot_id, desired_slot_id in zip(unmatched_current_slot_ids, unmatched_desired_slot_ids):
+        commands.append(EditSchedulerCommand(slot_id=int(current_slot_id), scheduler=_create_scheduler(desired_entries[desired_slot_id])))
+
+    for current_slot_id in unmatched_current_slot_ids[len(unmatched_desired_slot_ids):]:
+        commands.append(RemoveSchedulerCommand(slot_id=int(current_slot_id)))
+
+    for desired_slot_id in unmatched_desired_slot_ids[len(unmatched_current_slot_ids):]:
+        commands.append(AddSchedulerCommand(_create_scheduler(desired_entries[desired_slot_id])))
+
+    return commands
+
+
+def get_commands(current_state, desired_state):
+    """
+    Compute the commands changing a device from current_state to desired_state.
+
+    Parameters:
+        current_state   - dictionary like returned by get_state()
+        desired_state   - dictionary like returned by get_state(). Missing sections are left unchanged.
+
+    Returns a list of commands which is empty if nothing differs.
+    """
+    commands = []
+
+    if "device-name" in desired_state and desired_state["device-name"] != current_state["device-name"]:
+        commands.append(ChangeDeviceNameCommand(new_name=desired_state["device-name"]))
+
+    if "settings" in desired_state:
+        current = current_state["settings"]
+        desired = desired_state["settings"]
+
+        if desired["normal-price-in-cent"] != current["normal-price-in-cent"] or desired["reduced-period"]["price-in-cent"] != current["reduced-period"]["price-in-cent"]:
+            commands.append(ChangePricesCommand(normal_price_in_cent=int(desired["normal-price-in-cent"]), reduced_period_price_in_cent=int(desired["reduced-period"]["price-in-cent"])))
+
+        current_reduced_period = current["reduced-period"]
+        desired_reduced_period = desired["reduced-period"]
+        if desired_reduced_period["is-active"] != current_reduced_period["is-active"] or _to_isotime(desired_reduced_period["start-isotime"]) != _to_isotime(current_reduced_period["start-isotime"]) or _to_isotime(desired_reduced_period["end-isotime"]) != _to_isotime(current_reduced_period["end-isotime"]):
+            commands.append(ChangeReducedPeriodCommand(is_active=desired_reduced_period["is-active"], start_isotime=desired_reduced_period["start-isotime"], end_isotime=desired_reduced_period["end-isotime"]))
+
+        if desired["is-nightmode-active"] != current["is-nightmode-active"]:
+            commands.append(ChangeNightmodeCommand(desired["is-nightmode-active"]))
+
+        if int(desired["power-limit-in-watt"]) != int(current["power-limit-in-watt"]):
+            commands.append(ChangePowerLimitCommand(power_limit_in_watt=int(desired["power-limit-in-watt"])))
+
+    if "random-mode" in desired_state:
+        current = current_state["random-mode"]
+        desired = desired_state["random-mode"]
+
+        if desired["is-active"]:
+            desired_weekdays = _to_weekdays(desired["active-on-weekdays"])
+
+            if not current["is-active"] or set(desired_weekdays) != set(_to_weekdays(current["active-on-weekdays"])) or _to_isotime(desired["start-isotime"]) != _to_isotime(current["start-isotime"]) or _to_isotime(desired["end-isotime"]) != _to_isotime(current["end-isotime"]):
+                commands.append(ChangeRandomModeCommand(is_active=True, active_on_weekdays=desired_weekdays, start_isotime=desired["start-isotime"], end_isotime=desired["end-isotime"]))
+        elif current["is-active"]:
+            commands.append(ChangeRandomModeCommand(is_active=False, active_on_weekdays=[], start_isotime="00:00", end_isotime="00:00"))
+
+    if "timer" in desired_state:
+        current = current_state["timer"]
+        desired = desired_state["timer"]
+
+        if desired["is-active"]:
+            if not current["is-active"] or desired["is-action-turn-on"] != current["is-action-turn-on"] or _to_minutes(desired["isodatetime"]) != _to_minutes(current["isodatetime"]):
+                commands.append(SetTimerCommand(is_reset_timer=False, is_action_turn_on=desired["is-action-turn-on"], target_isodatetime=desired["isodatetime"]))
+        elif current["is-active"]:
+            commands.append(SetTimerCommand(is_reset_timer=True, is_action_turn_on=False))
+
+    if "scheduler" in desired_state:
+        commands.extend(_get_scheduler_commands(current_state["scheduler"]["entries"], desired_state["scheduler"]["entries"]))
+
+    return commands
+
+
+def apply_settings(device, desired_state, current_state=None):
+    """
+    Change the settings of a device to desired_state sending only the commands for settings which differ.
+
+    Parameters:
+        device          - connected SEM6000 instance
+        desired_state   - dictionary like returned by get_state() or read from a backup file. Missing sections are left unchanged.
+        current_state   - Optional, current settings of the device. Default: get_state(device)
+
+    Returns the list of commands sent.
+    """
+    if current_state is None:
+        current_state = get_state(device)
+
+    commands = get_commands(current_state, desired_state)
+    if not commands:
+        return commands
+
+    failed_commands = []
+    for command, notification in zip(commands, device.run_batch(commands)):
+        if not notification.was_successful:
+            failed_commands.append(command)
+
+    if failed_commands:
+        raise Exception("Apply settings failed: " + util._format_list_of_objects(str, failed_commands))
+
+    return commands
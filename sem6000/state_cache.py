@@ -0,0 +1,157 @@
+import copy
+import functools
+import inspect
+import threading
+import time
+
+from .message import *
+
+
+SETTINGS = 'settings'
+SCHEDULER = 'scheduler'
+RANDOM_MODE_STATUS = 'random_mode_status'
+DEVICE_SERIAL = 'device_serial'
+DEVICE_NAME = 'device_name'
+
+STATES = [SETTINGS, SCHEDULER, RANDOM_MODE_STATUS, DEVICE_SERIAL, DEVICE_NAME]
+
+# cached states a command may change
+CHANGED_STATES_BY_COMMAND_CLASS = {
+    ChangeNightmodeCommand: [SETTINGS],
+    ChangePowerLimitCommand: [SETTINGS],
+    ChangePricesCommand: [SETTINGS],
+    ChangeReducedPeriodCommand: [SETTINGS],
+    AddSchedulerCommand: [SCHEDULER],
+    EditSchedulerCommand: [SCHEDULER],
+    RemoveSchedulerCommand: [SCHEDULER],
+    ChangeRandomModeCommand: [RANDOM_MODE_STATUS],
+    ChangeDeviceNameCommand: [DEVICE_NAME],
+    FactoryResetCommand: [SETTINGS, SCHEDULER, RANDOM_MODE_STATUS, DEVICE_NAME]
+}
+
+
+class StateCache():
+    """
+    Notifications of slowly changing states of one device.
+
+    A state is invalidated as soon as a command changing it is sent - before the device confirmed it - so that a
+    failed or unanswered command can not leave an outdated state behind. Changes by other clients of the device are
+    only noticed after the ttl.
+    """
+
+    def __init__(self, ttl=300, ttl_by_state=None):
+        """
+        Parameters:
+            ttl             - Optional, seconds a state is kept or None to keep it until it is invalidated. Default: 300
+            ttl_by_state    - Optional, dictionary of ttls overriding ttl for single states, i.e. {DEVICE_SERIAL: None}
+        """
+        self.ttl = ttl
+        self.ttl_by_state = ttl_by_state or {}
+
+        self._lock = threading.Lock()
+        self._entry_by_state = {}
+        self._generation_by_state = {}
+
+    def _get_ttl(self, state):
+        return self.ttl_by_state.get(state, self.ttl)
+
+    def get(self, state):
+        """
+        Returns a copy of the cached notification of state or None if it is not cached or expired.
+        """
+        with self._lock:
+            entry = self._entry_by_state.get(state)
+            if entry is None:
+                return None
+
+            notification, expiry = entry
+            if not expiry is None and time.monotonic() >= expiry:
+                del self._entry_by_state[state]
+                return None
+
+        # callers may modify the returned notification
+        return copy.deepcopy(notification)
+
+    def get_generation(self, state):
+        """
+        Returns a number which changes whenever state is invalidated.
+        """
+        with self._lock:
+            return self._generation_by_state.get(state, 0)
+
+    def put(self, state, notification, generation=None):
+        """
+        Cache the notification of state.
+
+        Parameters:
+            state           - one of STATES
+            notification    - notification to cache
+            generation      - Optional, result of get_generation() before the notification was requested. The notification is dropped if state has been invalidated since.
+        """
+        ttl = self._get_ttl(state)
+        expiry = None if ttl is None else time.monotonic() + ttl
+
+        with self._lock:
+            if not generation is None and generation != self._generation_by_state.get(state, 0):
+                return
+
+            self._entry_by_state[state] = (copy.deepcopy(notification), expiry)
+
+    def invalidate(self, states=None):
+        """
+        Drop the given states or all states if states is None.
+        """
+        if states is None:
+            states = STATES
+
+        with self._lock:
+            for state in states:
+                self._entry_by_state.pop(state, None)
+                self._generation_by_state[state] = self._generation_by_state.get(state, 0) + 1
+
+    def invalidate_for_command(self, command):
+        """
+        Drop the states command may change.
+        """
+        states = CHANGED_STATES_BY_COMMAND_CLASS.get(type(command))
+        if states:
+            self.invalidate(states)
+
+
+def cached_state(state):
+    """
+    Decorator answering a SEM6000 or AsyncSEM6000 request method from the state_cache of the instance if it has one.
+    """
+    def decorator(method):
+        if inspect.iscoroutinefunction(method):
+            @functools.wraps(method)
+            async def async_wrapper(self, *args, **kwargs):
+                if self.state_cache is None:
+                    return await method(self, *args, **kwargs)
+
+                notification = self.state_cache.get(state)
+                if notification is None:
+                    generation = self.state_cache.get_generation(state)
+                    notification = await method(self, *args, **kwargs)
+                    self.state_cache.put(state, notification, generation)
+
+                return notification
+
+            return async_wrapper
+
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            if self.state_cache is None:
+                return method(self, *args, **kwargs)
+
+            notification = self.state_cache.get(state)
+            if notification is None:
+                generation = self.state_cache.get_generation(state)
+                notification = method(self, *args, **kwargs)
+                self.state_cache.put(state, notification, generation)
+
+            return notification
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,169 @@
+import datetime
+
+import numpy
+
+
+SECONDS_PER_DAY = 24*60*60
+
+
+def _to_second_of_day(isotime):
+    t = datetime.time.fromisoformat(isotime)
+    return (t.hour*60 + t.minute)*60 + t.second
+
+
+def _get_utc_offset(timestamp, timezone):
+    return int(datetime.datetime.fromtimestamp(int(timestamp), datetime.timezone.utc).astimezone(timezone).utcoffset().total_seconds())
+
+
+def _get_utc_offsets(timestamps, timezone):
+    # the offset is looked up at the start and the end of each day and only for each sample of a day it changes on
+    days = timestamps // SECONDS_PER_DAY
+
+    # timestamps are ascending, so the samples of a day are consecutive
+    first_indexes = numpy.concatenate(([0], numpy.flatnonzero(numpy.diff(days)) + 1))
+    first_days = days[first_indexes]
+
+    start_offsets = numpy.array([_get_utc_offset(day*SECONDS_PER_DAY, timezone) for day in first_days], dtype=numpy.int64)
+    end_offsets = numpy.array([_get_utc_offset((day + 1)*SECONDS_PER_DAY - 1, timezone) for day in first_days], dtype=numpy.int64)
+
+    number_of_samples_by_day = numpy.diff(numpy.append(first_indexes, len(timestamps)))
+    utc_offsets = numpy.repeat(start_offsets, number_of_samples_by_day)
+
+    is_changing = numpy.repeat(start_offsets != end_offsets, number_of_samples_by_day)
+    utc_offsets[is_changing] = [_get_utc_offset(timestamp, timezone) for timestamp in timestamps[is_changing]]
+
+    return utc_offsets
+
+
+class Tariff():
+    """
+    Normal and reduced period prices like configured on a SEM6000.
+
+    Prices are in cent per kWh. The reduced period is the same every day and wraps past midnight if it ends before
+    it starts, i.e. from '22:00' to '06:00'. Consumption is assumed to be spread evenly over its period, so a period
+    which is partially reduced is priced proportionally.
+    """
+
+    def __init__(self, normal_price_in_cent, reduced_period_price_in_cent=None, reduced_period_start_isotime='00:00', reduced_period_end_isotime='00:00', is_reduced_period=True):
+        """
+        Parameters:
+            normal_price_in_cent            - price per kWh outside of the reduced period
+            reduced_period_price_in_cent    - Optional, price per kWh within the reduced period. Default: normal_price_in_cent
+            reduced_period_start_isotime    - Optional, ISO time the reduced period starts at, i.e. '22:00'. Default: '00:00'
+            reduced_period_end_isotime      - Optional, ISO time the reduced period ends at, i.e. '06:00'. Default: '00:00' (no reduced period if equal to the start)
+            is_reduced_period               - Optional, whether the reduced period price applies at all. Default: True
+        """
+        if reduced_period_price_in_cent is None:
+            reduced_period_price_in_cent = normal_price_in_cent
+
+        self.normal_price_in_cent = normal_price_in_cent
+        self.reduced_period_price_in_cent = reduced_period_price_in_cent
+        self.reduced_period_start_isotime = reduced_period_start_isotime
+        self.reduced_period_end_isotime = reduced_period_end_isotime
+        self.is_reduced_period = is_reduced_period
+
+        self._start_second = _to_second_of_day(reduced_period_start_isotime)
+        self._end_second = _to_second_of_day(reduced_period_end_isotime)
+
+    @classmethod
+    def from_settings(cls, settings):
+        """
+        Returns the Tariff of a SettingsRequestedNotification.
+        """
+        return cls(settings.normal_price_in_cent, settings.reduced_period_price_in_cent, settings.reduced_period_start_isotime, settings.reduced_period_end_isotime, settings.is_reduced_period)
+
+    def _get_reduced_seconds_since_midnight(self, second_of_day):
+        start = self._start_second
+        end = self._end_second
+
+        if start <= end:
+            return numpy.clip(second_of_day - start, 0, end - start)
+
+        # wrapping period: reduced from midnight to end and from start to midnight
+        return numpy.minimum(second_of_day, end) + numpy.maximum(second_of_day - start, 0)
+
+    def _get_reduced_seconds_since_epoch(self, seconds):
+        days, second_of_day = numpy.divmod(seconds, SECONDS_PER_DAY)
+        return days*self._get_reduced_seconds_since_midnight(SECONDS_PER_DAY) + self._get_reduced_seconds_since_midnight(second_of_day)
+
+    def get_reduced_fractions(self, start_timestamps, end_timestamps):
+        """
+        Returns a float array of the fractions of the periods from start_timestamps to end_timestamps (numpy datetime64 arrays of local time) within the reduced period.
+        """
+        start_seconds = start_timestamps.astype('datetime64[s]').astype(numpy.int64)
+        end_seconds = end_timestamps.astype('datetime64[s]').astype(numpy.int64)
+
+        if not self.is_reduced_period:
+            return numpy.zeros(numpy.shape(start_seconds))
+
+        reduced_seconds = self._get_reduced_seconds_since_epoch(end_seconds) - self._get_reduced_seconds_since_epoch(start_seconds)
+
+        with numpy.errstate(invalid='ignore', divide='ignore'):
+            return numpy.where(end_seconds > start_seconds, reduced_seconds / (end_seconds - start_seconds), 0)
+
+    def get_prices_in_cent(self, start_timestamps, end_timestamps):
+        """
+        Returns a float array of the average prices per kWh of the periods from start_timestamps to end_timestamps.
+        """
+        reduced_fractions = self.get_reduced_fractions(start_timestamps, end_timestamps)
+        return self.normal_price_in_cent + reduced_fractions*(self.reduced_period_price_in_cent - self.normal_price_in_cent)
+
+    def get_costs_in_cent(self, series):
+        """
+        Price the consumption of an analytics.ConsumptionSeries, i.e. of analytics.to_series() of a ConsumptionOfLast23HoursRequestedNotification.
+
+        Returns a float array of the costs per period shaped like series.consumption_in_watt_hour. Unknown consumptions cost NaN.
+        """
+        timestamps = series.timestamps
+        unit = numpy.datetime_data(timestamps.dtype)[0]
+        prices = self.get_prices_in_cent(timestamps, timestamps + numpy.timedelta64(1, unit))
+
+        return series.consumption_in_watt_hour / 1000 * prices
+
+    def get_measurement_costs_in_cent(self, timestamps, power_in_milliwatt, max_interval=300, timezone=None):
+        """
+        Price measurements like stored by a MeasurementStore. The power of a sample is assumed to last until the next sample.
+
+        Parameters:
+            timestamps          - ascending seconds since the epoch, i.e. MeasurementSeries.timestamp
+            power_in_milliwatt  - power of each sample, i.e. MeasurementSeries.power_in_milliwatt
+            max_interval        - Optional, seconds after which a sample is considered outdated - longer gaps cost nothing. Default: 300
+            timezone            - Optional, datetime.tzinfo of the local time of the tariff, i.e. zoneinfo.ZoneInfo('Europe/Berlin'). Default: the local time zone
+
+        Returns a float array of the costs of the interval following each sample.
+        """
+        timestamps = numpy.asarray(timestamps, dtype=numpy.int64)
+        power_in_milliwatt = numpy.asarray(power_in_milliwatt, dtype=numpy.float64)
+
+        costs = numpy.zeros(len(timestamps))
+        if len(timestamps) < 2:
+            return costs
+
+        intervals = numpy.diff(timestamps)
+
+        # consecutive samples share their boundaries - the reduced seconds since the epoch are computed once per sample
+        if self.is_reduced_period:
+            utc_offsets = _get_utc_offsets(timestamps, timezone)
+            reduced_seconds_since_epoch = self._get_reduced_seconds_since_epoch(timestamps + utc_offsets)
+
+            # an interval spanning a change of the offset, i.e. of daylight saving time, keeps the offset of its start
+            end_reduced_seconds_since_epoch = reduced_seconds_since_epoch[1:]
+            is_changing = utc_offsets[1:] != utc_offsets[:-1]
+            if numpy.any(is_changing):
+                end_reduced_seconds_since_epoch = end_reduced_seconds_since_epoch.copy()
+                end_reduced_seconds_since_epoch[is_changing] = self._get_reduced_seconds_since_epoch(timestamps[1:][is_changing] + utc_offsets[:-1][is_changing])
+
+            reduced_seconds = end_reduced_seconds_since_epoch - reduced_seconds_since_epoch[:-1]
+        else:
+            reduced_seconds = numpy.zeros(len(intervals), dtype=numpy.int64)
+
+        normal_seconds = intervals - reduced_seconds
+        watt_hours_per_second = power_in_milliwatt[:-1] / (1000*3600)
+
+        costs[:-1] = numpy.where(intervals <= max_interval, watt_hours_per_second / 1000 * (normal_seconds*self.normal_price_in_cent + reduced_seconds*self.reduced_period_price_in_cent), 0)
+
+        return costs
+
+    def __str__(self):
+        name = self.__class__.__name__
+        return name + "(normal_price_in_cent=" + str(self.normal_price_in_cent) + ", reduced_period_price_in_cent=" + str(self.reduced_period_price_in_cent) + ", reduced_period_start_isotime=" + str(self.reduced_period_start_isotime) + ", reduced_period_end_isotime=" + str(self.reduced_period_end_isotime) + ", is_reduced_period=" + str(self.is_reduced_period) + ")"
@@ -0,0 +1,68 @@
+import unittest
+
+from sem6000.adapter_scheduler import AdapterScheduler
+from sem6000.bluetooth_lowenergy_interface.simulated_interface import SimulatedBluetoothInterface, SimulatedSEM6000Device
+
+class BrokenBluetoothInterface(SimulatedBluetoothInterface):
+    def connect(self, mac_address):
+        raise Exception("Failed to connect to peripheral " + mac_address)
+
+class AdapterSchedulerTest(unittest.TestCase):
+    def setUp(self):
+        self.devices = {}
+        for i in range(4):
+            address = '00:11:22:33:44:0' + str(i)
+            self.devices[address] = SimulatedSEM6000Device(address, pin='1234')
+
+        self.adapter_scheduler = AdapterScheduler(['hci0', 'hci1'])
+
+    def test_spread_over_bluetooth_devices(self):
+        def create_bluetooth_lowenergy_interface(bluetooth_device):
+            return SimulatedBluetoothInterface(bluetooth_device=bluetooth_device, devices=self.devices)
+
+        connected_devices = [self.adapter_scheduler.connect(address, '1234', backend=create_bluetooth_lowenergy_interface) for address in self.devices]
+
+        self.assertEqual(2, self.adapter_scheduler.get_number_of_links('hci0'), 'number of links of hci0 differs')
+        self.assertEqual(2, self.adapter_scheduler.get_number_of_links('hci1'), 'number of links of hci1 differs')
+
+        for device in connected_devices:
+            self.adapter_scheduler.disconnect(device)
+
+        self.assertEqual(0, self.adapter_scheduler.get_number_of_links('hci0'), 'number of links of hci0 differs')
+
+    def test_prefer_bluetooth_device_with_better_rssi(self):
+        self.devices['00:11:22:33:44:00'].rssi_by_bluetooth_device['hci0'] = -85
+        self.devices['00:11:22:33:44:00'].rssi_by_bluetooth_device['hci1'] = -55
+
+        def create_bluetooth_lowenergy_interface(bluetooth_device):
+            return SimulatedBluetoothInterface(bluetooth_device=bluetooth_device, devices=self.devices)
+
+        self.adapter_scheduler.discover(backend=create_bluetooth_lowenergy_interface)
+
+        self.assertEqual(['hci1', 'hci0'], self.adapter_scheduler.rank('00:11:22:33:44:00'), 'rank differs')
+        self.assertEqual(['hci0', 'hci1'], self.adapter_scheduler.rank('00:11:22:33:44:01'), 'rank differs')
+
+    def test_fail_over(self):
+        def create_bluetooth_lowenergy_interface(bluetooth_device):
+            if bluetooth_device == 'hci0':
+                return BrokenBluetoothInterface(bluetooth_device=bluetooth_device, devices=self.devices)
+
+            return SimulatedBluetoothInterface(bluetooth_device=bluetooth_device, devices=self.devices)
+
+        for address in self.devices:
+            self.adapter_scheduler.connect(address, '1234', backend=create_bluetooth_lowenergy_interface)
+
+        self.assertEqual(0, self.adapter_scheduler.get_number_of_links('hci0'), 'number of links of hci0 differs')
+        self.assertEqual(4, self.adapter_scheduler.get_number_of_links('hci1'), 'number of links of hci1 differs')
+        self.assertEqual(1.0, self.adapter_scheduler.get_failure_rate('hci0'), 'failure rate of hci0 differs')
+
+    def test_wrong_pin_is_not_failed_over(self):
+        def create_bluetooth_lowenergy_interface(bluetooth_device):
+            return SimulatedBluetoothInterface(bluetooth_device=bluetooth_device, devices=self.devices)
+
+        with self.assertRaises(Exception):
+            self.adapter_scheduler.connect('00:11:22:33:44:00', '9999', backend=create_bluetooth_lowenergy_interface)
+
+        for bluetooth_device in ['hci0', 'hci1']:
+            self.assertEqual(0, self.adapter_scheduler.get_number_of_links(bluetooth_device), 'number of links of ' + bluetooth_device + ' differs')
+            self.assertEqual(0, self.adapter_scheduler.get_failure_rate(bluetooth_device), 'failure rate of ' + bluetooth_device + ' differs')
@@ -0,0 +1,43 @@
+import datetime
+import unittest
+
+import numpy
+
+from sem6000 import analytics
+from sem6000.message import ConsumptionOfLast30DaysRequestedNotification, ConsumptionOfLast23HoursRequestedNotification
+
+class AnalyticsTest(unittest.TestCase):
+    def test_to_series(self):
+        notification = ConsumptionOfLast30DaysRequestedNotification([None] + list(range(1, 31)))
+        series = analytics.to_series(notification, device_datetime=datetime.datetime(2020, 3, 2, 10, 30))
+
+        self.assertEqual(31, len(series), 'number of periods differs')
+        self.assertEqual(numpy.datetime64('2020-02-01'), series.timestamps[0], 'first timestamp differs')
+        self.assertEqual(numpy.datetime64('2020-03-02'), series.timestamps[-1], 'last timestamp differs')
+        self.assertEqual(30, series.consumption_in_watt_hour[0], 'oldest consumption differs')
+        self.assertTrue(numpy.isnan(series.consumption_in_watt_hour[-1]), 'running day is not NaN')
+
+    def test_stack_resample_and_sum_over_devices(self):
+        device_datetime = datetime.datetime(2020, 3, 2, 1, 30)
+        first = analytics.to_series(ConsumptionOfLast23HoursRequestedNotification([1] * 24), device_datetime)
+        second = analytics.to_series(ConsumptionOfLast23HoursRequestedNotification([2] * 24), device_datetime + datetime.timedelta(hours=1))
+
+        stacked = analytics.stack([first, second])
+        self.assertEqual((2, 25), stacked.consumption_in_watt_hour.shape, 'shape differs')
+
+        daily = analytics.resample(stacked, 'D')
+        self.assertEqual([[22, 2], [42, 6]], daily.consumption_in_watt_hour.tolist(), 'daily consumption differs')
+
+        total = analytics.sum_over_devices(stacked)
+        self.assertEqual([1, 3, 2], total.consumption_in_watt_hour[[0, 1, -1]].tolist(), 'total consumption differs')
+
+    def test_moving_average_and_weekday_profile(self):
+        # 2020-03-01 was a sunday
+        series = analytics.ConsumptionSeries(numpy.arange('2020-03-01', '2020-03-15', dtype='datetime64[D]'), numpy.array([1.0, numpy.nan] + [2.0] * 12))
+
+        averages = analytics.moving_average(series, 3).consumption_in_watt_hour
+        self.assertTrue(numpy.isnan(averages[1]), 'incomplete window is not NaN')
+        self.assertEqual([1.5, 2.0], averages[2:4].tolist(), 'moving average differs')
+
+        profile = analytics.weekday_profile(series)
+        self.assertEqual([1.5, 2.0], profile[0:2].tolist(), 'weekday profile differs')
@@ -0,0 +1,127 @@
+import asyncio
+import time
+import unittest
+
+from sem6000.async_sem6000 import AsyncSEM6000
+from sem6000.bluetooth_lowenergy_interface.simulated_interface import AsyncSimulatedBluetoothInterface, SimulatedSEM6000Device
+from sem6000.message import *
+
+class CountingBluetoothInterface(AsyncSimulatedBluetoothInterface):
+    def __init__(self, drop_before_write_number=None, **kwargs):
+        AsyncSimulatedBluetoothInterface.__init__(self, **kwargs)
+
+        self.drop_before_write_number = drop_before_write_number
+        self.number_of_writes = 0
+        self.max_number_of_pending_deliveries = 0
+
+    async def write_to_characteristic(self, uuid, data, with_response=None):
+        self.number_of_writes += 1
+        if self.number_of_writes == self.drop_before_write_number:
+            await self.disconnect()
+
+        result = await AsyncSimulatedBluetoothInterface.write_to_characteristic(self, uuid, data, with_response)
+        self.max_number_of_pending_deliveries = max(self.max_number_of_pending_deliveries, len(self._pending_deliveries))
+
+        return result
+
+class AsyncSEM6000Test(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.device = SimulatedSEM6000Device('00:11:22:33:44:55', name='plug', pin='1234')
+        self.interface = CountingBluetoothInterface(devices={self.device.mac_address: self.device}, fragment_size=5, latency=0.01)
+
+        self.sem6000 = AsyncSEM6000(self.interface, timeout=1)
+        await self.sem6000.connect(self.device.mac_address)
+        await self.sem6000.authorize('1234')
+
+    async def test_power_and_measurement(self):
+        await self.sem6000.power_on()
+        measurement = await self.sem6000.request_measurement()
+
+        self.assertEqual(True, measurement.is_power_active, 'is_power_active value differs')
+        self.assertEqual(self.device.power_in_milliwatt, measurement.power_in_milliwatt, 'power_in_milliwatt value differs')
+
+    async def test_gather_is_serialized_by_lock(self):
+        await self.sem6000.change_power_limit(2500)
+
+        results = await asyncio.gather(*[coroutine for i in range(5) for coroutine in (self.sem6000.request_settings(), self.sem6000.request_measurement(), self.sem6000.request_device_serial())])
+
+        self.assertEqual([SettingsRequestedNotification, MeasurementRequestedNotification, DeviceSerialRequestedNotification] * 5, [type(result) for result in results], 'replies assigned to wrong commands')
+        self.assertEqual(2500, results[0].power_limit_in_watt, 'power_limit_in_watt value differs')
+        self.assertEqual(1, self.interface.max_number_of_pending_deliveries, 'commands of concurrent tasks overlapped')
+
+    async def test_gather_over_many_devices(self):
+        number_of_devices = 20
+        devices = [SimulatedSEM6000Device('00:11:22:33:44:' + '%02x' % i) for i in range(number_of_devices)]
+        latency = 0.05
+
+        async def request_measurement(device):
+            sem6000 = AsyncSEM6000(AsyncSimulatedBluetoothInterface(devices={device.mac_address: device}, latency=latency), timeout=1)
+            await sem6000.connect(device.mac_address)
+            await sem6000.authorize('0000')
+
+            return await sem6000.request_measurement()
+
+        start_time = time.monotonic()
+        measurements = await asyncio.gather(*[request_measurement(device) for device in devices])
+        elapsed_time = time.monotonic() - start_time
+
+        self.assertEqual(number_of_devices, len(measurements), 'number of measurements differs')
+        # each device needs 6 round trips - one after another this would take number_of_devices * 6 * latency
+        self.assertLess(elapsed_time, number_of_devices * latency, 'devices have not been polled concurrently')
+
+    async def test_timeout(self):
+        # the device does not answer before authorization
+        self.device.is_authorized = False
+        self.sem6000.timeout = 0.05
+
+        start_time = time.monotonic()
+        with self.assertRaises(Exception):
+            await self.sem6000.request_measurement()
+
+        self.assertLess(time.monotonic() - start_time, 0.5, 'waited longer than the timeout')
+
+    async def test_reconnect_after_disconnect(self):
+        await self.interface.disconnect()
+
+        await self.sem6000.power_on()
+        self.assertEqual(True, self.device.is_power_active, 'power state of device differs')
+
+    async def test_run_pipelined(self):
+        for i in range(6):
+            await self.sem6000.add_repeated_scheduler(True, True, 'Mon', '1' + str(i) + ':00')
+
+        commands = [RequestSchedulerCommand(page_number=1), RequestSettingsCommand(), RequestSchedulerCommand(page_number=0)]
+        scheduler_page_1, settings, scheduler_page_0 = await self.sem6000.run_pipelined(commands)
+
+        self.assertEqual([4, 5], [entry.slot_id for entry in scheduler_page_1.scheduler_entries], 'slot ids of 2nd page differ')
+        self.assertEqual([0, 1, 2, 3], [entry.slot_id for entry in scheduler_page_0.scheduler_entries], 'slot ids of 1st page differ')
+        self.assertEqual(SettingsRequestedNotification, type(settings), 'settings reply differs')
+
+    async def test_run_batch_reconnects_after_connection_drop(self):
+        # the link drops on the 2nd write of the batch which is repeated after authorizing again
+        self.interface.drop_before_write_number = self.interface.number_of_writes + 2
+
+        commands = [ChangePinCommand('1234', '4321'), ChangePowerLimitCommand(power_limit_in_watt=1000), RequestSettingsCommand()]
+        pin_changed, power_limit_changed, settings = await self.sem6000.run_batch(commands)
+
+        self.assertEqual(True, pin_changed.was_successful, 'was_successful value differs')
+        self.assertEqual(1000, settings.power_limit_in_watt, 'power_limit_in_watt value differs')
+        self.assertEqual('4321', self.device.pin, 'pin of device differs')
+
+
+    async def test_request_scheduler_pipelines_further_pages(self):
+        for i in range(10):
+            await self.sem6000.add_repeated_scheduler(True, True, 'Mon', '1' + str(i) + ':00')
+
+        # the write responses would delay the writes by a round trip otherwise
+        self.sem6000.write_without_response = True
+        self.interface.max_number_of_pending_deliveries = 0
+        scheduler = await self.sem6000.request_scheduler()
+
+        self.assertEqual(list(range(10)), [entry.slot_id for entry in scheduler.scheduler_entries], 'slot ids differ')
+        self.assertEqual(2, self.interface.max_number_of_pending_deliveries, 'further pages have not been pipelined')
+
+    async def test_discover(self):
+        devices = await AsyncSEM6000.discover(timeout=0, backend=self.interface)
+
+        self.assertEqual([self.device.mac_address], [device['address'] for device in devices], 'discovered devices differ')
@@ -0,0 +1,178 @@
+import asyncio
+import gc
+import sys
+import threading
+import time
+import types
+import unittest
+from unittest import mock
+
+from sem6000.async_sem6000 import AsyncSEM6000
+from sem6000.bluetooth_lowenergy_interface.simulated_interface import SimulatedSEM6000Device, _get_fragments
+from sem6000.encoder import MessageEncoder
+from sem6000.sem6000 import SEM6000
+
+# bleak is optional - the tests replace it by the fakes below
+with mock.patch.dict(sys.modules, {'bleak': sys.modules.get('bleak') or types.ModuleType('bleak')}):
+    from sem6000.bluetooth_lowenergy_interface import bleak_interface
+
+class FakeBleakError(Exception):
+    pass
+
+class FakeCharacteristic():
+    def __init__(self, uuid, properties):
+        self.uuid = uuid
+        self.properties = properties
+
+class FakeBleakClient():
+    '''BlueZ object tree of one SEM6000 device backed by a SimulatedSEM6000Device.'''
+
+    devices = {}
+    write_responses = []
+    is_hanging = False
+
+    def __init__(self, address, adapter='hci0'):
+        self.address = address
+        self.adapter = adapter
+        self.is_connected = False
+
+        self.services = [types.SimpleNamespace(characteristics=[
+            FakeCharacteristic(SEM6000.CHARACTERISTIC_UUID_NAME, ['read']),
+            FakeCharacteristic(SEM6000.CHARACTERISTIC_UUID_CONTROL, ['write', 'write-without-response']),
+            FakeCharacteristic(SEM6000.CHARACTERISTIC_UUID_RESPONSE, ['notify'])
+        ])]
+
+        self._callback_by_uuid = {}
+        self._encoder = MessageEncoder()
+
+    async def connect(self):
+        if not self.address in FakeBleakClient.devices:
+            raise FakeBleakError("Device with address " + self.address + " was not found")
+
+        self.is_connected = True
+
+    async def disconnect(self):
+        self.is_connected = False
+
+    async def start_notify(self, characteristic, callback):
+        self._callback_by_uuid[characteristic.uuid] = (characteristic, callback)
+
+    async def stop_notify(self, characteristic):
+        del self._callback_by_uuid[characteristic.uuid]
+
+    async def write_gatt_char(self, uuid, data, response=False):
+        FakeBleakClient.write_responses.append(response)
+
+        if FakeBleakClient.is_hanging:
+            # i.e. a write stuck in BlueZ
+            await asyncio.sleep(10)
+
+        notification = FakeBleakClient.devices[self.address].handle_raw_command(bytes(data))
+        if notification is None or not SEM6000.CHARACTERISTIC_UUID_RESPONSE in self._callback_by_uuid:
+            return
+
+        # BlueZ signals the fragments after the write returned
+        characteristic, callback = self._callback_by_uuid[SEM6000.CHARACTERISTIC_UUID_RESPONSE]
+        for fragment in _get_fragments(self._encoder, notification, 20):
+            asyncio.get_running_loop().call_soon(callback, characteristic, bytearray(fragment))
+
+    async def read_gatt_char(self, uuid):
+        return bytearray(FakeBleakClient.devices[self.address].name.encode())
+
+class FakeBleakScanner():
+    @staticmethod
+    async def discover(timeout=5, service_uuids=None, adapter='hci0'):
+        return [types.SimpleNamespace(address=device.mac_address, name=device.name, rssi=device.rssi) for device in FakeBleakClient.devices.values()]
+
+class BleakInterfaceTest(unittest.TestCase):
+    def setUp(self):
+        fake_bleak = types.SimpleNamespace(BleakClient=FakeBleakClient, BleakScanner=FakeBleakScanner, exc=types.SimpleNamespace(BleakError=FakeBleakError))
+        patcher = mock.patch.object(bleak_interface, 'bleak', fake_bleak)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.device = SimulatedSEM6000Device('00:11:22:33:44:55', name='plug', pin='1234')
+        FakeBleakClient.devices = {self.device.mac_address: self.device}
+        FakeBleakClient.write_responses = []
+        FakeBleakClient.is_hanging = False
+
+        self.interface = bleak_interface.BleakBtLeInterface()
+
+    def test_sem6000_over_bleak(self):
+        sem6000 = SEM6000(self.device.mac_address, '1234', timeout=1, backend=self.interface)
+
+        sem6000.power_on()
+        self.assertEqual(True, self.device.is_power_active, 'power state of device differs')
+        self.assertEqual(True, sem6000.request_measurement().is_power_active, 'is_power_active value differs')
+        self.assertEqual('plug', sem6000.request_device_name().device_name, 'device name differs')
+
+        sem6000.disconnect()
+        self.assertEqual(False, self.interface.is_connected(), 'interface still connected')
+
+    def test_write_response_flag(self):
+        SEM6000(self.device.mac_address, '1234', timeout=1, backend=self.interface).power_on()
+        self.assertEqual([True, True], FakeBleakClient.write_responses, 'write modes differ')
+
+        FakeBleakClient.write_responses = []
+        SEM6000(self.device.mac_address, '1234', timeout=1, backend=bleak_interface.BleakBtLeInterface(), write_without_response=True).power_on()
+        self.assertEqual([False, False], FakeBleakClient.write_responses, 'write modes differ')
+
+    def test_notifications_are_handled_in_calling_thread(self):
+        thread_ids = []
+        self.interface.add_notification_handler(lambda characteristic_uuid, data: thread_ids.append(threading.get_ident()))
+
+        SEM6000(self.device.mac_address, '1234', timeout=1, backend=self.interface)
+
+        self.assertLess(0, len(thread_ids), 'no notification handled')
+        self.assertEqual({threading.get_ident()}, set(thread_ids), 'notifications handled in the loop thread')
+
+    def test_wait_for_notifications_timeout(self):
+        self.interface.connect(self.device.mac_address)
+
+        start_time = time.monotonic()
+        self.assertEqual(False, self.interface.wait_for_notifications(0.1), 'notification received')
+        elapsed_time = time.monotonic() - start_time
+
+        self.assertLessEqual(0.1, elapsed_time, 'returned before the timeout')
+        self.assertLess(elapsed_time, 1, 'waited much longer than the timeout')
+
+    def test_connect_to_unknown_device(self):
+        with self.assertRaises(FakeBleakError):
+            self.interface.connect('00:00:00:00:00:00')
+
+        self.assertEqual(False, self.interface.is_connected(), 'interface connected')
+
+    def test_discover(self):
+        self.assertEqual([{'address': self.device.mac_address, 'name': 'plug', 'rssi': self.device.rssi}], SEM6000.discover(backend=self.interface), 'discovered devices differ')
+
+    def test_loop_stopped_on_del(self):
+        loop_thread = self.interface._loop_thread
+        self.interface = None
+        gc.collect()
+
+        loop_thread.join(1)
+        self.assertEqual(False, loop_thread.is_alive(), 'loop thread still running')
+
+    def test_async_sem6000_over_bleak(self):
+        async def run():
+            sem6000 = AsyncSEM6000(bleak_interface.AsyncBleakBtLeInterface(), timeout=1)
+            await sem6000.connect(self.device.mac_address)
+            await sem6000.authorize('1234')
+            await sem6000.power_on()
+
+            return await sem6000.request_measurement()
+
+        self.assertEqual(True, asyncio.run(run()).is_power_active, 'is_power_active value differs')
+
+    def test_hanging_write_times_out(self):
+        # backend='bleak' passes the timeout of SEM6000 to the interface
+        with mock.patch.dict(sys.modules, {bleak_interface.__name__: bleak_interface}):
+            sem6000 = SEM6000(self.device.mac_address, '1234', timeout=0.1, backend='bleak')
+
+        FakeBleakClient.is_hanging = True
+        start_time = time.monotonic()
+        with self.assertRaises(Exception):
+            sem6000.power_on()
+
+        self.assertLess(time.monotonic() - start_time, 1, 'waited much longer than the timeout')
+        self.assertEqual(False, sem6000._bluetooth_lowenergy_interface.is_connected(), 'device still connected')
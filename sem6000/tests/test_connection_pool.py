@@ -0,0 +1,103 @@
+import time
+import unittest
+
+from sem6000.connection_pool import SEM6000ConnectionPool
+from sem6000.bluetooth_lowenergy_interface.simulated_interface import SimulatedBluetoothInterface, SimulatedSEM6000Device
+
+class CountingBluetoothInterface(SimulatedBluetoothInterface):
+    number_of_connects = 0
+
+    def connect(self, mac_address):
+        CountingBluetoothInterface.number_of_connects += 1
+
+        SimulatedBluetoothInterface.connect(self, mac_address)
+
+class SlowDisconnectingBluetoothInterface(SimulatedBluetoothInterface):
+    def disconnect(self):
+        if self.is_connected():
+            time.sleep(0.5)
+
+        SimulatedBluetoothInterface.disconnect(self)
+
+class SEM6000ConnectionPoolTest(unittest.TestCase):
+    def setUp(self):
+        self.devices = {}
+        for i in range(3):
+            address = '00:11:22:33:44:0' + str(i)
+            self.devices[address] = SimulatedSEM6000Device(address, pin='1234')
+
+        self.interfaces = []
+        def create_bluetooth_lowenergy_interface(bluetooth_device):
+            self.interfaces.append(CountingBluetoothInterface(bluetooth_device=bluetooth_device, devices=self.devices))
+            return self.interfaces[-1]
+
+        CountingBluetoothInterface.number_of_connects = 0
+        self.pool = SEM6000ConnectionPool(max_connections=2, idle_timeout=None, timeout=1, backend=create_bluetooth_lowenergy_interface)
+
+    def test_reuse_connection(self):
+        for i in range(3):
+            with self.pool.connection('00:11:22:33:44:00', '1234') as device:
+                device.power_on()
+
+        self.assertEqual(1, CountingBluetoothInterface.number_of_connects, 'number of connects differs')
+
+    def test_evict_least_recently_used_connection(self):
+        for address in ['00:11:22:33:44:00', '00:11:22:33:44:01', '00:11:22:33:44:00', '00:11:22:33:44:02', '00:11:22:33:44:00']:
+            with self.pool.connection(address, '1234') as device:
+                device.request_measurement()
+
+        self.assertEqual(3, CountingBluetoothInterface.number_of_connects, 'number of connects differs')
+        self.assertEqual(2, self.pool.get_number_of_connections(), 'number of connections differs')
+
+    def test_evict_idle_connection(self):
+        self.pool.idle_timeout = 0.05
+
+        with self.pool.connection('00:11:22:33:44:00', '1234') as device:
+            device.request_measurement()
+        time.sleep(0.2)
+
+        self.assertEqual(0, self.pool.get_number_of_connections(), 'number of connections differs')
+        self.assertEqual(False, device._is_connected(), 'idle connection still open')
+
+    def test_wrong_pin(self):
+        with self.assertRaises(Exception):
+            self.pool.acquire('00:11:22:33:44:00', '0000')
+
+        self.assertEqual(False, self.interfaces[0].is_connected(), 'link of failed authorization still open')
+        self.assertEqual(0, self.pool.get_number_of_connections(), 'number of connections differs')
+
+        with self.pool.connection('00:11:22:33:44:00', '1234') as device:
+            device.power_on()
+
+        self.assertEqual(True, self.devices['00:11:22:33:44:00'].is_power_active, 'power state of device differs')
+
+    def test_reconnect_dropped_connection(self):
+        with self.pool.connection('00:11:22:33:44:00', '1234') as device:
+            device.disconnect()
+
+        with self.pool.connection('00:11:22:33:44:00', '1234') as device:
+            self.assertEqual(True, device._is_connected(), 'dropped connection not reconnected')
+            device.power_on()
+
+        self.assertEqual(True, self.devices['00:11:22:33:44:00'].is_power_active, 'power state of device differs')
+
+    def test_slow_disconnect_does_not_block_pool(self):
+        def create_bluetooth_lowenergy_interface(bluetooth_device):
+            return SlowDisconnectingBluetoothInterface(bluetooth_device=bluetooth_device, devices=self.devices)
+
+        pool = SEM6000ConnectionPool(max_connections=2, idle_timeout=0.05, timeout=1, backend=create_bluetooth_lowenergy_interface)
+
+        with pool.connection('00:11:22:33:44:00', '1234') as device:
+            device.request_measurement()
+
+        # the idle connection is being disconnected meanwhile
+        time.sleep(0.15)
+
+        start_time = time.monotonic()
+        with pool.connection('00:11:22:33:44:01', '1234') as device:
+            device.request_measurement()
+        self.assertLess(time.monotonic() - start_time, 0.3, 'acquire waited for the disconnect of another device')
+
+        # the device being disconnected is connected again once its connection is closed
+        with pool.connection('00:11:22:33:44:00', '1234') as device:
+            self.assertEqual(True, device._is_connected(), 'connection not established')
@@ -0,0 +1,83 @@
+import os
+import stat
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from sem6000.daemon import SEM6000Daemon, SEM6000DaemonClient
+from sem6000.bluetooth_lowenergy_interface.simulated_interface import SimulatedBluetoothInterface, SimulatedSEM6000Device
+from sem6000.message import *
+from sem6000 import util
+
+class SEM6000DaemonTest(unittest.TestCase):
+    def setUp(self):
+        self.device = SimulatedSEM6000Device('00:11:22:33:44:55', pin='1234')
+        devices = {self.device.mac_address: self.device}
+
+        def create_bluetooth_lowenergy_interface(bluetooth_device):
+            return SimulatedBluetoothInterface(bluetooth_device=bluetooth_device, devices=devices)
+
+        self.directory = tempfile.TemporaryDirectory()
+        socket_path = os.path.join(self.directory.name, 'sem6000d.sock')
+
+        self.server = SEM6000Daemon(socket_path, backend=create_bluetooth_lowenergy_interface)
+        self.server_thread = threading.Thread(target=self.server.serve_forever)
+        self.server_thread.start()
+
+        self.client = SEM6000DaemonClient(socket_path)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.shutdown()
+        self.server_thread.join()
+        self.server.server_close()
+        self.directory.cleanup()
+
+    def test_execute_methods(self):
+        remote_device = self.client.get_device(self.device.mac_address, '1234')
+
+        remote_device.power_on()
+        remote_device.add_repeated_scheduler(True, True, 'Mon,Fri', '10:00')
+
+        measurement = remote_device.request_measurement()
+        self.assertEqual(True, isinstance(measurement, MeasurementRequestedNotification), 'notification type differs')
+        self.assertEqual(True, measurement.is_power_active, 'is_power_active value differs')
+
+        scheduler = remote_device.request_scheduler()
+        self.assertEqual([util.Weekday.MONDAY, util.Weekday.FRIDAY], scheduler.scheduler_entries[0].scheduler.repeat_on_weekdays, 'repeat_on_weekdays value differs')
+
+        self.assertEqual([self.device.mac_address], [d['address'] for d in self.client.discover()], 'discovered devices differ')
+
+    def test_errors(self):
+        with self.assertRaises(Exception):
+            self.client.call('_reconnect', self.device.mac_address, '1234')
+
+        with self.assertRaises(Exception):
+            self.client.get_device(self.device.mac_address, '0000').power_on()
+
+        self.client.get_device(self.device.mac_address, '1234').power_on()
+        self.assertEqual(True, self.device.is_power_active, 'power state of device differs')
+
+    def test_unauthorized_methods(self):
+        remote_device = self.client.get_device(self.device.mac_address, None)
+
+        self.assertEqual(self.device.name, remote_device.request_device_name().device_name, 'device name differs')
+
+        remote_device.reset_pin()
+        self.assertEqual('0000', self.device.pin, 'pin of device differs')
+
+        with self.assertRaises(Exception):
+            remote_device.power_on()
+
+    def test_socket_is_created_private(self):
+        socket_path = os.path.join(self.directory.name, 'private.sock')
+
+        # the permissions must already be set by bind()
+        with mock.patch('os.chmod'):
+            server = SEM6000Daemon(socket_path, backend=SimulatedBluetoothInterface)
+
+        try:
+            self.assertEqual(0, stat.S_IMODE(os.stat(socket_path).st_mode) & 0o077, 'socket accessible by others')
+        finally:
+            server.server_close()
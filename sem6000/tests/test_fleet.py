@@ -0,0 +1,112 @@
+import asyncio
+import threading
+import time
+import unittest
+
+from sem6000.adapter_scheduler import AdapterScheduler
+from sem6000.fleet import FleetPoller
+from sem6000.bluetooth_lowenergy_interface.simulated_interface import SimulatedBluetoothInterface, SimulatedSEM6000Device
+
+class CountingBluetoothInterface(SimulatedBluetoothInterface):
+    lock = threading.Lock()
+    number_of_connections = 0
+    max_number_of_connections = 0
+
+    def connect(self, mac_address):
+        with CountingBluetoothInterface.lock:
+            CountingBluetoothInterface.number_of_connections += 1
+            CountingBluetoothInterface.max_number_of_connections = max(CountingBluetoothInterface.max_number_of_connections, CountingBluetoothInterface.number_of_connections)
+
+        SimulatedBluetoothInterface.connect(self, mac_address)
+
+    def disconnect(self):
+        with CountingBluetoothInterface.lock:
+            if self.is_connected():
+                CountingBluetoothInterface.number_of_connections -= 1
+
+        SimulatedBluetoothInterface.disconnect(self)
+
+class SlowAdapterScheduler(AdapterScheduler):
+    '''Assigns the devices one after another so that the first devices are polled before the last ones are assigned.'''
+
+    def __init__(self, bluetooth_devices):
+        AdapterScheduler.__init__(self, bluetooth_devices)
+
+        self.number_of_acquires = 0
+
+    def acquire(self, device_address, exclude=()):
+        with self._lock:
+            self.number_of_acquires += 1
+            delay = 0.05 * self.number_of_acquires
+
+        time.sleep(delay)
+
+        return AdapterScheduler.acquire(self, device_address, exclude)
+
+class FleetPollerTest(unittest.TestCase):
+    def setUp(self):
+        CountingBluetoothInterface.number_of_connections = 0
+        CountingBluetoothInterface.max_number_of_connections = 0
+
+        self.devices = {}
+        for i in range(5):
+            address = '00:11:22:33:44:0' + str(i)
+            self.devices[address] = SimulatedSEM6000Device(address, pin='1234')
+
+    def _create_bluetooth_lowenergy_interface(self, bluetooth_device):
+        return CountingBluetoothInterface(bluetooth_device=bluetooth_device, devices=self.devices, latency=0.01, connect_latency=0.01)
+
+    def _poll_all_devices(self, poller):
+        poller.start()
+
+        polled_addresses = set()
+        for sample in poller:
+            self.assertEqual(None, sample.error, 'poll failed')
+
+            polled_addresses.add(sample.device_address)
+            if len(polled_addresses) == len(self.devices):
+                break
+        poller.stop()
+
+    def test_poll_with_connection_limit(self):
+        poller = FleetPoller([(address, '1234') for address in self.devices], interval=0, max_connections_per_bluetooth_device=2, timeout=1, backend=self._create_bluetooth_lowenergy_interface)
+        self._poll_all_devices(poller)
+
+        self.assertEqual(2, CountingBluetoothInterface.max_number_of_connections, 'maximum number of simultaneous connections differs')
+        self.assertEqual(0, CountingBluetoothInterface.number_of_connections, 'connections left open')
+
+    def test_connection_limit_with_devices_assigned_later(self):
+        # the first two devices keep their connections until their next poll after the third one is assigned to the same bluetooth device
+        poller = FleetPoller([(address, '1234') for address in self.devices], interval=0.3, max_connections_per_bluetooth_device=2, timeout=1, backend=self._create_bluetooth_lowenergy_interface, adapter_scheduler=SlowAdapterScheduler(['hci0']))
+        self._poll_all_devices(poller)
+
+        self.assertEqual(2, CountingBluetoothInterface.max_number_of_connections, 'maximum number of simultaneous connections differs')
+        self.assertEqual(0, CountingBluetoothInterface.number_of_connections, 'connections left open')
+
+    def test_cancelled_async_iteration_frees_executor(self):
+        poller = FleetPoller([], backend=self._create_bluetooth_lowenergy_interface)
+
+        async def iterate():
+            with self.assertRaises(asyncio.TimeoutError):
+                await asyncio.wait_for(poller.__aiter__().__anext__(), 0.1)
+
+            # an executor thread blocked in the sample queue would never finish
+            await asyncio.wait_for(asyncio.get_running_loop().shutdown_default_executor(), 1)
+
+        asyncio.run(iterate())
+
+    def test_wrong_pin_is_no_failure_of_bluetooth_device(self):
+        adapter_scheduler = AdapterScheduler(['hci0', 'hci1'])
+        address = '00:11:22:33:44:00'
+
+        poller = FleetPoller([(address, '9999')], interval=0, timeout=1, backend=self._create_bluetooth_lowenergy_interface, adapter_scheduler=adapter_scheduler)
+        poller.start()
+
+        for i, sample in enumerate(poller):
+            self.assertNotEqual(None, sample.error, 'poll with wrong pin succeeded')
+            if i == 3:
+                break
+        poller.stop()
+
+        self.assertEqual(0, adapter_scheduler.get_failure_rate('hci0'), 'failure rate of hci0 differs')
+        self.assertEqual(0, adapter_scheduler.get_failure_rate('hci1'), 'failure rate of hci1 differs')
@@ -0,0 +1,114 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+
+from sem6000 import fleet_backup
+from sem6000.bluetooth_lowenergy_interface.simulated_interface import SimulatedBluetoothInterface, SimulatedSEM6000Device
+
+class FleetBackupTest(unittest.TestCase):
+    def setUp(self):
+        self.devices = {}
+        for i in range(4):
+            address = '00:11:22:33:44:0' + str(i)
+            self.devices[address] = SimulatedSEM6000Device(address, name='plug' + str(i), pin='1234')
+
+    def _create_bluetooth_lowenergy_interface(self, bluetooth_device):
+        return SimulatedBluetoothInterface(bluetooth_device=bluetooth_device, devices=self.devices)
+
+    def test_backup_and_restore(self):
+        devices = self.devices
+        create_bluetooth_lowenergy_interface = self._create_bluetooth_lowenergy_interface
+
+        with tempfile.TemporaryDirectory() as directory:
+            inventory_path = os.path.join(directory, 'inventory')
+            with open(inventory_path, 'w') as f:
+                f.write('# address pin bluetooth device\n')
+                for i, address in enumerate(devices):
+                    f.write(address + ' 1234 hci' + str(i % 2) + '\n')
+                f.write('00:11:22:33:44:99 9999\n')
+
+            inventory = fleet_backup.read_inventory(inventory_path)
+            self.assertEqual(5, len(inventory), 'number of inventory entries differs')
+
+            # the device with the wrong pin fails and stays pending
+            backup_path = os.path.join(directory, 'backup.json')
+            errors = fleet_backup.backup(inventory, backup_path, max_connections_per_bluetooth_device=2, timeout=1, backend=create_bluetooth_lowenergy_interface)
+            self.assertEqual(['00:11:22:33:44:99'], list(errors), 'failed devices differ')
+            self.assertTrue(os.path.exists(backup_path + '.progress'), 'progress file is missing')
+
+            with open(backup_path) as f:
+                backup = json.load(f)
+            self.assertEqual('plug2', backup["devices"]['00:11:22:33:44:02']["device-name"], 'device name differs')
+
+            # resuming only contacts the failed device
+            devices['00:11:22:33:44:01'].name = 'renamed'
+            del inventory[-1]
+            self.assertEqual({}, fleet_backup.backup(inventory, backup_path, timeout=1, backend=create_bluetooth_lowenergy_interface), 'errors differ')
+            self.assertFalse(os.path.exists(backup_path + '.progress'), 'progress file has not been removed')
+
+            with open(backup_path) as f:
+                backup = json.load(f)
+            self.assertEqual('plug1', backup["devices"]['00:11:22:33:44:01']["device-name"], 'finished device has been backed up again')
+
+            report_path = os.path.join(directory, 'report.json')
+            self.assertEqual({}, fleet_backup.restore(inventory, backup_path, report_path, timeout=1, backend=create_bluetooth_lowenergy_interface), 'errors differ')
+            self.assertEqual('plug1', devices['00:11:22:33:44:01'].name, 'restored device name differs')
+
+            with open(report_path) as f:
+                report = json.load(f)
+            self.assertEqual([], report["devices"]['00:11:22:33:44:00'], 'commands of an unchanged device differ')
+
+    def test_outdated_backup_progress(self):
+        inventory = [(address, '1234', 'hci0') for address in self.devices] + [('00:11:22:33:44:99', '9999', 'hci0')]
+
+        with tempfile.TemporaryDirectory() as directory:
+            backup_path = os.path.join(directory, 'backup.json')
+            fleet_backup.backup(inventory, backup_path, timeout=1, backend=self._create_bluetooth_lowenergy_interface)
+
+            # the interrupted run started too long ago - all devices are backed up again
+            self.devices['00:11:22:33:44:01'].name = 'renamed'
+            time.sleep(0.01)
+            fleet_backup.backup(inventory[:-1], backup_path, timeout=1, backend=self._create_bluetooth_lowenergy_interface, max_progress_age=0)
+
+            with open(backup_path) as f:
+                backup = json.load(f)
+            self.assertEqual('renamed', backup["devices"]['00:11:22:33:44:01']["device-name"], 'device name differs')
+
+    def test_restore_of_changed_backup(self):
+        inventory = [(address, '1234', 'hci0') for address in self.devices]
+
+        with tempfile.TemporaryDirectory() as directory:
+            backup_path = os.path.join(directory, 'backup.json')
+            report_path = os.path.join(directory, 'report.json')
+            fleet_backup.backup(inventory, backup_path, timeout=1, backend=self._create_bluetooth_lowenergy_interface)
+
+            # the device without backup fails, so the progress is kept
+            self.assertEqual(['00:11:22:33:44:99'], list(fleet_backup.restore(inventory + [('00:11:22:33:44:99', '9999', 'hci0')], backup_path, report_path, timeout=1, backend=self._create_bluetooth_lowenergy_interface)), 'failed devices differ')
+
+            with open(backup_path) as f:
+                backup = json.load(f)
+            backup["devices"]['00:11:22:33:44:01']["device-name"] = 'fixed'
+            with open(backup_path, 'w') as f:
+                json.dump(backup, f)
+
+            self.assertEqual({}, fleet_backup.restore(inventory, backup_path, report_path, timeout=1, backend=self._create_bluetooth_lowenergy_interface), 'errors differ')
+            self.assertEqual('fixed', self.devices['00:11:22:33:44:01'].name, 'device of the changed backup has not been restored again')
+
+    def test_interrupted_run_stops(self):
+        inventory = [('00:11:22:33:44:' + '%02x' % i, '1234', 'hci0') for i in range(10)]
+        started_device_addresses = []
+
+        def task(device_address, pin, bluetooth_device):
+            started_device_addresses.append(device_address)
+            if len(started_device_addresses) == 1:
+                raise KeyboardInterrupt()
+
+            time.sleep(0.05)
+
+        with tempfile.TemporaryDirectory() as directory:
+            with self.assertRaises(KeyboardInterrupt):
+                fleet_backup._run(inventory, task, fleet_backup._Progress(os.path.join(directory, 'progress')), 1, False)
+
+        self.assertLess(len(started_device_addresses), 4, 'devices queued before the interruption have been run')
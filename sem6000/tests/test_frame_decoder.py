@@ -0,0 +1,68 @@
+import unittest
+
+from sem6000.encoder import MessageEncoder
+from sem6000.parser import FrameDecoder
+from sem6000.message import *
+
+class FrameDecoderTest(unittest.TestCase):
+    def setUp(self):
+        self.frames = []
+        self.invalid_frames = []
+
+        self.frame_decoder = FrameDecoder(lambda frame: self.frames.append(bytes(frame)), lambda frame: self.invalid_frames.append(bytes(frame)))
+
+    def test_fragmented_frame(self):
+        encoded_message = MessageEncoder().encode(ConsumptionOfLast23HoursRequestedNotification(consumption_n_hours_ago_in_watt_hour=list(range(24))))
+
+        for i in range(0, len(encoded_message)-2, 20):
+            self.assertEqual(0, len(self.frames), 'frame emitted before its last byte arrived')
+            self.frame_decoder.feed(encoded_message[i:min(i+20, len(encoded_message)-2)])
+
+        self.assertEqual([encoded_message[:-2]], self.frames, 'frame differs')
+        self.assertEqual(False, self.frame_decoder.has_partial_frame(), 'incomplete frame expected to be emitted')
+
+    def test_frame_without_suffix(self):
+        encoded_message = MessageEncoder().encode(MeasurementRequestedNotification(is_power_active=True, power_in_milliwatt=80, voltage_in_volt=230, current_in_milliampere=1000, frequency_in_hertz=50, total_consumption_in_kilowatt_hour=1000))
+
+        self.frame_decoder.feed(encoded_message)
+
+        self.assertEqual([encoded_message], self.frames, 'frame differs')
+
+    def test_multiple_frames_in_one_fragment(self):
+        first_message = MessageEncoder().encode(PowerSwitchedNotification(was_successful=True))
+        second_message = MessageEncoder().encode(SchedulerChangedNotification(was_successful=True))
+
+        self.frame_decoder.feed(first_message + second_message[:3])
+        self.assertEqual([first_message[:-2]], self.frames, 'first frame differs')
+
+        self.frame_decoder.feed(second_message[3:])
+        self.assertEqual([first_message[:-2], second_message[:-2]], self.frames, 'second frame differs')
+
+    def test_invalid_checksum(self):
+        encoded_message = bytearray(MessageEncoder().encode(PowerSwitchedNotification(was_successful=True)))
+        encoded_message[-3] ^= 0xff
+
+        self.frame_decoder.feed(encoded_message)
+
+        self.assertEqual(0, len(self.frames), 'frame with invalid checksum emitted')
+        self.assertEqual([bytes(encoded_message[:-2])], self.invalid_frames, 'invalid frame not reported')
+
+
+    def test_growing_buffer_while_frame_is_referenced(self):
+        kept_views = []
+        def handle_frame(frame):
+            # i.e. a view kept by the traceback of a parse error
+            kept_views.append(frame[0:])
+            self.frames.append(bytes(frame))
+
+        frame_decoder = FrameDecoder(handle_frame)
+
+        payload = b'\xee\xee\x00'
+        frame_decoder.feed(b'\x0f' + bytes([len(payload) + 1]) + payload + bytes([(1 + sum(payload)) & 0xff]))
+
+        # more data than the initial buffer holds while a handler still references the view of the last frame
+        frame_decoder.feed(b'\x0f' + bytes(300))
+
+        encoded_message = MessageEncoder().encode(PowerSwitchedNotification(was_successful=True))
+        frame_decoder.feed(encoded_message)
+        self.assertEqual(encoded_message[:-2], self.frames[-1], 'frame differs')
@@ -0,0 +1,28 @@
+import os
+import tempfile
+import unittest
+
+from sem6000.bluetooth_lowenergy_interface.gatt_handle_cache import GattHandleCache
+
+class GattHandleCacheTest(unittest.TestCase):
+    def test_persist_and_invalidate(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'cache', 'gatt-handles.json')
+
+            cache = GattHandleCache(path)
+            cache.put('00:11:22:33:44:55', '0000fff3-0000-1000-8000-00805f9b34fb', 42, 0x0a, 43)
+
+            loaded_cache = GattHandleCache(path)
+            self.assertEqual((42, 0x0a, 43), loaded_cache.get('00:11:22:33:44:55', '0000fff3-0000-1000-8000-00805f9b34fb'), 'cached handles differ')
+            self.assertEqual(None, loaded_cache.get('00:11:22:33:44:55', '0000fff4-0000-1000-8000-00805f9b34fb'), 'handles of unknown uuid cached')
+
+            loaded_cache.invalidate('00:11:22:33:44:55')
+            self.assertEqual({}, GattHandleCache(path).get_all('00:11:22:33:44:55'), 'handles still cached after invalidation')
+
+    def test_damaged_cache_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'gatt-handles.json')
+            with open(path, 'w') as f:
+                f.write('{')
+
+            self.assertEqual(None, GattHandleCache(path).get('00:11:22:33:44:55', '0000fff3-0000-1000-8000-00805f9b34fb'), 'handles loaded from damaged cache')
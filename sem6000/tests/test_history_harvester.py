@@ -0,0 +1,88 @@
+import datetime
+import tempfile
+import unittest
+
+from sem6000.history_harvester import ConsumptionHistoryStore, HistoryHarvester, HOUR, DAY, MONTH
+from sem6000.message import ConsumptionOfLast12MonthsRequestedNotification, ConsumptionOfLast30DaysRequestedNotification, ConsumptionOfLast23HoursRequestedNotification
+
+class HistoryDevice():
+    def __init__(self):
+        self.connection_settings = {"device_address": '00:11:22:33:44:55'}
+        self.requests = []
+        self.consumption_n_hours_ago_in_watt_hour = [1] * 24
+
+    def request_consumption_of_last_23_hours(self):
+        self.requests.append(HOUR)
+        return ConsumptionOfLast23HoursRequestedNotification(self.consumption_n_hours_ago_in_watt_hour)
+
+    def request_consumption_of_last_30_days(self):
+        self.requests.append(DAY)
+        return ConsumptionOfLast30DaysRequestedNotification([None] + [24] * 30)
+
+    def request_consumption_of_last_12_months(self):
+        self.requests.append(MONTH)
+        return ConsumptionOfLast12MonthsRequestedNotification([None] + [720] * 12)
+
+class HistoryHarvesterTest(unittest.TestCase):
+    def test_harvest(self):
+        with tempfile.TemporaryDirectory() as directory:
+            store = ConsumptionHistoryStore(directory)
+            harvester = HistoryHarvester(store)
+            device = HistoryDevice()
+
+            result = harvester.harvest(device, device_datetime=datetime.datetime(2020, 3, 1, 22, 30))
+            self.assertEqual([HOUR, DAY, MONTH], device.requests, 'requests of the first harvest differ')
+            self.assertEqual({HOUR: 23, DAY: 30, MONTH: 12}, result, 'number of stored periods differs')
+            self.assertEqual(datetime.datetime(2020, 3, 1, 21), store.get_last_period('00:11:22:33:44:55', HOUR), 'last hour differs')
+
+            # nothing completed since the last harvest
+            device.requests = []
+            result = harvester.harvest(device, device_datetime=datetime.datetime(2020, 3, 1, 22, 50))
+            self.assertEqual([], device.requests, 'requests without missing periods differ')
+            self.assertEqual({HOUR: 0, DAY: 0, MONTH: 0}, result, 'number of stored periods differs')
+
+            # 22:00 of 2020-03-01 is out of the 23 hours window - the day has to be requested
+            device.requests = []
+            harvester.harvest(device, device_datetime=datetime.datetime(2020, 3, 2, 22, 10))
+            self.assertEqual([HOUR, DAY], device.requests, 'requests after midnight differ')
+
+            # 2020-03-02 is summed up from the stored hours
+            device.requests = []
+            for hour in range(1, 25):
+                harvester.harvest(device, device_datetime=datetime.datetime(2020, 3, 2, 22, 10) + datetime.timedelta(hours=hour))
+            self.assertEqual([HOUR] * 24, device.requests, 'requests of hourly harvests differ')
+            self.assertEqual((datetime.datetime(2020, 3, 2), 24), store.load('00:11:22:33:44:55', DAY)[-1], 'derived day differs')
+
+    def test_unknown_period_is_requested_again(self):
+        with tempfile.TemporaryDirectory() as directory:
+            store = ConsumptionHistoryStore(directory)
+            harvester = HistoryHarvester(store)
+            device = HistoryDevice()
+
+            # 5 hours ago is unknown - only the hours before it are stored
+            device.consumption_n_hours_ago_in_watt_hour = [1] * 5 + [None] + [1] * 18
+            result = harvester.harvest(device, device_datetime=datetime.datetime(2020, 3, 1, 22, 30))
+            self.assertEqual(18, result[HOUR], 'number of stored hours differs')
+            self.assertEqual(datetime.datetime(2020, 3, 1, 16), store.get_last_period('00:11:22:33:44:55', HOUR), 'last hour differs')
+
+            device.requests = []
+            device.consumption_n_hours_ago_in_watt_hour = [2] * 24
+            result = harvester.harvest(device, device_datetime=datetime.datetime(2020, 3, 1, 22, 50))
+            self.assertEqual([HOUR], device.requests, 'requests differ')
+            self.assertEqual(5, result[HOUR], 'number of stored hours differs')
+            self.assertEqual((datetime.datetime(2020, 3, 1, 17), 2), store.load('00:11:22:33:44:55', HOUR)[18], 'formerly unknown hour differs')
+
+    def test_harvest_without_derived_periods(self):
+        with tempfile.TemporaryDirectory() as directory:
+            store = ConsumptionHistoryStore(directory)
+            harvester = HistoryHarvester(store, derive_coarser_periods=False)
+            device = HistoryDevice()
+
+            harvester.harvest(device, device_datetime=datetime.datetime(2020, 3, 2, 0, 30))
+            harvester.harvest(device, device_datetime=datetime.datetime(2020, 3, 2, 22, 10))
+
+            # the stored hours cover 2020-03-01 completely - the day is requested nevertheless
+            device.requests = []
+            harvester.harvest(device, device_datetime=datetime.datetime(2020, 3, 3, 0, 10))
+            self.assertEqual([HOUR, DAY], device.requests, 'requests after midnight differ')
+            self.assertEqual((datetime.datetime(2020, 3, 2), 24), store.load('00:11:22:33:44:55', DAY)[-1], 'requested day differs')
@@ -0,0 +1,80 @@
+import os
+import struct
+import tempfile
+import unittest
+
+from sem6000.measurement_store import MeasurementStore
+from sem6000.message import MeasurementRequestedNotification
+
+class MeasurementStoreTest(unittest.TestCase):
+    def test_append_flush_and_load(self):
+        with tempfile.TemporaryDirectory() as directory:
+            store = MeasurementStore(directory, flush_threshold=3)
+
+            for i in range(5):
+                measurement = MeasurementRequestedNotification(is_power_active=True, power_in_milliwatt=60000+i, voltage_in_volt=230, current_in_milliampere=260, frequency_in_hertz=50, total_consumption_in_kilowatt_hour=i)
+                store.append('00:11:22:33:44:55', measurement, timestamp=1600000000+i)
+
+            with store.load('00:11:22:33:44:55') as series:
+                self.assertEqual(5, len(series), 'number of samples differs')
+                self.assertEqual(list(range(1600000000, 1600000005)), list(series.timestamp), 'timestamps differ')
+                self.assertEqual(60004, series.power_in_milliwatt[4], 'power_in_milliwatt value differs')
+                self.assertEqual(1, series.is_power_active[0], 'is_power_active value differs')
+
+            self.assertEqual(['00:11:22:33:44:55'], MeasurementStore(directory).get_device_addresses(), 'device addresses differ')
+
+    def test_interrupted_flush(self):
+        with tempfile.TemporaryDirectory() as directory:
+            store = MeasurementStore(directory)
+            measurement = MeasurementRequestedNotification(is_power_active=False, power_in_milliwatt=0, voltage_in_volt=230, current_in_milliampere=0, frequency_in_hertz=50, total_consumption_in_kilowatt_hour=7)
+            store.append('00:11:22:33:44:55', measurement, timestamp=1600000000)
+            store.flush()
+
+            # the header of a second chunk of which the samples were not written
+            with open(os.path.join(directory, '00-11-22-33-44-55.chunks'), 'ab') as f:
+                f.write(struct.pack('<II', 1, 1000))
+
+            store = MeasurementStore(directory)
+            with store.load('00:11:22:33:44:55') as series:
+                self.assertEqual(1, len(series.timestamp), 'number of timestamps differs')
+
+            store.append('00:11:22:33:44:55', measurement, timestamp=1600000001)
+            with store.load('00:11:22:33:44:55') as series:
+                self.assertEqual([1600000000, 1600000001], list(series.timestamp), 'timestamps differ')
+                self.assertEqual([7, 7], list(series.total_consumption_in_kilowatt_hour), 'total_consumption_in_kilowatt_hour values differ')
+
+    def test_compact_encoding(self):
+        number_of_samples = 3600
+
+        with tempfile.TemporaryDirectory() as directory:
+            store = MeasurementStore(directory)
+
+            for i in range(number_of_samples):
+                voltage_in_volt = 229 + i % 3
+                power_in_milliwatt = 60000 + (i*7919) % 1000
+                measurement = MeasurementRequestedNotification(is_power_active=True, power_in_milliwatt=power_in_milliwatt, voltage_in_volt=voltage_in_volt, current_in_milliampere=power_in_milliwatt // voltage_in_volt, frequency_in_hertz=50, total_consumption_in_kilowatt_hour=1000 + i // 1000)
+                store.append('00:11:22:33:44:55', measurement, timestamp=1600000000 + i)
+
+            # power takes two bytes, voltage, current and total consumption one byte each
+            self.assertLess(store.get_size('00:11:22:33:44:55'), number_of_samples*5 + 200, 'samples are not compact')
+
+            with store.load('00:11:22:33:44:55') as series:
+                self.assertEqual(number_of_samples, len(series), 'number of samples differs')
+                self.assertEqual(1600000000 + number_of_samples - 1, series.timestamp[-1], 'timestamp value differs')
+                self.assertEqual(60000 + (3599*7919) % 1000, series.power_in_milliwatt[-1], 'power_in_milliwatt value differs')
+                self.assertEqual([229, 230, 231], list(series.voltage_in_volt[:3]), 'voltage_in_volt values differ')
+                self.assertEqual(1003, series.total_consumption_in_kilowatt_hour[-1], 'total_consumption_in_kilowatt_hour value differs')
+
+    def test_byte_order(self):
+        with tempfile.TemporaryDirectory() as directory:
+            store = MeasurementStore(directory)
+            measurement = MeasurementRequestedNotification(is_power_active=True, power_in_milliwatt=0x010203, voltage_in_volt=230, current_in_milliampere=260, frequency_in_hertz=50, total_consumption_in_kilowatt_hour=7)
+            store.append('00:11:22:33:44:55', measurement, timestamp=0x5f5e1000)
+            store.flush()
+
+            with open(os.path.join(directory, '00-11-22-33-44-55.chunks'), 'rb') as f:
+                data = f.read()
+
+            # files are little endian on every platform
+            self.assertEqual((1, len(data) - 8), struct.unpack_from('<II', data, 0), 'chunk header differs')
+            self.assertEqual((0x5f5e1000, 0, 0), struct.unpack_from('<qqB', data, 8), 'timestamp column differs')
@@ -0,0 +1,28 @@
+import unittest
+
+from sem6000 import message_benchmark
+from sem6000.message import *
+
+class MessageBenchmarkTest(unittest.TestCase):
+    def test_every_message_class_is_measured(self):
+        sample_classes = [type(message_object) for message_object in message_benchmark.get_sample_messages()]
+        self.assertEqual(len(set(sample_classes)), len(sample_classes), 'message classes are measured twice')
+
+        for cls in message_benchmark.get_message_classes():
+            if not cls in message_benchmark.NOT_ENCODABLE_CLASSES:
+                self.assertIn(cls, sample_classes, 'message class is not measured')
+
+    def test_measure_and_find_regressions(self):
+        result = message_benchmark.measure(MeasurementRequestedNotification(is_power_active=True, power_in_milliwatt=60000, voltage_in_volt=230, current_in_milliampere=260, frequency_in_hertz=50, total_consumption_in_kilowatt_hour=12), number=10, repeat=1)
+        self.assertEqual(19, result["frame_length"], 'frame length differs')
+        self.assertGreater(result["parse_ns"], 0, 'parse time is missing')
+
+        baseline = {"results": {"MeasurementRequestedNotification": result}}
+        record = {"results": {"MeasurementRequestedNotification": dict(result, parse_ns=2*result["parse_ns"], encode_retained_blocks=result["encode_retained_blocks"]+1)}}
+
+        regressions = message_benchmark.find_regressions(baseline, record)
+        self.assertEqual(['encode_retained_blocks', 'parse_ns'], sorted(metric for name, metric, baseline_value, value in regressions), 'regressions differ')
+        self.assertEqual([], message_benchmark.find_regressions(baseline, baseline), 'regressions of an equal record differ')
+
+        # a single slow run does not shift the baseline
+        self.assertEqual([], message_benchmark.find_regressions(message_benchmark.get_baseline([baseline, record, baseline]), baseline), 'regressions against the median differ')
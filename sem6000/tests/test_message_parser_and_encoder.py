@@ -3,6 +3,7 @@ import unittest
 from sem6000.encoder import MessageEncoder
 from sem6000.parser import MessageParser
 from sem6000.message import *
+from sem6000 import message
 from sem6000 import util
 
 class MessagesTest(unittest.TestCase):
@@ -203,6 +204,18 @@ class MessagesTest(unittest.TestCase):
         self.assertEqual(50, parsed_message.frequency_in_hertz, 'frequency_in_hertz value differs')
         self.assertEqual(1000, parsed_message.total_consumption_in_kilowatt_hour, 'total_consumption_in_kilowatt_hour value differs')
 
+    def test_MeasurementRequestedNotification_with_three_byte_values(self):
+        message = MeasurementRequestedNotification(is_power_active=False, power_in_milliwatt=0x123456, voltage_in_volt=240, current_in_milliampere=0xfedc, frequency_in_hertz=60, total_consumption_in_kilowatt_hour=0x12345678)
+        encoded_message = MessageEncoder().encode(message)
+        parsed_message = MessageParser().parse(encoded_message)
+
+        self.assertEqual(False, parsed_message.is_power_active, 'is_power_active value differs')
+        self.assertEqual(0x123456, parsed_message.power_in_milliwatt, 'power_in_milliwatt value differs')
+        self.assertEqual(240, parsed_message.voltage_in_volt, 'voltage_in_volt value differs')
+        self.assertEqual(0xfedc, parsed_message.current_in_milliampere, 'current_in_milliampere value differs')
+        self.assertEqual(60, parsed_message.frequency_in_hertz, 'frequency_in_hertz value differs')
+        self.assertEqual(0x12345678, parsed_message.total_consumption_in_kilowatt_hour, 'total_consumption_in_kilowatt_hour value differs')
+
     def test_ConsumptionOfLast12MonthsRequestedNotification(self):
         message = ConsumptionOfLast12MonthsRequestedNotification(consumption_n_months_ago_in_watt_hour=[None, 10,20,30,40,50,60,70,80,90,100,110,120])
         encoded_message = MessageEncoder().encode(message)
@@ -256,3 +269,9 @@ class MessagesTest(unittest.TestCase):
         self.assertEqual("ML01D10012000000", message.serial, 'serial value differs')
 
 
+
+    def test_every_command_is_answered_by_a_notification(self):
+        # SEM6000(write_without_response=True) relies on the notification to confirm each command
+        command_classes = [message_class for name, message_class in vars(message).items() if name.endswith('Command') and not name.startswith('Abstract')]
+
+        self.assertEqual(set(command_classes), set(NOTIFICATION_CLASS_BY_COMMAND_CLASS), 'commands without notification differ')
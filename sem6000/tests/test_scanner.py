@@ -0,0 +1,26 @@
+import time
+import unittest
+
+from sem6000.scanner import BackgroundScanner
+from sem6000.bluetooth_lowenergy_interface.simulated_interface import SimulatedBluetoothInterface, SimulatedSEM6000Device
+
+class BackgroundScannerTest(unittest.TestCase):
+    def test_index_advertisements(self):
+        device = SimulatedSEM6000Device('00:11:22:33:44:55', name='kitchen')
+        interface = SimulatedBluetoothInterface(devices={device.mac_address: device})
+
+        scanner = BackgroundScanner(backend=interface, scan_duration=0.01)
+        self.assertEqual(None, scanner.get('00:11:22:33:44:55'), 'advertisement of unseen device found')
+
+        scanner.start()
+        time.sleep(0.05)
+        device.rssi = -70
+        time.sleep(0.05)
+        scanner.stop()
+
+        advertisement = scanner.get('00:11:22:33:44:55')
+        self.assertEqual('kitchen', advertisement.name, 'name differs')
+        self.assertEqual(-70, advertisement.rssi, 'rssi differs')
+        self.assertEqual(True, scanner.is_reachable('00:11:22:33:44:55'), 'device not reachable')
+        self.assertEqual(False, scanner.is_reachable('00:11:22:33:44:55', max_age=-1), 'outdated advertisement considered reachable')
+        self.assertEqual(['00:11:22:33:44:55'], [a.address for a in scanner.get_all(max_age=60)], 'addresses differ')
@@ -0,0 +1,76 @@
+import gc
+import os
+import tracemalloc
+import unittest
+
+import sem6000
+from sem6000.encoder import MessageEncoder
+from sem6000.message import *
+from sem6000.sem6000 import SEM6000Delegate
+
+class SEM6000DelegateAllocationTest(unittest.TestCase):
+    def setUp(self):
+        encoder = MessageEncoder()
+
+        encoded_messages = [
+            encoder.encode(ConsumptionOfLast23HoursRequestedNotification(consumption_n_hours_ago_in_watt_hour=list(range(24)))),
+            encoder.encode(MeasurementRequestedNotification(is_power_active=True, power_in_milliwatt=80, voltage_in_volt=230, current_in_milliampere=1000, frequency_in_hertz=50, total_consumption_in_kilowatt_hour=1000))
+        ]
+
+        # notifications arrive in fragments of 20 bytes
+        self.fragments_of_messages = [[m[i:i+20] for i in range(0, len(m), 20)] for m in encoded_messages]
+
+        self.delegate = SEM6000Delegate()
+
+    def _decode(self, number_of_notifications):
+        for i in range(number_of_notifications):
+            for fragment in self.fragments_of_messages[i % len(self.fragments_of_messages)]:
+                self.delegate(None, fragment)
+
+            self.delegate.consume_notification()
+
+    def test_allocations_per_notification(self):
+        number_of_notifications = 1000
+
+        # fill caches of the parser before measuring
+        self._decode(10)
+
+        tracemalloc.start()
+        try:
+            gc.collect()
+            snapshot_before = tracemalloc.take_snapshot()
+            memory_before, peak = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+
+            self._decode(number_of_notifications)
+
+            memory_after, peak = tracemalloc.get_traced_memory()
+            snapshot_after = tracemalloc.take_snapshot()
+        finally:
+            tracemalloc.stop()
+
+        package_filter = tracemalloc.Filter(True, os.path.join(os.path.dirname(sem6000.__file__), '*'))
+        differences = snapshot_after.filter_traces([package_filter]).compare_to(snapshot_before.filter_traces([package_filter]), 'filename')
+        retained_blocks = sum(difference.count_diff for difference in differences)
+
+        self.assertLess(retained_blocks / number_of_notifications, 0.05, 'decoded notifications leave blocks behind')
+
+        # buffers are reused - the peak is the size of one notification and not of all fed fragments
+        self.assertLess(peak - memory_before, 8192, 'peak memory grows with the number of notifications')
+
+class SEM6000DelegateTest(unittest.TestCase):
+    def test_unsupported_message_followed_by_long_fragment(self):
+        delegate = SEM6000Delegate()
+
+        # valid checksum but unknown opcode
+        payload = b'\xee\xee\x00'
+        delegate(None, b'\x0f' + bytes([len(payload) + 1]) + payload + bytes([(1 + sum(payload)) & 0xff]))
+
+        # more data than the initial buffer holds while the parse error is queued
+        delegate(None, b'\x0f' + bytes(300))
+
+        with self.assertRaises(Exception):
+            delegate.consume_notification()
+
+        delegate(None, MessageEncoder().encode(PowerSwitchedNotification(was_successful=True)))
+        self.assertEqual(True, delegate.consume_notification().was_successful, 'was_successful value differs')
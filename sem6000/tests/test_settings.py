@@ -0,0 +1,70 @@
+import unittest
+
+from sem6000.sem6000 import SEM6000
+from sem6000.bluetooth_lowenergy_interface.simulated_interface import SimulatedBluetoothInterface, SimulatedSEM6000Device
+from sem6000.encoder import MessageEncoder
+from sem6000.message import *
+from sem6000 import settings
+
+class RecordingBluetoothInterface(SimulatedBluetoothInterface):
+    def __init__(self, **kwargs):
+        SimulatedBluetoothInterface.__init__(self, **kwargs)
+
+        self.written_data = []
+
+    def write_to_characteristic(self, uuid, data, with_response=None):
+        self.written_data.append(bytes(data))
+
+        return SimulatedBluetoothInterface.write_to_characteristic(self, uuid, data, with_response)
+
+class SettingsTest(unittest.TestCase):
+    def setUp(self):
+        self.source_device = SimulatedSEM6000Device('00:11:22:33:44:55', name='kitchen')
+        self.target_device = SimulatedSEM6000Device('00:11:22:33:44:66')
+        interface = SimulatedBluetoothInterface(devices={self.source_device.mac_address: self.source_device, self.target_device.mac_address: self.target_device})
+
+        self.source = SEM6000(self.source_device.mac_address, '0000', timeout=1, backend=interface)
+        self.source.change_prices(30, 20)
+        self.source.change_reduced_period(True, '22:00', '06:00')
+        self.source.nightmode_on()
+        self.source.change_random_mode('Mon,Tue', '10:00', '12:30')
+        self.source.add_repeated_scheduler(True, True, 'Mon,Fri', '10:00')
+        self.source.add_onetime_scheduler(True, False, '2030-01-01T12:00')
+
+        self.target = SEM6000(self.target_device.mac_address, '0000', timeout=1, backend=SimulatedBluetoothInterface(devices=interface.devices))
+
+    def test_apply_settings(self):
+        desired_state = settings.get_state(self.source)
+
+        commands = settings.apply_settings(self.target, desired_state)
+        self.assertEqual(7, len(commands), 'number of commands differs')
+        self.assertEqual(desired_state, settings.get_state(self.target), 'state of target differs')
+
+        self.assertEqual([], settings.apply_settings(self.target, desired_state), 'commands of an unchanged state differ')
+
+    def test_scheduler_diff(self):
+        desired_state = settings.get_state(self.source)
+
+        # the repeated scheduler moves from slot 0 to slot 2 and a new scheduler takes slot 0
+        self.source.remove_scheduler(0)
+        self.source.add_onetime_scheduler(True, True, '2030-01-02T12:00')
+        self.source.add_repeated_scheduler(True, True, 'Mon,Fri', '10:00')
+
+        commands = settings.get_commands(settings.get_state(self.source), desired_state)
+        self.assertEqual(1, len(commands), 'number of commands differs')
+        self.assertIsInstance(commands[0], RemoveSchedulerCommand)
+        self.assertEqual(0, commands[0].slot_id, 'slot id of removed scheduler differs')
+
+    def test_get_state_of_many_schedulers(self):
+        for i in range(8):
+            self.source.add_repeated_scheduler(True, True, 'Sun', '1' + str(i) + ':00')
+
+        interface = RecordingBluetoothInterface(devices={self.source_device.mac_address: self.source_device})
+        source = SEM6000(self.source_device.mac_address, '0000', timeout=1, backend=interface)
+
+        state = settings.get_state(source)
+
+        self.assertEqual(10, len(state["scheduler"]["entries"]), 'number of schedulers differs')
+        encoder = MessageEncoder()
+        for page_number in range(3):
+            self.assertEqual(1, interface.written_data.count(encoder.encode(RequestSchedulerCommand(page_number=page_number))), 'number of requests of page ' + str(page_number) + ' differs')
@@ -0,0 +1,183 @@
+import unittest
+
+from sem6000.sem6000 import SEM6000
+from sem6000.bluetooth_lowenergy_interface.simulated_interface import SimulatedBluetoothInterface, SimulatedSEM6000Device
+from sem6000.message import *
+from sem6000 import util
+from sem6000.state_cache import StateCache
+
+class DroppingBluetoothInterface(SimulatedBluetoothInterface):
+    def __init__(self, drop_before_write_number, **kwargs):
+        SimulatedBluetoothInterface.__init__(self, **kwargs)
+
+        self.drop_before_write_number = drop_before_write_number
+        self.number_of_writes = 0
+
+    def write_to_characteristic(self, uuid, data, with_response=None):
+        self.number_of_writes += 1
+        if self.number_of_writes == self.drop_before_write_number:
+            self.disconnect()
+
+        return SimulatedBluetoothInterface.write_to_characteristic(self, uuid, data, with_response)
+
+class RecordingBluetoothInterface(SimulatedBluetoothInterface):
+    def __init__(self, **kwargs):
+        SimulatedBluetoothInterface.__init__(self, **kwargs)
+
+        self.with_response_values = []
+
+    def write_to_characteristic(self, uuid, data, with_response=None):
+        self.with_response_values.append(with_response)
+
+        return SimulatedBluetoothInterface.write_to_characteristic(self, uuid, data, with_response)
+
+class SimulatedInterfaceTest(unittest.TestCase):
+    def setUp(self):
+        self.device = SimulatedSEM6000Device('00:11:22:33:44:55', name='plug', pin='1234')
+        self.interface = SimulatedBluetoothInterface(devices={self.device.mac_address: self.device}, fragment_size=5)
+
+        self.sem6000 = SEM6000(self.device.mac_address, '1234', timeout=1, backend=self.interface)
+
+    def test_power_and_measurement(self):
+        self.sem6000.power_on()
+        self.assertEqual(True, self.device.is_power_active, 'power state of device differs')
+
+        measurement = self.sem6000.request_measurement()
+        self.assertEqual(True, measurement.is_power_active, 'is_power_active value differs')
+        self.assertEqual(self.device.power_in_milliwatt, measurement.power_in_milliwatt, 'power_in_milliwatt value differs')
+
+        self.sem6000.power_off()
+        self.assertEqual(False, self.sem6000.request_measurement().is_power_active, 'is_power_active value differs')
+
+    def test_settings(self):
+        self.sem6000.change_prices(30, 20)
+        self.sem6000.change_reduced_period(True, '22:00', '06:00')
+        self.sem6000.change_power_limit(2500)
+        self.sem6000.nightmode_on()
+
+        settings = self.sem6000.request_settings()
+        self.assertEqual(30, settings.normal_price_in_cent, 'normal_price_in_cent value differs')
+        self.assertEqual(20, settings.reduced_period_price_in_cent, 'reduced_period_price_in_cent value differs')
+        self.assertEqual(True, settings.is_reduced_period, 'is_reduced_period value differs')
+        self.assertEqual('22:00', settings.reduced_period_start_isotime, 'reduced_period_start_isotime value differs')
+        self.assertEqual('06:00', settings.reduced_period_end_isotime, 'reduced_period_end_isotime value differs')
+        self.assertEqual(2500, settings.power_limit_in_watt, 'power_limit_in_watt value differs')
+        self.assertEqual(True, settings.is_nightmode_active, 'is_nightmode_active value differs')
+
+    def test_scheduler(self):
+        for i in range(6):
+            self.sem6000.add_repeated_scheduler(True, True, 'Mon,Fri', '1' + str(i) + ':00')
+        self.sem6000.remove_scheduler(2)
+        self.sem6000.edit_repeated_scheduler(5, False, False, 'Sun', '23:45')
+
+        scheduler = self.sem6000.request_scheduler()
+        self.assertEqual(5, scheduler.number_of_schedulers, 'number_of_schedulers value differs')
+        self.assertEqual([0, 1, 3, 4, 5], [entry.slot_id for entry in scheduler.scheduler_entries], 'slot ids differ')
+        self.assertEqual([util.Weekday.SUNDAY], scheduler.scheduler_entries[4].scheduler.repeat_on_weekdays, 'repeat_on_weekdays of edited scheduler differ')
+        self.assertEqual(False, scheduler.scheduler_entries[4].scheduler.is_active, 'is_active of edited scheduler differs')
+
+        with self.assertRaises(Exception):
+            self.sem6000.remove_scheduler(2)
+
+    def test_random_mode_device_name_and_serial(self):
+        self.sem6000.change_random_mode('Mon,Tue', '10:00', '12:30')
+
+        random_mode = self.sem6000.request_random_mode_status()
+        self.assertEqual(True, random_mode.is_active, 'is_active value differs')
+        self.assertEqual([util.Weekday.MONDAY, util.Weekday.TUESDAY], random_mode.active_on_weekdays, 'active_on_weekdays value differs')
+        self.assertEqual('12:30', random_mode.end_isotime, 'end_isotime value differs')
+
+        self.sem6000.change_device_name('kitchen')
+        self.assertEqual('kitchen', self.sem6000.request_device_name().device_name, 'device name differs')
+        self.assertEqual(self.device.serial, self.sem6000.request_device_serial().serial, 'serial differs')
+
+    def test_run_pipelined(self):
+        self.sem6000.change_power_limit(2500)
+        for i in range(6):
+            self.sem6000.add_repeated_scheduler(True, True, 'Mon', '1' + str(i) + ':00')
+
+        commands = [RequestSchedulerCommand(page_number=1), RequestSettingsCommand(), RequestSchedulerCommand(page_number=0), RequestMeasurementCommand()]
+        scheduler_page_1, settings, scheduler_page_0, measurement = self.sem6000.run_pipelined(commands)
+
+        self.assertEqual([4, 5], [entry.slot_id for entry in scheduler_page_1.scheduler_entries], 'slot ids of 2nd page differ')
+        self.assertEqual([0, 1, 2, 3], [entry.slot_id for entry in scheduler_page_0.scheduler_entries], 'slot ids of 1st page differ')
+        self.assertEqual(2500, settings.power_limit_in_watt, 'power_limit_in_watt value differs')
+        self.assertEqual(self.device.is_power_active, measurement.is_power_active, 'is_power_active value differs')
+
+    def test_run_batch_reconnects_after_connection_drop(self):
+        # 1st write authorizes, the link drops on the 3rd write which is repeated after authorizing again
+        interface = DroppingBluetoothInterface(3, devices={self.device.mac_address: self.device})
+        sem6000 = SEM6000(self.device.mac_address, '1234', timeout=1, backend=interface)
+
+        commands = [ChangePinCommand('1234', '4321'), ChangePowerLimitCommand(power_limit_in_watt=1000), RequestSettingsCommand()]
+        pin_changed, power_limit_changed, settings = sem6000.run_batch(commands)
+
+        self.assertEqual(True, pin_changed.was_successful, 'was_successful value differs')
+        self.assertEqual(True, power_limit_changed.was_successful, 'was_successful value differs')
+        self.assertEqual(1000, settings.power_limit_in_watt, 'power_limit_in_watt value differs')
+        self.assertEqual('4321', self.device.pin, 'pin of device differs')
+        self.assertEqual(6, interface.number_of_writes, 'number of writes differs')
+
+    def test_write_without_response(self):
+        interface = RecordingBluetoothInterface(devices={self.device.mac_address: self.device})
+        sem6000 = SEM6000(self.device.mac_address, '1234', timeout=1, backend=interface, write_without_response=True)
+
+        sem6000.power_on()
+        self.assertEqual(True, self.device.is_power_active, 'power state of device differs')
+
+        sem6000.request_settings()
+        sem6000.run_pipelined([RequestMeasurementCommand(), RequestDeviceSerialCommand()])
+        self.assertEqual([False] * 5, interface.with_response_values, 'write modes differ')
+
+    def test_state_cache(self):
+        interface = RecordingBluetoothInterface(devices={self.device.mac_address: self.device})
+        sem6000 = SEM6000(self.device.mac_address, '1234', timeout=1, backend=interface, state_cache=StateCache())
+
+        sem6000.request_settings()
+        sem6000.request_settings().power_limit_in_watt = 1
+        self.assertEqual(2, len(interface.with_response_values), 'number of writes differs')
+        self.assertEqual(0, sem6000.request_settings().power_limit_in_watt, 'cached settings have been modified')
+
+        sem6000.change_power_limit(100)
+        self.assertEqual(100, sem6000.request_settings().power_limit_in_watt, 'power limit after change differs')
+        self.assertEqual(4, len(interface.with_response_values), 'number of writes differs')
+
+        sem6000.power_on()
+        sem6000.request_settings()
+        self.assertEqual(5, len(interface.with_response_values), 'number of writes differs')
+
+    def test_consumption_history(self):
+        self.sem6000.change_date_and_time('2020-03-01T00:00:00')
+        self.sem6000.power_on()
+        self.device.advance(3*24*3600 + 30*60)
+
+        hours = self.sem6000.request_consumption_of_last_23_hours().consumption_n_hours_ago_in_watt_hour
+        self.assertEqual([30] + [60] * 23, hours, 'consumption of last 23 hours differs')
+
+        days = self.sem6000.request_consumption_of_last_30_days().consumption_n_days_ago_in_watt_hour
+        self.assertEqual([None, 1440, 1440], days[:3], 'consumption of last days differs')
+        self.assertEqual([0] * 27, days[4:], 'consumption before power on differs')
+
+        months = self.sem6000.request_consumption_of_last_12_months().consumption_n_months_ago_in_watt_hour
+        self.assertEqual([None] + [0] * 12, months, 'running month expected not to be reported')
+
+        self.assertEqual(4, self.sem6000.request_measurement().total_consumption_in_kilowatt_hour, 'total_consumption_in_kilowatt_hour value differs')
+
+        # no consumption while power is off
+        self.sem6000.power_off()
+        self.device.advance(3600)
+        self.assertEqual(0, self.sem6000.request_consumption_of_last_23_hours().consumption_n_hours_ago_in_watt_hour[0], 'consumption while power is off')
+
+        self.sem6000.reset_consumption()
+        self.assertEqual(0, self.sem6000.request_measurement().total_consumption_in_kilowatt_hour, 'total_consumption_in_kilowatt_hour after reset differs')
+
+    def test_reconnect_after_disconnect(self):
+        self.sem6000.disconnect()
+
+        self.sem6000.power_on()
+        self.assertEqual(True, self.device.is_power_active, 'power state of device differs')
+
+    def test_wrong_pin(self):
+        with self.assertRaises(Exception):
+            SEM6000(self.device.mac_address, '0000', timeout=1, backend=SimulatedBluetoothInterface(devices={self.device.mac_address: self.device}))
+
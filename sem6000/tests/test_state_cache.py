@@ -0,0 +1,133 @@
+import asyncio
+import time
+import unittest
+
+from sem6000.async_sem6000 import AsyncSEM6000
+from sem6000.bluetooth_lowenergy_interface.simulated_interface import AsyncSimulatedBluetoothInterface, SimulatedSEM6000Device
+from sem6000.encoder import MessageEncoder
+from sem6000.message import *
+from sem6000.state_cache import StateCache, cached_state, SETTINGS, SCHEDULER, DEVICE_SERIAL
+
+def _create_settings(power_limit_in_watt=0):
+    return SettingsRequestedNotification(is_reduced_period=False, normal_price_in_cent=30, reduced_period_price_in_cent=20, reduced_period_start_isotime='22:00', reduced_period_end_isotime='06:00', is_nightmode_active=False, power_limit_in_watt=power_limit_in_watt)
+
+class StateCacheTest(unittest.TestCase):
+    def test_ttl_expiry(self):
+        state_cache = StateCache(ttl=0.05, ttl_by_state={DEVICE_SERIAL: None})
+        state_cache.put(SETTINGS, _create_settings())
+        state_cache.put(DEVICE_SERIAL, DeviceSerialRequestedNotification(serial='ML01D10012000000'))
+
+        self.assertEqual(0, state_cache.get(SETTINGS).power_limit_in_watt, 'cached settings differ')
+
+        time.sleep(0.1)
+        self.assertEqual(None, state_cache.get(SETTINGS), 'settings not expired')
+        self.assertEqual('ML01D10012000000', state_cache.get(DEVICE_SERIAL).serial, 'serial without ttl expired')
+
+    def test_write_invalidation(self):
+        state_cache = StateCache()
+        state_cache.put(SETTINGS, _create_settings())
+        state_cache.put(SCHEDULER, SchedulerRequestedNotification(number_of_schedulers=0, scheduler_entries=[]))
+
+        state_cache.invalidate_for_command(PowerSwitchCommand(on=True))
+        self.assertNotEqual(None, state_cache.get(SETTINGS), 'settings invalidated by command not changing them')
+
+        state_cache.invalidate_for_command(ChangePowerLimitCommand(power_limit_in_watt=1000))
+        self.assertEqual(None, state_cache.get(SETTINGS), 'settings not invalidated')
+        self.assertNotEqual(None, state_cache.get(SCHEDULER), 'scheduler invalidated by command not changing it')
+
+        state_cache.invalidate()
+        self.assertEqual(None, state_cache.get(SCHEDULER), 'scheduler not invalidated')
+
+    def test_put_after_invalidation_is_dropped(self):
+        state_cache = StateCache()
+
+        # the settings are requested, then changed before the reply is put
+        generation = state_cache.get_generation(SETTINGS)
+        state_cache.invalidate_for_command(ChangePowerLimitCommand(power_limit_in_watt=1000))
+        state_cache.put(SETTINGS, _create_settings(), generation)
+
+        self.assertEqual(None, state_cache.get(SETTINGS), 'outdated settings cached')
+
+        state_cache.put(SETTINGS, _create_settings(1000), state_cache.get_generation(SETTINGS))
+        self.assertEqual(1000, state_cache.get(SETTINGS).power_limit_in_watt, 'cached settings differ')
+
+    def test_deepcopy_isolation(self):
+        state_cache = StateCache()
+        settings = _create_settings()
+        state_cache.put(SETTINGS, settings)
+
+        settings.power_limit_in_watt = 1
+        state_cache.get(SETTINGS).power_limit_in_watt = 2
+
+        self.assertEqual(0, state_cache.get(SETTINGS).power_limit_in_watt, 'cached settings have been modified')
+
+class WritingBluetoothInterface(AsyncSimulatedBluetoothInterface):
+    def __init__(self, **kwargs):
+        AsyncSimulatedBluetoothInterface.__init__(self, **kwargs)
+
+        self.number_of_writes = 0
+        self.on_write = None
+
+    async def write_to_characteristic(self, uuid, data, with_response=None):
+        self.number_of_writes += 1
+        if not self.on_write is None:
+            self.on_write(bytes(data))
+
+        return await AsyncSimulatedBluetoothInterface.write_to_characteristic(self, uuid, data, with_response)
+
+class CachedStateDecoratorTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.device = SimulatedSEM6000Device('00:11:22:33:44:55', pin='1234')
+        self.interface = WritingBluetoothInterface(devices={self.device.mac_address: self.device}, latency=0.01)
+
+        self.sem6000 = AsyncSEM6000(self.interface, timeout=1, state_cache=StateCache())
+        await self.sem6000.connect(self.device.mac_address)
+        await self.sem6000.authorize('1234')
+
+    async def test_requests_are_cached(self):
+        await self.sem6000.request_settings()
+        number_of_writes = self.interface.number_of_writes
+
+        (await self.sem6000.request_settings()).power_limit_in_watt = 1
+        self.assertEqual(number_of_writes, self.interface.number_of_writes, 'cached settings requested again')
+        self.assertEqual(0, (await self.sem6000.request_settings()).power_limit_in_watt, 'cached settings have been modified')
+
+        await self.sem6000.change_power_limit(2500)
+        self.assertEqual(2500, (await self.sem6000.request_settings()).power_limit_in_watt, 'power limit after change differs')
+
+    async def test_write_during_request_is_not_hidden(self):
+        request_settings_frame = MessageEncoder().encode(RequestSettingsCommand())
+
+        def change_power_limit_by_other_task(data):
+            # a change of the settings is sent while the settings are requested - the reply may predate it
+            if data == request_settings_frame:
+                self.interface.on_write = None
+                self.sem6000.state_cache.invalidate_for_command(ChangePowerLimitCommand(power_limit_in_watt=2500))
+                self.device.power_limit_in_watt = 2500
+
+        self.interface.on_write = change_power_limit_by_other_task
+        await self.sem6000.request_settings()
+
+        self.assertEqual(None, self.sem6000.state_cache.get(SETTINGS), 'settings requested before the change cached')
+        self.assertEqual(2500, (await self.sem6000.request_settings()).power_limit_in_watt, 'power limit after change differs')
+
+    async def test_concurrent_request_and_change(self):
+        await asyncio.gather(self.sem6000.request_settings(), self.sem6000.change_power_limit(2500))
+
+        self.assertEqual(2500, (await self.sem6000.request_settings()).power_limit_in_watt, 'power limit after change differs')
+
+    async def test_without_state_cache(self):
+        class Requester():
+            state_cache = None
+            number_of_requests = 0
+
+            @cached_state(SETTINGS)
+            async def request_settings(self):
+                self.number_of_requests += 1
+                return _create_settings()
+
+        requester = Requester()
+        await requester.request_settings()
+        await requester.request_settings()
+
+        self.assertEqual(2, requester.number_of_requests, 'number of requests differs')
@@ -0,0 +1,48 @@
+import datetime
+import unittest
+import zoneinfo
+
+import numpy
+
+from sem6000 import analytics
+from sem6000.message import ConsumptionOfLast23HoursRequestedNotification, SettingsRequestedNotification
+from sem6000.tariff import Tariff
+
+class TariffTest(unittest.TestCase):
+    def test_reduced_period_wrapping_past_midnight(self):
+        settings = SettingsRequestedNotification(is_reduced_period=True, normal_price_in_cent=30, reduced_period_price_in_cent=20, reduced_period_start_isotime='22:30', reduced_period_end_isotime='06:00', is_nightmode_active=False, power_limit_in_watt=0)
+        tariff = Tariff.from_settings(settings)
+
+        notification = ConsumptionOfLast23HoursRequestedNotification([1000] * 24)
+        series = analytics.to_series(notification, datetime.datetime(2020, 3, 2, 23, 10))
+        costs = series.timestamps, tariff.get_costs_in_cent(series)
+
+        cost_by_hour = {int(timestamp.astype(datetime.datetime).hour): cost for timestamp, cost in zip(*costs)}
+        self.assertAlmostEqual(30, cost_by_hour[21], msg='normal price differs')
+        self.assertAlmostEqual(25, cost_by_hour[22], msg='partially reduced price differs')
+        self.assertAlmostEqual(20, cost_by_hour[23], msg='reduced price before midnight differs')
+        self.assertAlmostEqual(20, cost_by_hour[5], msg='reduced price after midnight differs')
+        self.assertAlmostEqual(30, cost_by_hour[6], msg='normal price after reduced period differs')
+
+    def test_measurement_costs(self):
+        tariff = Tariff(30, 20, '00:00', '12:00')
+
+        # 1000 W for one hour in the reduced period, a gap, and one hour at the normal price
+        timestamps = numpy.array([0, 3600, 12*3600, 13*3600, 20*3600])
+        power_in_milliwatt = numpy.array([1000000, 0, 1000000, 0, 0])
+
+        costs = tariff.get_measurement_costs_in_cent(timestamps, power_in_milliwatt, max_interval=3600, timezone=datetime.timezone.utc)
+        self.assertEqual([20, 0, 30, 0, 0], costs.tolist(), 'costs differ')
+
+    def test_measurement_costs_across_daylight_saving_time(self):
+        tariff = Tariff(30, 20, '00:00', '06:00')
+
+        def get_timestamp(isodatetime):
+            return int(datetime.datetime.fromisoformat(isodatetime).timestamp())
+
+        # 05:00 to 06:00 in winter time, 06:00 to 07:00 in summer time, then 01:30 to 03:30 local time on the day daylight saving time starts - which lasts one hour
+        timestamps = numpy.array([get_timestamp(t) for t in ['2024-01-15T05:00+01:00', '2024-01-15T06:00+01:00', '2024-07-15T06:00+02:00', '2024-07-15T07:00+02:00', '2024-03-31T01:30+01:00', '2024-03-31T03:30+02:00']])
+        power_in_milliwatt = numpy.array([1000000, 0, 1000000, 0, 1000000, 0])
+
+        costs = tariff.get_measurement_costs_in_cent(timestamps, power_in_milliwatt, max_interval=3600, timezone=zoneinfo.ZoneInfo('Europe/Berlin'))
+        self.assertEqual([20, 0, 30, 0, 20, 0], costs.tolist(), 'costs differ')
@@ -0,0 +1,78 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+import unittest
+
+from sem6000.bluetooth_lowenergy_interface.timeout_decorator import DisconnectAfterTimeout, Watchdog
+
+class Disconnectable:
+    def __init__(self):
+        self.disconnected = threading.Event()
+
+    def disconnect(self):
+        self.disconnected.set()
+
+    @DisconnectAfterTimeout(0.05)
+    def fast(self):
+        return 42
+
+    @DisconnectAfterTimeout(0.05)
+    def slow(self):
+        return self.disconnected.wait(1)
+
+class DisconnectAfterTimeoutTest(unittest.TestCase):
+    def test_no_disconnect_within_timeout(self):
+        disconnectable = Disconnectable()
+
+        for i in range(1000):
+            self.assertEqual(42, disconnectable.fast(), 'return value differs')
+
+        time.sleep(0.1)
+        self.assertEqual(False, disconnectable.disconnected.is_set(), 'disconnected although function returned in time')
+
+    def test_disconnect_after_timeout(self):
+        disconnectable = Disconnectable()
+
+        self.assertEqual(True, disconnectable.slow(), 'not disconnected after timeout')
+
+    def test_thread_count(self):
+        disconnectable = Disconnectable()
+        disconnectable.fast()
+
+        number_of_threads = threading.active_count()
+        for i in range(100):
+            disconnectable.fast()
+
+        self.assertEqual(number_of_threads, threading.active_count(), 'threads created per call')
+
+
+    def test_blocking_callback_does_not_delay_other_deadlines(self):
+        watchdog = Watchdog()
+        release = threading.Event()
+        expired = threading.Event()
+
+        # i.e. a disconnect waiting for a hanging bluepy-helper
+        watchdog.schedule(0.01, lambda: release.wait(5))
+        watchdog.schedule(0.05, expired.set)
+
+        try:
+            self.assertEqual(True, expired.wait(1), 'deadline delayed by a blocking callback')
+        finally:
+            release.set()
+
+    def test_blocking_callback_does_not_delay_exit(self):
+        script = "\n".join([
+            "import threading",
+            "from sem6000.bluetooth_lowenergy_interface.timeout_decorator import Watchdog",
+            "started = threading.Event()",
+            "Watchdog().schedule(0, lambda: started.set() or threading.Event().wait(5))",
+            "started.wait(1)"
+        ])
+        package_path = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+        start_time = time.monotonic()
+        subprocess.run([sys.executable, '-c', script], cwd=package_path, check=True, timeout=10)
+
+        self.assertLess(time.monotonic() - start_time, 3, 'exit waited for a blocking callback')
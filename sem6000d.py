@@ -0,0 +1,34 @@
+#!/usr/bin/python3
+
+import sys
+
+from sem6000 import daemon
+from sem6000.connection_pool import SEM6000ConnectionPool
+
+if len(sys.argv) > 1 and sys.argv[1] in ['-h', '--help']:
+    print("Usage: " + sys.argv[0] + " [<socket path>] [<bluetooth device>] [<state cache ttl>]", file=sys.stderr)
+    print("\tsocket path:\t\tunix socket to listen on. Default: " + daemon.get_default_socket_path(), file=sys.stderr)
+    print("\tbluetooth device:\tbluetooth device to connect with. Default: hci0", file=sys.stderr)
+    print("\tstate cache ttl:\tseconds settings, schedulers, random mode, name and serial of a device are answered from a cache. Default: no caching", file=sys.stderr)
+else:
+    socket_path = None
+    if len(sys.argv) > 1:
+        socket_path = sys.argv[1]
+
+    bluetooth_device = 'hci0'
+    if len(sys.argv) > 2:
+        bluetooth_device = sys.argv[2]
+
+    state_cache_ttl = None
+    if len(sys.argv) > 3:
+        state_cache_ttl = float(sys.argv[3])
+
+    connection_pool = SEM6000ConnectionPool(bluetooth_device=bluetooth_device, state_cache_ttl=state_cache_ttl)
+
+    server = daemon.SEM6000Daemon(socket_path, connection_pool=connection_pool, bluetooth_device=bluetooth_device)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()